@@ -15,6 +15,8 @@ import logging
 
 # Import our modules
 from core.clausewise_analyzer import ClauseWiseAnalyzer
+from models.tiered_router import request_priority
+from core.result_cache import content_digest
 from auth.auth_ui import require_authentication, render_user_menu, render_change_password_modal
 from auth.admin_panel import render_admin_panel
 from auth.authenticator import SecureAuthenticator
@@ -172,9 +174,13 @@ st.markdown("""
 @st.cache_resource
 def load_analyzer():
     """Load and cache the ClauseWise analyzer"""
-    with st.spinner("🔄 Loading AI models... This may take 2-3 minutes on first run."):
+    with st.spinner("🔄 Starting ClauseWise..."):
         try:
-            return ClauseWiseAnalyzer()
+            analyzer = ClauseWiseAnalyzer()
+            # Models keep loading in the background while the page renders
+            if ANALYZER_WARM_UP:
+                analyzer.start_warm_up()
+            return analyzer
         except Exception as e:
             st.error(f"Failed to load analyzer: {str(e)}")
             st.info("💡 Try refreshing the page or check your internet connection.")
@@ -243,6 +249,8 @@ def main():
     if hasattr(analyzer, 'model_type'):
         if analyzer.model_type == "granite":
             st.success("🚀 Using IBM Granite-3.2-2B model for advanced AI analysis")
+        elif analyzer.model_type == "tiered":
+            st.info("⚡ Using rule-based analysis for quick requests and IBM Granite when it has capacity")
         elif analyzer.model_type == "simple":
             st.info("⚡ Using rule-based analysis for instant results")
             st.caption("📋 Provides document classification, clause extraction, and basic simplification")
@@ -279,26 +287,52 @@ def document_analysis_page(analyzer):
     )
     
     if uploaded_file is not None:
+        file_content = uploaded_file.getvalue()
+        
         # Validate file size
-        if len(uploaded_file.getvalue()) > MAX_FILE_SIZE:
+        if len(file_content) > MAX_FILE_SIZE:
             st.error(f"File size exceeds {MAX_FILE_SIZE / (1024*1024):.1f}MB limit")
             return
         
         # Process document
-        with st.spinner("🔄 Analyzing document... This may take a few minutes."):
-            try:
-                results = analyzer.analyze_document(uploaded_file.getvalue(), uploaded_file.name)
-                
-                # Store results in session state
-                st.session_state['analysis_results'] = results
-                
-                display_analysis_results(results)
-                
-            except Exception as e:
-                st.error(f"Analysis failed: {str(e)}")
-                logger.error(f"Document analysis error: {e}")
+        try:
+            results = get_document_analysis(analyzer, file_content, uploaded_file.name)
+        except Exception as e:
+            st.error(f"Analysis failed: {str(e)}")
+            logger.error(f"Document analysis error: {e}")
+            return
+        
+        display_analysis_results(results, analyzer)
+
+def get_document_analysis(analyzer, file_content: bytes, filename: str) -> Dict[str, Any]:
+    """Return analysis results, reusing this session's results on reruns for the same file"""
+    digest = content_digest(file_content)
+    
+    if st.session_state.get('analysis_digest') == digest and 'analysis_results' in st.session_state:
+        return st.session_state['analysis_results']
+    
+    # analyze_document is memoized process-wide by the analyzer's result cache
+    with st.spinner("🔄 Analyzing document... This may take a few minutes."):
+        results = analyzer.analyze_document(file_content, filename)
+    
+    # Store results in session state
+    st.session_state['analysis_results'] = results
+    st.session_state['analysis_digest'] = digest
+    st.session_state['simplified_clauses'] = {}
+    
+    return results
 
-def display_analysis_results(results: Dict[str, Any]):
+def get_simplified_clause(analyzer, clause: Dict[str, Any]) -> str:
+    """Return the simplified clause text, computing it at most once per analyzed document"""
+    simplified_clauses = st.session_state.setdefault('simplified_clauses', {})
+    
+    if clause['id'] not in simplified_clauses:
+        with st.spinner(f"Simplifying clause {clause['id']}..."):
+            simplified_clauses[clause['id']] = analyzer.simplify_clause(clause['text'])
+    
+    return simplified_clauses[clause['id']]
+
+def display_analysis_results(results: Dict[str, Any], analyzer):
     """Display comprehensive analysis results"""
     
     # Document Overview
@@ -415,9 +449,8 @@ def display_analysis_results(results: Dict[str, Any]):
                 st.markdown(f"**Original:** {clause['text']}")
                 
                 if show_simplified:
-                    with st.spinner(f"Simplifying clause {clause['id']}..."):
-                        simplified = analyzer.simplify_clause(clause['text'])
-                        st.markdown(f"**Simplified:** {simplified}")
+                    simplified = get_simplified_clause(analyzer, clause)
+                    st.markdown(f"**Simplified:** {simplified}")
                 
                 st.markdown("---")
     
@@ -453,11 +486,18 @@ def clause_simplifier_page(analyzer):
         placeholder="Paste your legal clause here..."
     )
     
+    # Only the tiered backend has a quality model to ask for
+    prefer_quality = analyzer.model_type == "tiered" and st.checkbox(
+        "Use IBM Granite even for short clauses", value=False,
+        help="Sends the clause to Granite once it has loaded, even when it is busy"
+    )
+    
     if st.button("Simplify Clause", type="primary"):
         if clause_text.strip():
             with st.spinner("🔄 Simplifying clause..."):
                 try:
-                    simplified = analyzer.simplify_clause(clause_text)
+                    with request_priority("high" if prefer_quality else "normal"):
+                        simplified = analyzer.simplify_clause(clause_text)
                     
                     col1, col2 = st.columns(2)
                     
@@ -4,9 +4,12 @@ Admin panel for user management
 
 import streamlit as st
 import pandas as pd
+import datetime
 import json
 import time
+from auth.audit_log import AUDIT_EVENTS, get_audit_log
 from auth.authenticator import SecureAuthenticator
+from auth.config import ENABLE_AUDIT_LOGGING
 from typing import Dict, List
 
 def render_admin_panel():
@@ -79,7 +82,7 @@ def render_user_management():
     st.subheader("👥 User Management")
     
     authenticator = SecureAuthenticator()
-    users = authenticator._load_users()
+    users = authenticator.list_users()
     
     if not users:
         st.info("No users found.")
@@ -131,9 +134,7 @@ def render_user_management():
             
             if st.form_submit_button("Unlock Account"):
                 if unlock_username:
-                    users[unlock_username]['locked_until'] = 0
-                    users[unlock_username]['login_attempts'] = 0
-                    authenticator._save_users(users)
+                    authenticator.unlock_user(unlock_username)
                     st.success(f"✅ Account '{unlock_username}' unlocked!")
                     time.sleep(1)
                     st.rerun()
@@ -143,47 +144,60 @@ def render_login_analytics():
     st.subheader("📊 Login Analytics")
     
     authenticator = SecureAuthenticator()
-    users = authenticator._load_users()
+    # Maintained as logins happen, so this does not grow with the number of users
+    summary = authenticator.login_stats.summary()
     
-    if not users:
+    if not summary['total_users']:
         st.info("No user data available.")
         return
     
-    # Calculate statistics
-    total_users = len(users)
-    active_users = sum(1 for u in users.values() if u.get('last_login'))
-    locked_users = sum(1 for u in users.values() if u.get('locked_until', 0) > time.time())
-    admin_users = sum(1 for u in users.values() if u.get('role') == 'admin')
-    
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("👥 Total Users", total_users)
+        st.metric("👥 Total Users", summary['total_users'])
     
     with col2:
-        st.metric("✅ Active Users", active_users)
+        st.metric("✅ Active Users", summary['active_users'])
     
     with col3:
-        st.metric("🔒 Locked Users", locked_users)
+        st.metric("🔒 Locked Users", summary['locked_users'])
     
     with col4:
-        st.metric("🔑 Admin Users", admin_users)
+        st.metric("🔑 Admin Users", summary['admin_users'])
+    
+    # Hourly trend
+    st.markdown("### 🕒 Logins per Hour")
+    
+    hours = st.selectbox("Period", [24, 72, 168], format_func=lambda h: f"Last {h // 24} day{'s' if h > 24 else ''}")
+    trend = authenticator.login_stats.hourly_trend(hours)
+    df_trend = pd.DataFrame([{
+        'Hour': datetime.datetime.fromtimestamp(bucket['hour_start']),
+        'Successful': bucket['login_success'],
+        'Failed': bucket['login_failure'],
+        'Lockouts': bucket['lockout']
+    } for bucket in trend])
+    
+    if df_trend[['Successful', 'Failed', 'Lockouts']].to_numpy().any():
+        st.line_chart(df_trend.set_index('Hour'))
+    else:
+        st.info("No logins in this period.")
     
     # Login attempts chart
     st.markdown("### 📈 Login Attempts by User")
     
-    attempt_data = []
-    for username, user_info in users.items():
-        attempts = user_info.get('login_attempts', 0)
-        if attempts > 0:
-            attempt_data.append({'User': username, 'Failed Attempts': attempts})
-    
-    if attempt_data:
-        df_attempts = pd.DataFrame(attempt_data)
+    if summary['failed_attempts']:
+        df_attempts = pd.DataFrame(
+            [{'User': user, 'Failed Attempts': attempts} for user, attempts in summary['failed_attempts'].items()]
+        )
         st.bar_chart(df_attempts.set_index('User'))
     else:
         st.info("No failed login attempts recorded.")
+    
+    # Counters only drift if the user store is edited outside the app
+    if st.button("🔄 Recount from user store"):
+        authenticator.login_stats.rebuild(authenticator.list_users())
+        st.rerun()
 
 def render_security_settings():
     """Render security settings interface"""
@@ -239,41 +253,63 @@ def render_audit_logs():
     """Render audit logs interface"""
     st.subheader("📋 Audit Logs")
     
-    # This would typically read from a log file
-    # For now, we'll show recent activity from user data
+    if not ENABLE_AUDIT_LOGGING:
+        st.info("Audit logging is disabled in auth/config.py.")
+        return
     
-    authenticator = SecureAuthenticator()
-    users = authenticator._load_users()
+    audit_log = get_audit_log()
+    # Show events recorded moments ago, not just those the flusher has reached
+    audit_log.flush()
+    
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    
+    with col1:
+        today = datetime.date.today()
+        date_range = st.date_input("Date range", value=(today - datetime.timedelta(days=7), today))
+    
+    with col2:
+        user_filter = st.text_input("User", placeholder="All users")
+    
+    with col3:
+        event_filter = st.selectbox("Event", ["All"] + list(AUDIT_EVENTS))
+    
+    with col4:
+        limit = st.number_input("Rows", min_value=10, max_value=5000, value=500, step=50)
+    
+    # A single selected day covers that whole day
+    if isinstance(date_range, (tuple, list)):
+        start_date, end_date = (date_range[0], date_range[-1]) if date_range else (today, today)
+    else:
+        start_date = end_date = date_range
+    start = time.mktime(start_date.timetuple())
+    end = time.mktime((end_date + datetime.timedelta(days=1)).timetuple())
+    
+    # Only the requested page is read, through the time and user indexes
+    events = audit_log.query(
+        start=start,
+        end=end,
+        username=user_filter.strip() or None,
+        event=None if event_filter == "All" else event_filter,
+        limit=int(limit)
+    )
     
     st.markdown("### 📊 Recent User Activity")
     
-    activity_data = []
-    for username, user_info in users.items():
-        if user_info.get('last_login'):
-            activity_data.append({
-                'Timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(user_info['last_login'])),
-                'User': username,
-                'Action': 'Login',
-                'Status': 'Success',
-                'IP Address': 'N/A (Local)'
-            })
-        
-        if user_info.get('login_attempts', 0) > 0:
-            activity_data.append({
-                'Timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
-                'User': username,
-                'Action': 'Failed Login',
-                'Status': f"{user_info['login_attempts']} attempts",
-                'IP Address': 'N/A (Local)'
-            })
+    activity_data = [{
+        'Timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['ts'])),
+        'User': event['username'] or '',
+        'Action': event['event'].replace('_', ' ').title(),
+        'Status': 'Success' if event['success'] else 'Failed',
+        'Details': ', '.join(f"{key}: {value}" for key, value in (event['details'] or {}).items())
+    } for event in events]
     
     if activity_data:
-        # Sort by timestamp (most recent first)
-        activity_data.sort(key=lambda x: x['Timestamp'], reverse=True)
         df_activity = pd.DataFrame(activity_data)
         st.dataframe(df_activity, use_container_width=True)
+        if len(activity_data) == limit:
+            st.caption(f"Showing the {limit} most recent matching events; narrow the range to see older ones.")
     else:
-        st.info("No recent activity recorded.")
+        st.info("No activity recorded in this range.")
     
     # Export logs button
     if st.button("📥 Export Audit Logs"):
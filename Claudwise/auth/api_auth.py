@@ -0,0 +1,31 @@
+"""
+Bearer-token authentication for the FastAPI endpoints, backed by the shared session store
+"""
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from typing import Any, Dict, Optional
+import logging
+
+from auth.config import API_AUTH_REQUIRED
+from auth.session_store import get_session_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def require_api_session(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)
+) -> Optional[Dict[str, Any]]:
+    """FastAPI dependency returning the caller's session; a missing or expired token is a 401 when auth is required"""
+    # One keyed lookup in the session store; the password hash and user store are never touched
+    session = get_session_store().get(credentials.credentials) if credentials is not None else None
+    if session is None and API_AUTH_REQUIRED:
+        raise HTTPException(
+            status_code=401,
+            detail="Missing or expired session token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return session
@@ -0,0 +1,284 @@
+"""
+Append-only authentication audit log: queued events flushed in batches to size-rotated SQLite files
+"""
+
+import atexit
+import heapq
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUDIT_EVENTS = (
+    "login", "logout", "lockout", "password_change", "user_created", "account_unlocked"
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS audit_events ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "ts REAL NOT NULL, "
+    "username TEXT, "
+    "event TEXT NOT NULL, "
+    "success INTEGER NOT NULL, "
+    "details TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_events (ts)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_username_ts ON audit_events (username, ts)"
+)
+
+
+@contextmanager
+def _interprocess_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on path, shared by every thread and process that opens the same file"""
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AuditLog:
+    """Record events without blocking the caller; a background thread writes them in batches"""
+
+    def __init__(self, db_path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 5,
+                 batch_size: int = 100, flush_interval: float = 1.0, max_queue: int = 10000):
+        """Past max_bytes the log file is rotated to db_path.1 and up to backups older files are kept"""
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        # record() must never wait on a batch write, so drops are counted under their own lock
+        self._dropped_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inode: Optional[int] = None
+        # The server and the Streamlit app both write this log; writes, rotation and queries take this lock
+        self._lock_path = db_path + ".lock"
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="clausewise-audit-log", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def record(self, event: str, username: Optional[str], success: bool = True,
+               details: Optional[Dict[str, Any]] = None):
+        """Queue an event; when the queue is full the event is dropped and counted rather than waited on"""
+        try:
+            self._queue.put_nowait((time.time(), username, event, int(success),
+                                    json.dumps(details) if details else None))
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        self._inode = os.stat(self.db_path).st_ino
+        return conn
+
+    def _current_file_moved(self) -> bool:
+        """True when another process has rotated the file this connection writes to"""
+        try:
+            return os.stat(self.db_path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def _run(self):
+        """Collect up to batch_size events, waiting at most flush_interval for the first, and write them"""
+        while not self._closed.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[tuple]):
+        with self._write_lock:
+            try:
+                with _interprocess_lock(self._lock_path):
+                    if self._conn is not None and self._current_file_moved():
+                        self._conn.close()
+                        self._conn = None
+                    if self._conn is None:
+                        self._conn = self._connect()
+                    # One transaction per batch instead of one fsync per event
+                    with self._conn:
+                        self._conn.executemany(
+                            "INSERT INTO audit_events (ts, username, event, success, details) VALUES (?, ?, ?, ?, ?)",
+                            batch
+                        )
+                    self._written += len(batch)
+                    self._rotate_if_full()
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} audit events: {e}")
+
+    def _rotate_if_full(self):
+        """Move the current file to .1, shifting older files up and dropping the oldest; caller holds the file lock"""
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        if page_count * page_size < self.max_bytes:
+            return
+
+        # Fold the WAL into the main file so the rename carries every event
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+        self._conn = None
+        for index in range(self.backups, 0, -1):
+            source = self.db_path if index == 1 else f"{self.db_path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.db_path}.{index}")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        logger.info(f"Rotated audit log {self.db_path}")
+
+    def flush(self):
+        """Write every queued event now"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def close(self):
+        """Stop the flusher and write what is still queued"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _segments(self) -> List[str]:
+        """Log files from newest to oldest"""
+        paths = [self.db_path] + [f"{self.db_path}.{index}" for index in range(1, self.backups + 1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              username: Optional[str] = None, event: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Return up to limit events in [start, end), newest first, using the (ts) or (username, ts) index"""
+        conditions, params = [], []
+        if username:
+            conditions.append("username = ?")
+            params.append(username)
+        if start is not None:
+            conditions.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("ts < ?")
+            params.append(end)
+        if event:
+            conditions.append("event = ?")
+            params.append(event)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Each segment's newest events, merged by ts: with several writing processes a rotated
+        # segment can hold events newer than some in the current file
+        segments: List[List[sqlite3.Row]] = []
+        with _interprocess_lock(self._lock_path):
+            for path in self._segments():
+                try:
+                    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+                except sqlite3.Error:
+                    continue
+                conn.row_factory = sqlite3.Row
+                try:
+                    segments.append(conn.execute(
+                        f"SELECT ts, username, event, success, details FROM audit_events {where} "
+                        "ORDER BY ts DESC LIMIT ?", (*params, limit)
+                    ).fetchall())
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to query audit log {path}: {e}")
+                finally:
+                    conn.close()
+
+        events: List[Dict[str, Any]] = []
+        for row in heapq.merge(*segments, key=lambda row: row['ts'], reverse=True):
+            if len(events) >= limit:
+                break
+            events.append({
+                'ts': row['ts'],
+                'username': row['username'],
+                'event': row['event'],
+                'success': bool(row['success']),
+                'details': json.loads(row['details']) if row['details'] else None
+            })
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and written, dropped and rotated-file counts"""
+        return {
+            'queued': self._queue.qsize(),
+            'written': self._written,
+            'dropped': self._dropped,
+            'files': len(self._segments())
+        }
+
+
+_audit_log: Optional[AuditLog] = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log() -> AuditLog:
+    """Return the process-wide audit log configured in auth.config"""
+    global _audit_log
+    with _audit_log_lock:
+        if _audit_log is None:
+            from auth.config import (
+                LOGS_FILE, AUDIT_LOG_MAX_BYTES, AUDIT_LOG_BACKUPS, AUDIT_LOG_BATCH_SIZE,
+                AUDIT_LOG_FLUSH_INTERVAL, AUDIT_LOG_MAX_QUEUE
+            )
+            _audit_log = AuditLog(LOGS_FILE, AUDIT_LOG_MAX_BYTES, AUDIT_LOG_BACKUPS, AUDIT_LOG_BATCH_SIZE,
+                                  AUDIT_LOG_FLUSH_INTERVAL, AUDIT_LOG_MAX_QUEUE)
+        return _audit_log
@@ -2,106 +2,75 @@
 Secure authentication system for ClauseWise
 """
 
-import streamlit as st
-import hashlib
-import hmac
-import secrets
 import time
-import json
-import os
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import logging
 
+from auth.config import (
+    USER_STORE, USERS_DB, USERS_FILE, SESSION_TIMEOUT,
+    ENABLE_AUDIT_LOGGING, LOG_FAILED_ATTEMPTS, LOG_SUCCESSFUL_LOGINS, LOG_PASSWORD_CHANGES
+)
+from auth.audit_log import get_audit_log
+from auth.login_stats import get_login_stats
+from auth.password_hasher import HasherBusyError, get_password_hasher
+from auth.session_store import MemorySessionStore, SessionStore, get_session_store
+from auth.user_store import UserStore, get_user_store
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _session_state():
+    """Streamlit's per-browser state; imported on use so the API server can authenticate without streamlit"""
+    import streamlit as st
+    return st.session_state
+
+
 class SecureAuthenticator:
     """Secure authentication with multiple security layers"""
     
-    def __init__(self, users_file: str = "auth/users.json", session_timeout: int = 3600):
+    def __init__(self, users_file: str = USERS_FILE, session_timeout: int = SESSION_TIMEOUT,
+                 store: Optional[UserStore] = None, session_store: Optional[SessionStore] = None):
         self.users_file = users_file
         self.session_timeout = session_timeout  # 1 hour default
         self.max_login_attempts = 5
         self.lockout_duration = 900  # 15 minutes
-        self._ensure_users_file()
-        
-    def _ensure_users_file(self):
-        """Ensure users file exists with default admin user"""
-        if not os.path.exists(self.users_file):
-            os.makedirs(os.path.dirname(self.users_file), exist_ok=True)
-            
-            # Create default admin user
-            default_users = {
-                "admin": {
-                    "password_hash": self._hash_password("admin123"),
-                    "salt": secrets.token_hex(32),
-                    "role": "admin",
-                    "created_at": time.time(),
-                    "login_attempts": 0,
-                    "locked_until": 0,
-                    "last_login": None
-                }
-            }
-            
-            with open(self.users_file, 'w') as f:
-                json.dump(default_users, f, indent=2)
-            
-            logger.info("Created default users file with admin user")
-    
-    def _hash_password(self, password: str, salt: str = None) -> str:
-        """Securely hash password with salt"""
-        if salt is None:
-            salt = secrets.token_hex(32)
-        
-        # Use PBKDF2 with SHA-256 for secure password hashing
-        password_hash = hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000  # 100,000 iterations
+        # Stores and the hashing pool are shared process-wide, so building an authenticator on every rerun stays cheap
+        self.store = store if store is not None else get_user_store(USER_STORE, USERS_DB, users_file)
+        self.sessions = session_store if session_store is not None else (
+            get_session_store() if session_timeout == SESSION_TIMEOUT else MemorySessionStore(session_timeout)
         )
+        self.hasher = get_password_hasher()
+        self.audit_log = get_audit_log() if ENABLE_AUDIT_LOGGING else None
+        self.login_stats = get_login_stats(self.store)
+        self._ensure_default_admin()
         
-        return f"{salt}${password_hash.hex()}"
+    def _ensure_default_admin(self):
+        """Ensure the store has at least the default admin user"""
+        if self.store.count() == 0:
+            if self.store.create("admin", {
+                "password_hash": self._hash_password("admin123"),
+                "role": "admin",
+                "created_at": time.time()
+            }):
+                self.login_stats.record_user_created("admin")
+                logger.info("Created default admin user")
     
-    def _verify_password(self, password: str, stored_hash: str) -> bool:
-        """Verify password against stored hash"""
-        try:
-            salt, hash_hex = stored_hash.split('$')
-            password_hash = hashlib.pbkdf2_hmac(
-                'sha256',
-                password.encode('utf-8'),
-                salt.encode('utf-8'),
-                100000
-            )
-            return hmac.compare_digest(hash_hex, password_hash.hex())
-        except Exception as e:
-            logger.error(f"Password verification error: {e}")
-            return False
+    def _audit(self, event: str, username: Optional[str], success: bool = True, **details):
+        """Queue an audit event; never blocks on the log file"""
+        if self.audit_log is not None:
+            self.audit_log.record(event, username, success, details or None)
     
-    def _load_users(self) -> Dict:
-        """Load users from file"""
-        try:
-            with open(self.users_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading users: {e}")
-            return {}
+    def _hash_password(self, password: str, salt: str = None) -> str:
+        """Securely hash password with salt (PBKDF2-SHA256, 100,000 iterations) on the hashing pool"""
+        return self.hasher.hash(password, salt)
     
-    def _save_users(self, users: Dict):
-        """Save users to file"""
-        try:
-            with open(self.users_file, 'w') as f:
-                json.dump(users, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving users: {e}")
+    def _verify_password(self, password: str, stored_hash: str) -> bool:
+        """Verify password against stored hash on the hashing pool"""
+        return self.hasher.verify(password, stored_hash)
     
-    def _is_account_locked(self, username: str) -> bool:
+    def _is_account_locked(self, username: str, user: Dict) -> bool:
         """Check if account is locked due to failed attempts"""
-        users = self._load_users()
-        if username not in users:
-            return False
-        
-        user = users[username]
         locked_until = user.get('locked_until', 0)
         
         if locked_until > time.time():
@@ -109,146 +78,182 @@ class SecureAuthenticator:
         
         # Reset lock if time has passed
         if locked_until > 0:
+            self.store.clear_expired_lock(username, locked_until)
+            self.login_stats.record_unlock(username)
             user['locked_until'] = 0
             user['login_attempts'] = 0
-            self._save_users(users)
         
         return False
     
-    def _record_login_attempt(self, username: str, success: bool):
+    def _record_login_attempt(self, username: str, success: bool, first_login: bool = False):
         """Record login attempt and handle account locking"""
-        users = self._load_users()
-        if username not in users:
-            return
-        
-        user = users[username]
-        
         if success:
-            user['login_attempts'] = 0
-            user['locked_until'] = 0
-            user['last_login'] = time.time()
-        else:
-            user['login_attempts'] = user.get('login_attempts', 0) + 1
-            
-            if user['login_attempts'] >= self.max_login_attempts:
-                user['locked_until'] = time.time() + self.lockout_duration
-                logger.warning(f"Account {username} locked due to failed attempts")
+            self.store.record_successful_login(username)
+            self.login_stats.record_login(username, True, first_login)
+            return
         
-        self._save_users(users)
+        locked = self.store.record_failed_login(username, self.max_login_attempts, self.lockout_duration)
+        self.login_stats.record_login(username, False)
+        if locked:
+            logger.warning(f"Account {username} locked due to failed attempts")
+            self.login_stats.record_lockout(username, time.time() + self.lockout_duration)
+            self._audit("lockout", username, False, duration=self.lockout_duration)
     
     def create_user(self, username: str, password: str, role: str = "user") -> bool:
         """Create a new user"""
-        users = self._load_users()
-        
-        if username in users:
-            return False
-        
-        users[username] = {
+        created = self.store.create(username, {
             "password_hash": self._hash_password(password),
             "role": role,
-            "created_at": time.time(),
-            "login_attempts": 0,
-            "locked_until": 0,
-            "last_login": None
-        }
+            "created_at": time.time()
+        })
         
-        self._save_users(users)
-        logger.info(f"Created user: {username}")
-        return True
+        if created:
+            logger.info(f"Created user: {username}")
+            self.login_stats.record_user_created(role)
+            self._audit("user_created", username, role=role)
+        return created
+    
+    def list_users(self) -> Dict[str, Dict]:
+        """Get every user's record by username"""
+        return self.store.list_users()
+    
+    def unlock_user(self, username: str) -> bool:
+        """Clear a user's lockout and failed attempts"""
+        unlocked = self.store.update(username, locked_until=0, login_attempts=0)
+        if unlocked:
+            self.login_stats.record_unlock(username)
+            self._audit("account_unlocked", username)
+        return unlocked
     
     def authenticate(self, username: str, password: str) -> Tuple[bool, str]:
         """Authenticate user with security checks"""
         if not username or not password:
             return False, "Username and password are required"
         
-        # Check if account is locked
-        if self._is_account_locked(username):
-            return False, "Account is temporarily locked due to failed login attempts"
+        try:
+            success, message = self._check_credentials(username, password)
+        except HasherBusyError as e:
+            logger.warning(f"Login for {username} rejected: {e}")
+            success, message = False, "Too many sign-in attempts in progress. Please try again shortly"
         
-        users = self._load_users()
+        if (LOG_SUCCESSFUL_LOGINS if success else LOG_FAILED_ATTEMPTS):
+            self._audit("login", username, success, message=message)
+        return success, message
+    
+    def _check_credentials(self, username: str, password: str, record_login: bool = True) -> Tuple[bool, str]:
+        """Check a password with lockout handling, recording the attempt
+
+        Without record_login a correct password is not counted as a login; failures always count towards lockout.
+        """
+        # One read serves the lock check and the password check
+        user = self.store.get(username)
         
-        if username not in users:
+        if user is None:
             # Record failed attempt even for non-existent users to prevent enumeration
+            self.login_stats.record_login(None, False)
             time.sleep(0.5)  # Prevent timing attacks
             return False, "Invalid username or password"
         
-        user = users[username]
+        # Check if account is locked
+        if self._is_account_locked(username, user):
+            return False, "Account is temporarily locked due to failed login attempts"
         
         if self._verify_password(password, user['password_hash']):
-            self._record_login_attempt(username, True)
+            if record_login:
+                self._record_login_attempt(username, True, first_login=not user.get('last_login'))
             return True, "Login successful"
         else:
             self._record_login_attempt(username, False)
             return False, "Invalid username or password"
     
+    def start_session(self, username: str) -> Dict[str, Any]:
+        """Create a server-side session for an authenticated user, usable by the UI and the API"""
+        return self.sessions.create(username)
+    
+    def end_session(self, token: str):
+        """Revoke a session token"""
+        session = self.sessions.get(token, extend=False)
+        self.sessions.delete(token)
+        if session is not None:
+            self._audit("logout", session['username'])
+    
     def create_session(self, username: str) -> str:
         """Create secure session token"""
-        session_data = {
-            'username': username,
-            'created_at': time.time(),
-            'expires_at': time.time() + self.session_timeout,
-            'token': secrets.token_urlsafe(32)
-        }
+        session_data = self.start_session(username)
         
-        # Store in Streamlit session state
-        st.session_state['auth_session'] = session_data
-        st.session_state['authenticated'] = True
-        st.session_state['username'] = username
+        # The browser session only holds the token; the session itself lives server-side
+        state = _session_state()
+        state['auth_token'] = session_data['token']
+        state['authenticated'] = True
+        state['username'] = username
         
         return session_data['token']
     
+    def validate_token(self, token: str) -> Optional[Dict]:
+        """Look up a live session by token, extending it; never touches the password hash or user store"""
+        return self.sessions.get(token)
+    
     def validate_session(self) -> bool:
         """Validate current session"""
-        if 'auth_session' not in st.session_state:
+        state = _session_state()
+        token = state.get('auth_token')
+        if token is None:
             return False
         
-        session = st.session_state['auth_session']
-        
-        # Check if session has expired
-        if time.time() > session['expires_at']:
+        # An expired or unknown token ends the session; a live one is extended
+        session = self.validate_token(token)
+        if session is None:
             self.logout()
             return False
         
-        # Extend session if user is active
-        session['expires_at'] = time.time() + self.session_timeout
-        st.session_state['auth_session'] = session
-        
+        state['username'] = session['username']
         return True
     
     def logout(self):
         """Clear session and logout user"""
-        keys_to_clear = ['auth_session', 'authenticated', 'username']
+        state = _session_state()
+        token = state.get('auth_token')
+        if token is not None:
+            self.end_session(token)
+        
+        keys_to_clear = ['auth_token', 'authenticated', 'username']
         for key in keys_to_clear:
-            if key in st.session_state:
-                del st.session_state[key]
+            if key in state:
+                del state[key]
     
     def get_current_user(self) -> Optional[str]:
         """Get current authenticated user"""
         if self.validate_session():
-            return st.session_state.get('username')
+            return _session_state().get('username')
         return None
     
     def get_user_role(self, username: str) -> str:
         """Get user role"""
-        users = self._load_users()
-        return users.get(username, {}).get('role', 'user')
+        user = self.store.get(username)
+        return user['role'] if user is not None else 'user'
     
     def change_password(self, username: str, old_password: str, new_password: str) -> Tuple[bool, str]:
         """Change user password"""
-        # Verify old password first
-        auth_success, _ = self.authenticate(username, old_password)
-        if not auth_success:
-            return False, "Current password is incorrect"
-        
-        # Validate new password strength
+        # Validate new password strength before spending a key derivation on the old one
         if len(new_password) < 8:
             return False, "New password must be at least 8 characters long"
         
-        users = self._load_users()
-        users[username]['password_hash'] = self._hash_password(new_password)
-        self._save_users(users)
+        # Verify old password once, with the same lockout rules as a login but without counting as one
+        try:
+            auth_success, _ = self._check_credentials(username, old_password, record_login=False)
+            if not auth_success:
+                if LOG_PASSWORD_CHANGES:
+                    self._audit("password_change", username, False, message="Current password is incorrect")
+                return False, "Current password is incorrect"
+            
+            # Proving the old password clears earlier failures, as a login would have
+            self.store.update(username, password_hash=self._hash_password(new_password), login_attempts=0)
+        except HasherBusyError:
+            return False, "The server is busy. Please try again shortly"
         
         logger.info(f"Password changed for user: {username}")
+        if LOG_PASSWORD_CHANGES:
+            self._audit("password_change", username)
         return True, "Password changed successfully"
     
     def is_admin(self, username: str) -> bool:
@@ -4,6 +4,9 @@ Authentication configuration settings
 
 # Security Settings
 SESSION_TIMEOUT = 3600  # 1 hour in seconds
+SESSION_STORE_MAX_ENTRIES = 10000  # Live sessions kept by the "memory" store; the least recently used go first
+PASSWORD_HASH_WORKERS = 2  # Threads running PBKDF2 hashing and verification
+PASSWORD_HASH_MAX_PENDING = 32  # Queued plus running password checks before logins are turned away
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION = 900  # 15 minutes in seconds
 
@@ -15,8 +18,21 @@ REQUIRE_NUMBERS = True
 REQUIRE_SPECIAL_CHARS = True
 
 # File Paths
+USER_STORE = "sqlite"  # "sqlite" (indexed, row-level updates) or "json" (the legacy users.json file)
+USERS_DB = "auth/users.db"  # Created on first use, importing any users from USERS_FILE
 USERS_FILE = "auth/users.json"
-LOGS_FILE = "auth/auth_logs.json"
+LOGS_FILE = "auth/auth_logs.db"  # Audit log; rotated files are kept alongside as auth_logs.db.1, .2, ...
+
+# Session Store
+SESSION_STORE_BACKEND = "sqlite"  # "memory" (one process), "sqlite" (every worker on the host) or "redis" (every host)
+SESSION_STORE_DB = "auth/sessions.db"
+SESSION_REDIS_URL = None  # e.g. "redis://localhost:6379/0"; unset uses a single-process stand-in
+SESSION_REFRESH_INTERVAL = 60  # Seconds between sliding-expiry writes for one session
+SESSION_SWEEP_INTERVAL = 60  # Seconds between sweeps of expired sessions
+SESSION_SWEEP_BATCH = 500  # Expired sessions removed per sweep
+
+# API Authentication
+API_AUTH_REQUIRED = False  # Require "Authorization: Bearer <token>" from /auth/login on the FastAPI endpoints
 
 # Security Headers (for future web deployment)
 SECURITY_HEADERS = {
@@ -36,3 +52,12 @@ ENABLE_AUDIT_LOGGING = True
 LOG_FAILED_ATTEMPTS = True
 LOG_SUCCESSFUL_LOGINS = True
 LOG_PASSWORD_CHANGES = True
+AUDIT_LOG_MAX_BYTES = 10 * 1024 * 1024  # Size at which the log file is rotated
+AUDIT_LOG_BACKUPS = 5  # Rotated files kept; the oldest is deleted beyond this
+AUDIT_LOG_BATCH_SIZE = 100  # Events written per transaction
+AUDIT_LOG_FLUSH_INTERVAL = 1.0  # Seconds an event may wait in the queue before it is written
+AUDIT_LOG_MAX_QUEUE = 10000  # Queued events beyond which new ones are dropped (and counted) rather than blocking logins
+
+# Login Analytics
+LOGIN_STATS_DB = "auth/login_stats.db"  # Counters and hourly histograms, seeded from the user store when created
+LOGIN_STATS_RETENTION_HOURS = 24 * 90  # Hourly buckets kept for trend charts
@@ -0,0 +1,197 @@
+"""
+Login analytics kept up to date as auth events happen, so dashboards never scan the user store
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("total_users", "admin_users", "active_users", "logins", "failed_logins", "lockouts")
+HOURLY_EVENTS = ("login_success", "login_failure", "lockout")
+
+
+class LoginStats:
+    """Counters, per-user failed attempts, current locks and hourly histograms in one SQLite file"""
+
+    def __init__(self, db_path: str, retention_hours: int = 24 * 90):
+        """Hourly buckets older than retention_hours are pruned"""
+        self.db_path = db_path
+        self.retention_hours = retention_hours
+        self._last_hour: Optional[int] = None
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Same layout as the user store: one shared connection, WAL so other processes can read while one writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hourly ("
+                "hour INTEGER NOT NULL, event TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (hour, event))"
+            )
+            # Only users with failed attempts or a lock have rows, so these stay small
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS failed_attempts (username TEXT PRIMARY KEY, attempts INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_failed_attempts ON failed_attempts (attempts)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS locks (username TEXT PRIMARY KEY, locked_until REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_locks_until ON locks (locked_until)")
+
+    def is_empty(self) -> bool:
+        """True until the counters have been initialized"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 0
+
+    def rebuild(self, users: Dict[str, Dict[str, Any]]):
+        """Recompute user counters, failed attempts and locks from a full user listing; hourly history is kept"""
+        now = time.time()
+        values = dict.fromkeys(COUNTERS, 0)
+        with self._lock:
+            for row in self._conn.execute("SELECT name, value FROM counters"):
+                values[row['name']] = row['value']
+        values['total_users'] = len(users)
+        values['admin_users'] = sum(1 for user in users.values() if user.get('role') == 'admin')
+        values['active_users'] = sum(1 for user in users.values() if user.get('last_login'))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)", values.items()
+                )
+                self._conn.execute("DELETE FROM failed_attempts")
+                self._conn.executemany(
+                    "INSERT INTO failed_attempts (username, attempts) VALUES (?, ?)",
+                    [(name, user['login_attempts']) for name, user in users.items() if user.get('login_attempts', 0) > 0]
+                )
+                self._conn.execute("DELETE FROM locks")
+                self._conn.executemany(
+                    "INSERT INTO locks (username, locked_until) VALUES (?, ?)",
+                    [(name, user['locked_until']) for name, user in users.items() if user.get('locked_until', 0) > now]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Rebuilt login statistics for {len(users)} users")
+
+    def _apply(self, counters: Dict[str, int], hourly_event: Optional[str], statements: List[tuple]):
+        """Apply counter increments, one hourly bucket increment and extra statements in one transaction"""
+        now = time.time()
+        hour = int(now // 3600)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, delta in counters.items():
+                    self._conn.execute(
+                        "INSERT INTO counters (name, value) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                        (name, delta)
+                    )
+                if hourly_event is not None:
+                    self._conn.execute(
+                        "INSERT INTO hourly (hour, event, count) VALUES (?, ?, 1) "
+                        "ON CONFLICT(hour, event) DO UPDATE SET count = count + 1",
+                        (hour, hourly_event)
+                    )
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                # Old buckets go once per hour rather than on every event
+                if hour != self._last_hour:
+                    self._conn.execute("DELETE FROM hourly WHERE hour < ?", (hour - self.retention_hours,))
+                    self._conn.execute("DELETE FROM locks WHERE locked_until <= ?", (now,))
+                    self._last_hour = hour
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"Failed to update login statistics: {e}")
+
+    def record_user_created(self, role: str):
+        """Count a new user"""
+        self._apply({'total_users': 1, 'admin_users': int(role == 'admin')}, None, [])
+
+    def record_login(self, username: Optional[str], success: bool, first_login: bool = False):
+        """Count a login; username is None for unknown users, which only reach the totals"""
+        if success:
+            self._apply(
+                {'logins': 1, 'active_users': int(first_login)}, "login_success",
+                [("DELETE FROM failed_attempts WHERE username = ?", (username,))]
+            )
+        else:
+            statements = [] if username is None else [(
+                "INSERT INTO failed_attempts (username, attempts) VALUES (?, 1) "
+                "ON CONFLICT(username) DO UPDATE SET attempts = attempts + 1",
+                (username,)
+            )]
+            self._apply({'failed_logins': 1}, "login_failure", statements)
+
+    def record_lockout(self, username: str, locked_until: float):
+        """Count a lockout and track the lock until it expires"""
+        self._apply({'lockouts': 1}, "lockout", [(
+            "INSERT OR REPLACE INTO locks (username, locked_until) VALUES (?, ?)", (username, locked_until)
+        )])
+
+    def record_unlock(self, username: str):
+        """Clear a user's lock and failed attempts, after an admin unlock or lock expiry"""
+        self._apply({}, None, [
+            ("DELETE FROM locks WHERE username = ?", (username,)),
+            ("DELETE FROM failed_attempts WHERE username = ?", (username,))
+        ])
+
+    def summary(self, top_failed: int = 20) -> Dict[str, Any]:
+        """Get counters, currently locked users and the users with the most failed attempts"""
+        with self._lock:
+            counters = dict.fromkeys(COUNTERS, 0)
+            for row in self._conn.execute("SELECT name, value FROM counters"):
+                counters[row['name']] = row['value']
+            locked = self._conn.execute(
+                "SELECT COUNT(*) FROM locks WHERE locked_until > ?", (time.time(),)
+            ).fetchone()[0]
+            failed = self._conn.execute(
+                "SELECT username, attempts FROM failed_attempts ORDER BY attempts DESC LIMIT ?", (top_failed,)
+            ).fetchall()
+        return dict(counters, locked_users=locked,
+                    failed_attempts={row['username']: row['attempts'] for row in failed})
+
+    def hourly_trend(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Get per-hour event counts for the last `hours` hours, oldest first, with empty hours filled in"""
+        current = int(time.time() // 3600)
+        first = current - hours + 1
+        buckets = {hour: dict.fromkeys(HOURLY_EVENTS, 0) for hour in range(first, current + 1)}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hour, event, count FROM hourly WHERE hour >= ?", (first,)
+            ).fetchall()
+        for row in rows:
+            if row['hour'] in buckets and row['event'] in HOURLY_EVENTS:
+                buckets[row['hour']][row['event']] = row['count']
+        return [dict(counts, hour_start=hour * 3600) for hour, counts in buckets.items()]
+
+
+_stats: Optional[LoginStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_login_stats(store=None) -> LoginStats:
+    """Return the process-wide login statistics, seeding them from the user store on first use"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            from auth.config import LOGIN_STATS_DB, LOGIN_STATS_RETENTION_HOURS
+            stats = LoginStats(LOGIN_STATS_DB, LOGIN_STATS_RETENTION_HOURS)
+            if stats.is_empty() and store is not None:
+                stats.rebuild(store.list_users())
+            _stats = stats
+        return _stats
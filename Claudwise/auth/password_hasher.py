@@ -0,0 +1,92 @@
+"""
+PBKDF2 password hashing and verification on a bounded worker pool
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PBKDF2_ITERATIONS = 100000
+
+
+class HasherBusyError(Exception):
+    """Raised when more password checks are waiting than the pool accepts"""
+
+
+def _pbkdf2(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), PBKDF2_ITERATIONS).hex()
+
+
+def _hash(password: str, salt: Optional[str]) -> str:
+    if salt is None:
+        salt = secrets.token_hex(32)
+    return f"{salt}${_pbkdf2(password, salt)}"
+
+
+def _verify(password: str, stored_hash: str) -> bool:
+    try:
+        salt, hash_hex = stored_hash.split('$')
+        return hmac.compare_digest(hash_hex, _pbkdf2(password, salt))
+    except Exception as e:
+        logger.error(f"Password verification error: {e}")
+        return False
+
+
+class PasswordHasher:
+    """Run PBKDF2-SHA256 on a few dedicated threads so login bursts queue instead of occupying request workers"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        """max_pending bounds queued plus running operations; beyond it callers get HasherBusyError"""
+        # hashlib releases the GIL while deriving, so threads run hashes in parallel
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clausewise-kdf")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError(f"{self.max_pending} password operations already pending")
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit_hash(self, password: str, salt: Optional[str] = None) -> Future:
+        """Start hashing a password; the future resolves to "salt$hash\""""
+        return self._submit(_hash, password, salt)
+
+    def submit_verify(self, password: str, stored_hash: str) -> Future:
+        """Start checking a password against a stored "salt$hash"; the future resolves to a bool"""
+        return self._submit(_verify, password, stored_hash)
+
+    def hash(self, password: str, salt: Optional[str] = None) -> str:
+        """Hash a password on the pool and wait for the result"""
+        return self.submit_hash(password, salt).result()
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        """Verify a password on the pool and wait for the result"""
+        return self.submit_verify(password, stored_hash).result()
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide hasher, so every authenticator shares one bounded pool"""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            from auth.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+            _hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+        return _hasher
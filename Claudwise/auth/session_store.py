@@ -0,0 +1,376 @@
+"""
+Server-side session stores keyed by session token: in-memory, SQLite and Redis-compatible
+"""
+
+import fnmatch
+import json
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SESSION_STORE_BACKENDS = ("memory", "sqlite", "redis")
+
+
+def _new_session(username: str, ttl: float) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        'username': username,
+        'created_at': now,
+        'expires_at': now + ttl,
+        'token': secrets.token_urlsafe(32)
+    }
+
+
+class SessionStore:
+    """Interface for sessions keyed by token, with sliding expiry"""
+
+    backend = "base"
+
+    def create(self, username: str) -> Dict[str, Any]:
+        """Start a session for an authenticated user"""
+        raise NotImplementedError
+
+    def get(self, token: str, extend: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a live session, optionally pushing its expiry back, or None"""
+        raise NotImplementedError
+
+    def delete(self, token: str):
+        """End a session"""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Remove one batch of expired sessions; returns how many were removed"""
+        return 0
+
+    def count(self) -> int:
+        """Return the number of stored sessions, including expired ones not yet swept"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the backend name and session count"""
+        return {'backend': self.backend, 'sessions': self.count()}
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+class MemorySessionStore(SessionStore):
+    """In-process sessions with O(1) token lookup, TTL and LRU eviction"""
+
+    backend = "memory"
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 10000, sweep_batch: int = 500):
+        """Sessions expire ttl seconds after their last use; the least recently used go first past max_entries"""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_batch = sweep_batch
+        # Ordered by last use; with one TTL for all sessions that is also expiry order
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, username: str) -> Dict[str, Any]:
+        session = _new_session(username, self.ttl)
+        with self._lock:
+            self._sessions[session['token']] = session
+            self._evict(session['created_at'])
+        return dict(session)
+
+    def get(self, token: str, extend: bool = True) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(token)
+            if session is None or session['expires_at'] <= now:
+                return None
+            if extend:
+                session['expires_at'] = now + self.ttl
+                self._sessions.move_to_end(token)
+            return dict(session)
+
+    def delete(self, token: str):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._evict(time.time())
+
+    def _evict(self, now: float) -> int:
+        """Drop up to one batch of expired sessions from the front, then the least recently used beyond max_entries"""
+        removed = 0
+        while self._sessions and removed < self.sweep_batch:
+            token, session = next(iter(self._sessions.items()))
+            if session['expires_at'] > now and len(self._sessions) <= self.max_entries:
+                break
+            del self._sessions[token]
+            removed += 1
+        return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite table shared by every worker process on the host"""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str, ttl: float = 3600, refresh_interval: float = 60,
+                 sweep_interval: float = 60, sweep_batch: int = 500):
+        """Expiry is pushed back at most once per refresh_interval; expired rows are deleted in batches"""
+        self.db_path = db_path
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._last_sweep = 0.0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Same layout as the user store: one shared connection, WAL so other processes can read while one writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "token TEXT PRIMARY KEY, "
+                "username TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+
+    def create(self, username: str) -> Dict[str, Any]:
+        session = _new_session(username, self.ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (token, username, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (session['token'], username, session['created_at'], session['expires_at'])
+            )
+        self._maybe_sweep(session['created_at'])
+        return session
+
+    def get(self, token: str, extend: bool = True) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sessions WHERE token = ? AND expires_at > ?", (token, now)
+            ).fetchone()
+            if row is None:
+                session = None
+            else:
+                session = {field: row[field] for field in ('username', 'created_at', 'expires_at', 'token')}
+                # Writing on every request would queue readers behind the write lock; a slightly
+                # stale expiry costs at most refresh_interval seconds of session lifetime
+                if extend and session['expires_at'] - now < self.ttl - self.refresh_interval:
+                    session['expires_at'] = now + self.ttl
+                    self._conn.execute(
+                        "UPDATE sessions SET expires_at = ? WHERE token = ?", (session['expires_at'], token)
+                    )
+        self._maybe_sweep(now)
+        return session
+
+    def delete(self, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def sweep(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE token IN "
+                "(SELECT token FROM sessions WHERE expires_at <= ? LIMIT ?)",
+                (time.time(), self.sweep_batch)
+            )
+        return cursor.rowcount
+
+    def _maybe_sweep(self, now: float):
+        """Sweep at most once per sweep_interval, so expired rows never cost a full-table delete"""
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        removed = self.sweep()
+        if removed:
+            logger.info(f"Removed {removed} expired sessions")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class LocalRedis:
+    """Single-process stand-in for the few Redis commands the session store uses"""
+
+    def __init__(self, sweep_every: int = 100, sweep_batch: int = 20):
+        """Like Redis, expired keys go on access and in small batches every sweep_every commands"""
+        self._values: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._commands = 0
+        self.sweep_every = sweep_every
+        self.sweep_batch = sweep_batch
+
+    def _expired(self, name: str, now: float) -> bool:
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= now:
+            self._values.pop(name, None)
+            del self._expires[name]
+            return True
+        return False
+
+    def _tick(self, now: float):
+        self._commands += 1
+        if self._commands % self.sweep_every == 0:
+            for name in list(self._expires)[:self.sweep_batch]:
+                self._expired(name, now)
+
+    def get(self, name: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._tick(now)
+            if self._expired(name, now):
+                return None
+            return self._values.get(name)
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            self._tick(now)
+            self._values[name] = value
+            if ex is not None:
+                self._expires[name] = now + ex
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def expire(self, name: str, time_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._tick(now)
+            if self._expired(name, now) or name not in self._values:
+                return False
+            self._expires[name] = now + time_seconds
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for name in names:
+                self._expires.pop(name, None)
+                if self._values.pop(name, None) is not None:
+                    removed += 1
+            return removed
+
+    def scan_iter(self, match: Optional[str] = None) -> Iterator[str]:
+        now = time.time()
+        with self._lock:
+            names = [name for name in list(self._values) if not self._expired(name, now)]
+        return iter([name for name in names if match is None or fnmatch.fnmatchcase(name, match)])
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions as Redis keys with native TTLs, shared by every host using the same server"""
+
+    backend = "redis"
+
+    def __init__(self, client, ttl: float = 3600, refresh_interval: float = 60,
+                 prefix: str = "clausewise:session:"):
+        """client is a redis.Redis or anything with the same get/set/expire/delete/scan_iter commands"""
+        self.client = client
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.prefix = prefix
+
+    def _key(self, token: str) -> str:
+        return f"{self.prefix}{token}"
+
+    def _ttl_seconds(self) -> int:
+        return max(1, math.ceil(self.ttl))
+
+    def create(self, username: str) -> Dict[str, Any]:
+        session = _new_session(username, self.ttl)
+        self.client.set(self._key(session['token']), json.dumps(session), ex=self._ttl_seconds())
+        return session
+
+    def get(self, token: str, extend: bool = True) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key(token))
+        if raw is None:
+            return None
+        session = json.loads(raw)
+        now = time.time()
+        # Redis expires the key itself, so sweeps are never needed; refreshes are throttled like SQLite's
+        if extend and session['expires_at'] - now < self.ttl - self.refresh_interval:
+            session['expires_at'] = now + self.ttl
+            self.client.set(self._key(token), json.dumps(session), ex=self._ttl_seconds())
+        return session
+
+    def delete(self, token: str):
+        self.client.delete(self._key(token))
+
+    def count(self) -> int:
+        # Walks the keyspace; only meant for status reporting
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+
+def _redis_client(url: Optional[str]):
+    """Connect to Redis, or fall back to a process-local stand-in when no URL is configured"""
+    if not url:
+        logger.warning("No SESSION_REDIS_URL set; sessions are kept in a local stand-in and not shared between processes")
+        return LocalRedis()
+    try:
+        import redis
+    except ImportError:
+        logger.error("SESSION_STORE_BACKEND is 'redis' but the redis package is not installed")
+        raise
+    return redis.Redis.from_url(url)
+
+
+def build_session_store(backend: str, ttl: float, **options) -> SessionStore:
+    """Create a session store for a backend name"""
+    if backend == "memory":
+        return MemorySessionStore(ttl, options.get('max_entries', 10000), options.get('sweep_batch', 500))
+    if backend == "sqlite":
+        return SQLiteSessionStore(options['db_path'], ttl, options.get('refresh_interval', 60),
+                                  options.get('sweep_interval', 60), options.get('sweep_batch', 500))
+    if backend == "redis":
+        return RedisSessionStore(_redis_client(options.get('redis_url')), ttl, options.get('refresh_interval', 60))
+    raise ValueError(f"Unsupported session store: {backend}")
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store configured in auth.config"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from auth.config import (
+                SESSION_TIMEOUT, SESSION_STORE_BACKEND, SESSION_STORE_DB, SESSION_STORE_MAX_ENTRIES,
+                SESSION_REDIS_URL, SESSION_REFRESH_INTERVAL, SESSION_SWEEP_INTERVAL, SESSION_SWEEP_BATCH
+            )
+            _store = build_session_store(
+                SESSION_STORE_BACKEND, SESSION_TIMEOUT,
+                db_path=SESSION_STORE_DB,
+                max_entries=SESSION_STORE_MAX_ENTRIES,
+                redis_url=SESSION_REDIS_URL,
+                refresh_interval=SESSION_REFRESH_INTERVAL,
+                sweep_interval=SESSION_SWEEP_INTERVAL,
+                sweep_batch=SESSION_SWEEP_BATCH
+            )
+        return _store
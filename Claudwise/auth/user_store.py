@@ -0,0 +1,273 @@
+"""
+Credential storage backends: the legacy users.json file and an indexed SQLite store
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USER_STORE_BACKENDS = ("sqlite", "json")
+
+# Fields kept for every user, with the values a new account starts with
+USER_DEFAULTS = {
+    "password_hash": "",
+    "role": "user",
+    "created_at": 0.0,
+    "login_attempts": 0,
+    "locked_until": 0,
+    "last_login": None
+}
+
+
+class UserStore:
+    """Interface for user records keyed by username; every method touches a single user"""
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """Return a user's record, or None if the user does not exist"""
+        raise NotImplementedError
+
+    def create(self, username: str, record: Dict[str, Any]) -> bool:
+        """Add a user; returns False if the username is taken"""
+        raise NotImplementedError
+
+    def update(self, username: str, **fields) -> bool:
+        """Set fields on one user; returns False if the user does not exist"""
+        raise NotImplementedError
+
+    def record_failed_login(self, username: str, max_attempts: int, lockout_duration: float) -> bool:
+        """Count a failed login, locking the account at max_attempts; returns True if it is now locked"""
+        raise NotImplementedError
+
+    def record_successful_login(self, username: str):
+        """Clear failed attempts and record the login time"""
+        self.update(username, login_attempts=0, locked_until=0, last_login=time.time())
+
+    def clear_expired_lock(self, username: str, locked_until: float):
+        """Reset the attempt counter once a lock has expired, unless the lock changed meanwhile"""
+        raise NotImplementedError
+
+    def list_users(self) -> Dict[str, Dict[str, Any]]:
+        """Return every user's record by username"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Return the number of users"""
+        raise NotImplementedError
+
+
+class JsonUserStore(UserStore):
+    """Users in one JSON file, rewritten atomically under a process-local lock"""
+
+    def __init__(self, users_file: str):
+        self.users_file = users_file
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.users_file):
+            return {}
+        try:
+            with open(self.users_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading users: {e}")
+            return {}
+
+    def _save(self, users: Dict[str, Dict[str, Any]]):
+        # Write a temporary file and swap it in so readers never see a partial file
+        directory = os.path.dirname(self.users_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{self.users_file}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(users, f, indent=2)
+            os.replace(temp_file, self.users_file)
+        except Exception as e:
+            logger.error(f"Error saving users: {e}")
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        user = self._load().get(username)
+        return dict(USER_DEFAULTS, **user) if user is not None else None
+
+    def create(self, username: str, record: Dict[str, Any]) -> bool:
+        with self._lock:
+            users = self._load()
+            if username in users:
+                return False
+            users[username] = dict(USER_DEFAULTS, **record)
+            self._save(users)
+            return True
+
+    def update(self, username: str, **fields) -> bool:
+        with self._lock:
+            users = self._load()
+            if username not in users:
+                return False
+            users[username].update(fields)
+            self._save(users)
+            return True
+
+    def record_failed_login(self, username: str, max_attempts: int, lockout_duration: float) -> bool:
+        with self._lock:
+            users = self._load()
+            if username not in users:
+                return False
+            user = users[username]
+            user['login_attempts'] = user.get('login_attempts', 0) + 1
+            if user['login_attempts'] >= max_attempts:
+                user['locked_until'] = time.time() + lockout_duration
+            self._save(users)
+            return user['login_attempts'] >= max_attempts
+
+    def clear_expired_lock(self, username: str, locked_until: float):
+        with self._lock:
+            users = self._load()
+            user = users.get(username)
+            if user is not None and user.get('locked_until', 0) == locked_until:
+                user['locked_until'] = 0
+                user['login_attempts'] = 0
+                self._save(users)
+
+    def list_users(self) -> Dict[str, Dict[str, Any]]:
+        return {username: dict(USER_DEFAULTS, **user) for username, user in self._load().items()}
+
+    def count(self) -> int:
+        return len(self._load())
+
+
+class SQLiteUserStore(UserStore):
+    """Users in a SQLite table indexed by username; logins read and update a single row"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Serialized mode with one shared connection; WAL lets other processes read while one writes
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "username TEXT PRIMARY KEY, "
+                "password_hash TEXT NOT NULL, "
+                "role TEXT NOT NULL DEFAULT 'user', "
+                "created_at REAL NOT NULL, "
+                "login_attempts INTEGER NOT NULL DEFAULT 0, "
+                "locked_until REAL NOT NULL DEFAULT 0, "
+                "last_login REAL)"
+            )
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {field: row[field] for field in USER_DEFAULTS}
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+        return self._row_to_record(row) if row is not None else None
+
+    def create(self, username: str, record: Dict[str, Any]) -> bool:
+        record = dict(USER_DEFAULTS, **record)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash, role, created_at, login_attempts, "
+                "locked_until, last_login) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, *(record[field] for field in USER_DEFAULTS))
+            )
+        return cursor.rowcount == 1
+
+    def update(self, username: str, **fields) -> bool:
+        unknown = set(fields) - set(USER_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return self.get(username) is not None
+
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE users SET {assignments} WHERE username = ?", (*fields.values(), username)
+            )
+        return cursor.rowcount == 1
+
+    def record_failed_login(self, username: str, max_attempts: int, lockout_duration: float) -> bool:
+        # One statement, so concurrent failures from other workers are never lost
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE users SET login_attempts = login_attempts + 1, "
+                "locked_until = CASE WHEN login_attempts + 1 >= ? THEN ? ELSE locked_until END "
+                "WHERE username = ?",
+                (max_attempts, time.time() + lockout_duration, username)
+            )
+            if cursor.rowcount != 1:
+                return False
+            row = self._conn.execute(
+                "SELECT login_attempts FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return row is not None and row['login_attempts'] >= max_attempts
+
+    def clear_expired_lock(self, username: str, locked_until: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE users SET locked_until = 0, login_attempts = 0 WHERE username = ? AND locked_until = ?",
+                (username, locked_until)
+            )
+
+    def list_users(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM users ORDER BY username").fetchall()
+        return {row['username']: self._row_to_record(row) for row in rows}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def migrate_json_users(users_file: str, store: UserStore) -> int:
+    """Copy users from a legacy users.json into a store, skipping usernames it already has"""
+    if not os.path.exists(users_file):
+        return 0
+
+    migrated = 0
+    for username, user in JsonUserStore(users_file).list_users().items():
+        record = {field: user[field] for field in USER_DEFAULTS}
+        if store.create(username, record):
+            migrated += 1
+
+    logger.info(f"Migrated {migrated} users from {users_file}")
+    return migrated
+
+
+_stores: Dict[tuple, UserStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_store(backend: str, users_db: str, users_file: str) -> UserStore:
+    """Return the shared store for a backend and path, migrating users.json into a new SQLite store"""
+    if backend not in USER_STORE_BACKENDS:
+        raise ValueError(f"Unsupported user store: {backend}")
+
+    key = (backend, users_db if backend == "sqlite" else users_file)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "sqlite":
+                store = SQLiteUserStore(users_db)
+                if store.count() == 0:
+                    migrate_json_users(users_file, store)
+            else:
+                store = JsonUserStore(users_file)
+            _stores[key] = store
+        return store
@@ -0,0 +1,78 @@
+"""
+Startup import-time benchmark: fails when importing the server process modules regresses past the budget
+
+Usage: python benchmarks/import_time.py [--module server] [--budget-ms 1000] [--runs 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config import IMPORT_TIME_BUDGET_MS, IMPORT_TIME_MODULES, IMPORT_TIME_FORBIDDEN
+
+
+def measure_imports(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Import a module in a fresh interpreter under -X importtime; return its cumulative ms and per-module timings"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    if module not in timings:
+        raise RuntimeError(f"No import timing recorded for {module}")
+    return timings[module][1] / 1000, timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check server start-up import time against a budget")
+    parser.add_argument("--module", action="append", dest="modules",
+                        help="Module to import (repeatable); defaults to IMPORT_TIME_MODULES")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; the fastest run counts")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules or IMPORT_TIME_MODULES:
+        try:
+            runs = [measure_imports(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"FAIL {module}: {e}")
+            failed = True
+            continue
+
+        # The fastest run is the least disturbed by other load on the machine
+        cumulative_ms, timings = min(runs, key=lambda run: run[0])
+        forbidden = [name for name in IMPORT_TIME_FORBIDDEN if name in timings]
+        over_budget = cumulative_ms > args.budget_ms
+        failed = failed or over_budget or bool(forbidden)
+
+        print(f"{'FAIL' if over_budget or forbidden else 'OK'} {module}: "
+              f"{cumulative_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+        if forbidden:
+            print(f"  imported at start-up but should load lazily: {', '.join(forbidden)}")
+
+        slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"  {self_us / 1000:8.1f}ms self {cumulative_us / 1000:8.1f}ms cumulative  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
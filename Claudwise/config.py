@@ -5,6 +5,14 @@ Configuration file for ClauseWise application
 # Model Configuration
 GRANITE_MODEL = "ibm-granite/granite-3.2-2b-instruct"
 SPACY_MODEL = "en_core_web_sm"
+MODEL_BACKEND = "simple"  # "simple" (rule-based), "granite", "fallback" or "tiered"; the backend loads on first use
+NER_ENABLED = False  # Load the spaCy NER model as an analyzer component
+
+# Analyzer Startup
+ANALYZER_WARM_UP = True  # Load models in a background thread at startup instead of on the first request
+IMPORT_TIME_MODULES = ["server"]  # Modules timed by benchmarks/import_time.py
+IMPORT_TIME_BUDGET_MS = 1000  # Cumulative import time allowed per module before the benchmark fails
+IMPORT_TIME_FORBIDDEN = ["torch", "transformers", "spacy", "PyPDF2", "docx", "streamlit"]  # Must only be imported on first use
 
 # Document Processing
 SUPPORTED_FORMATS = ['.pdf', '.docx', '.txt']
@@ -37,3 +45,67 @@ LEGAL_ENTITIES = [
 PAGE_TITLE = "ClauseWise - AI Legal Document Analyzer"
 PAGE_ICON = "⚖️"
 LAYOUT = "wide"
+
+# Analysis Result Cache
+ANALYZER_VERSION = "1.1.0"  # Bump whenever analysis output changes
+ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64MB in-memory LRU budget
+ANALYSIS_CACHE_DB = "cache/analysis_cache.db"  # Set to None to disable the on-disk tier
+ANALYSIS_CACHE_MAX_DISK_ENTRIES = 10000
+
+# API Analysis Executor
+ANALYSIS_EXECUTOR = "thread"  # "thread" for I/O-bound backends, "process" for CPU-bound analysis
+ANALYSIS_WORKERS = None  # Defaults to the number of CPU cores
+ANALYSIS_MAX_QUEUE = 32  # Calls allowed to wait for a worker before the API returns 429
+
+# Background Analysis Jobs
+JOB_DB = "cache/jobs.db"
+JOB_WORKERS = 2
+JOB_HEARTBEAT_INTERVAL = 10  # Seconds between a server's heartbeats for the jobs it is running
+JOB_STALE_AFTER = 60  # Seconds without a heartbeat after which a running job is requeued (its server is gone)
+
+# PDF Extraction
+PDF_PARALLEL_MIN_PAGES = 16  # Smaller PDFs are extracted serially
+PDF_PAGES_PER_CHUNK = 8  # Page range handed to each worker process
+PDF_PAGE_TIMEOUT = 10  # Seconds allowed per page before a chunk is abandoned
+PDF_WORKERS = None  # Defaults to the number of CPU cores
+
+# Streaming Ingestion
+STREAM_WINDOW_CHARS = 20000  # Text buffered at once when clauses and entities are scanned from a stream
+
+# Entity Extraction
+ENTITY_ENGINE = "regex"  # "regex" for per-pattern passes, "scanner" for the single-pass span scanner
+
+# Batched Model Inference
+GRANITE_BATCH_MAX_TOKENS = 8192  # Padded prompt plus generated tokens allowed per generate call
+GRANITE_BATCH_MAX_SIZE = 16  # Prompts per generate call
+GRANITE_PREFIX_CACHE = True  # Reuse the encoded instruction prefix of single-prompt generations
+GRANITE_PREFIX_CACHE_ENTRIES = 8  # Distinct prompt prefixes whose past key values stay in memory
+
+# /simplify Micro-Batching
+SIMPLIFY_BATCH_MAX_SIZE = 16  # Requests combined into one model call
+SIMPLIFY_BATCH_MAX_WAIT_MS = 10  # How long the first request in a batch waits for company
+SIMPLIFY_BATCH_MAX_QUEUE = 256  # Waiting requests before /simplify returns 429
+SIMPLIFY_BATCH_CONCURRENCY = 2  # Batches running at once
+SIMPLIFY_TIMEOUT = 60  # Seconds before a /simplify request returns 504
+
+# Clause Simplification Cache
+SIMPLIFICATION_CACHE_MAX_BYTES = 16 * 1024 * 1024  # In-memory budget for simplified clauses
+SIMPLIFICATION_CACHE_DB = "cache/analysis_cache.db"  # Set to None to keep simplifications in memory only
+SIMPLIFICATION_CACHE_MAX_DISK_ENTRIES = 50000
+
+# Tiered Model Routing (MODEL_BACKEND = "tiered")
+ROUTER_FAST_BACKEND = "simple"  # Serves short, low-priority and overflow requests
+ROUTER_QUALITY_BACKEND = "granite"  # Serves the rest while it has capacity; loads in the background
+ROUTER_SHORT_TEXT_CHARS = 200  # Texts shorter than this stay on the fast backend unless high priority
+ROUTER_MAX_QUALITY_IN_FLIGHT = 2  # Quality-backend calls running at once before new work overflows to the fast backend
+ROUTER_LATENCY_BUDGET_S = 20  # Recent quality-backend seconds per item above which normal-priority work stays fast
+ROUTER_PROBE_INTERVAL_S = 30  # Idle seconds after which a slow quality backend is tried again
+
+# Long Document Map-Reduce
+MAP_REDUCE_CHUNK_CHARS = 3000  # Document text per model prompt; longer documents are split on clause boundaries
+MAP_REDUCE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # In-memory budget for cached per-chunk outputs
+
+# Granite Weight Precision
+GRANITE_PRECISION = "float32"  # "float32", "bfloat16" (half the memory) or "int8" (dynamic quantization of linear layers)
+GRANITE_PRECISION_REPORT = False  # Time the reference clauses at load and compare outputs with float32
+GRANITE_PRECISION_REFERENCE = "cache/precision_reference.json"  # float32 outputs recorded by the report
@@ -0,0 +1,164 @@
+"""
+Bounded executor that runs blocking analyzer calls off the asyncio event loop
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+import logging
+
+from models.tiered_router import request_priority
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process")
+
+# Analyzer owned by each worker process when running with a process pool
+_worker_analyzer = None
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class ExecutorUnavailableError(Exception):
+    """Raised when the executor has been shut down or its workers have died"""
+
+
+def _init_worker():
+    """Build a private analyzer inside a freshly started worker process"""
+    global _worker_analyzer
+    from core.clausewise_analyzer import ClauseWiseAnalyzer
+    from config import ANALYZER_WARM_UP
+    _worker_analyzer = ClauseWiseAnalyzer()
+    if ANALYZER_WARM_UP:
+        _worker_analyzer.start_warm_up()
+
+
+def _call_analyzer(analyzer, method: str, args: tuple, kwargs: dict, priority: str) -> Any:
+    """Invoke an analyzer method with its model calls routed at the given priority"""
+    with request_priority(priority):
+        return getattr(analyzer, method)(*args, **kwargs)
+
+
+def _call_worker(method: str, args: tuple, kwargs: dict, priority: str) -> Any:
+    """Invoke an analyzer method inside a worker process"""
+    return _call_analyzer(_worker_analyzer, method, args, kwargs, priority)
+
+
+class AnalysisExecutor:
+    """Run ClauseWiseAnalyzer methods in a thread or process pool with bounded queue depth"""
+
+    def __init__(self, analyzer=None, kind: str = "thread", max_workers: Optional[int] = None,
+                 max_queue: int = 32):
+        """Create the pool; thread pools share the given analyzer, process pools build their own"""
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unsupported executor kind: {kind}")
+        if kind == "thread" and analyzer is None:
+            raise ValueError("A thread executor requires an analyzer instance")
+
+        self.analyzer = analyzer
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.capacity = self.max_workers + max_queue
+
+        self._pending = 0
+        self._streams = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="clausewise-analysis")
+
+        logger.info(f"Analysis executor started: {kind} pool, {self.max_workers} workers, "
+                    f"queue depth {max_queue}")
+
+    async def run(self, method: str, *args, priority: str = "normal", **kwargs) -> Any:
+        """Run an analyzer method in the pool, failing fast when the queue is full
+
+        priority is the model routing priority; pool threads and worker processes do not see the caller's.
+        """
+        if self._shutdown:
+            raise ExecutorUnavailableError("Analysis executor is shut down")
+
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Analysis queue is full ({self._pending} pending, capacity {self.capacity})"
+                )
+            self._pending += 1
+
+        try:
+            if self.kind == "process":
+                future = self._pool.submit(_call_worker, method, args, kwargs, priority)
+            else:
+                future = self._pool.submit(
+                    functools.partial(_call_analyzer, self.analyzer, method, args, kwargs, priority)
+                )
+        except (RuntimeError, BrokenProcessPool) as e:
+            self._release()
+            raise ExecutorUnavailableError(str(e))
+
+        # Release the slot when the work finishes, not when the caller stops waiting
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            logger.error(f"Analysis worker process died: {e}")
+            raise ExecutorUnavailableError("Analysis worker process died")
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def reserve_stream(self):
+        """Take a slot for a streamed generation that runs outside the pool; release it with release_stream()"""
+        if self._shutdown:
+            raise ExecutorUnavailableError("Analysis executor is shut down")
+
+        # Streams count against the queue like any other call, and at most one per worker runs at once
+        with self._lock:
+            if self._pending >= self.capacity or self._streams >= self.max_workers:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Analysis queue is full ({self._pending} pending, {self._streams} streaming)"
+                )
+            self._pending += 1
+            self._streams += 1
+
+    def release_stream(self):
+        """Give back a slot taken by reserve_stream()"""
+        with self._lock:
+            self._pending -= 1
+            self._streams -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool configuration and current queue depth"""
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'queued': max(0, self._pending - self.max_workers),
+                'streams': self._streams,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and shut the pool down"""
+        self._shutdown = True
+        self._pool.shutdown(wait=wait)
+        logger.info("Analysis executor shut down")
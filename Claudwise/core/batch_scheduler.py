@@ -0,0 +1,153 @@
+"""
+Asyncio micro-batching scheduler that coalesces concurrent requests into batched model calls
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from core.analysis_executor import ExecutorSaturatedError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchTimeoutError(Exception):
+    """Raised when a request does not get its result within its timeout"""
+
+
+class MicroBatchScheduler:
+    """Collect requests for up to max_wait_ms or max_batch_size items and process them as one batch"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[List[Any]]], max_batch_size: int = 16,
+                 max_wait_ms: float = 10, max_queue: int = 256, max_concurrent_batches: int = 2,
+                 timeout: float = 60.0):
+        """batch_fn takes a list of items and returns their results in the same order"""
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self._max_concurrent_batches = max_concurrent_batches
+        self._collector: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+        self._batches = 0
+        self._batched_items = 0
+        self._queue_wait = 0.0
+        self._max_queue_depth = 0
+
+    def start(self):
+        """Start collecting batches on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batch_slots = asyncio.Semaphore(self._max_concurrent_batches)
+        self._collector = asyncio.get_running_loop().create_task(self._collect_batches())
+        logger.info(f"Micro-batch scheduler started: up to {self.max_batch_size} items "
+                    f"or {self.max_wait * 1000:.0f}ms per batch")
+
+    async def stop(self):
+        """Stop collecting and fail requests that are still queued"""
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    async def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Queue one item and wait for its result from the batch it lands in"""
+        if self._collector is None:
+            raise RuntimeError("Batch scheduler is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.monotonic()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise ExecutorSaturatedError(f"Batch queue is full ({self.max_queue} waiting)")
+
+        self._submitted += 1
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        try:
+            # Shield so a timeout leaves the future for the batch to skip, rather than cancelling the batch
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            future.cancel()
+            raise BatchTimeoutError(f"No result within {timeout or self.timeout}s")
+
+    async def _collect_batches(self):
+        """Gather queued items into batches and hand each batch to a worker task"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Requests that timed out while waiting are not worth computing
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+
+            await self._batch_slots.acquire()
+            task = loop.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Run one batch and route each result back to its caller"""
+        try:
+            started = time.monotonic()
+            self._batches += 1
+            self._batched_items += len(batch)
+            self._queue_wait += sum(started - enqueued for _, _, enqueued in batch)
+            results = await self.batch_fn([item for item, _, _ in batch])
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._completed += len(batch)
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} items failed: {e}")
+            self._failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._batch_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, batch sizes and request outcome counters"""
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self._max_queue_depth,
+            'batches_in_flight': len(self._in_flight),
+            'batches': self._batches,
+            'average_batch_size': round(self._batched_items / self._batches, 2) if self._batches else 0,
+            'average_queue_wait_ms': round(self._queue_wait / self._batched_items * 1000, 2) if self._batched_items else 0,
+            'submitted': self._submitted,
+            'completed': self._completed,
+            'failed': self._failed,
+            'timed_out': self._timed_out,
+            'rejected': self._rejected
+        }
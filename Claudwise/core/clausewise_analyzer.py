@@ -2,104 +2,488 @@
 Main ClauseWise analyzer that orchestrates all components
 """
 
-from models.simple_model import SimpleModel
-from utils.document_processor import DocumentProcessor
 from utils.clause_extractor import ClauseExtractor
-from typing import Dict, List, Any, Optional
+from utils.entity_scanner import EntityScanner
+from utils.prepared_document import PreparedDocument
+from core.lazy_component import LazyComponent
+from models.registry import MODEL_BACKENDS, is_cacheable, load_backend, mark_uncacheable
+from core.result_cache import ResultCache, content_digest
+from core.simplification_cache import SimplificationCache, backend_signature
+from config import ANALYZER_VERSION, GRANITE_PRECISION, ANALYSIS_CACHE_MAX_BYTES, ANALYSIS_CACHE_DB, ANALYSIS_CACHE_MAX_DISK_ENTRIES, STREAM_WINDOW_CHARS, ENTITY_ENGINE
+from config import SIMPLIFICATION_CACHE_MAX_BYTES, SIMPLIFICATION_CACHE_DB, SIMPLIFICATION_CACHE_MAX_DISK_ENTRIES
+from config import MODEL_BACKEND, NER_ENABLED, SPACY_MODEL
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Set
 import logging
 import re
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Stages reported to progress callbacks, in execution order
+ANALYSIS_STAGES = [
+    'extract_text',
+    'document_info',
+    'classification',
+    'clauses',
+    'entities',
+    'summary',
+    'obligations'
+]
+
+# Result fields produced by each stage
+STAGE_OUTPUTS = {
+    'extract_text': ['text_length', 'word_count', 'raw_text'],
+    'document_info': ['document_info'],
+    'classification': ['classification'],
+    'clauses': ['clauses', 'clause_statistics'],
+    'entities': ['entities'],
+    'summary': ['summary'],
+    'obligations': ['obligations']
+}
+
+# Stages whose outputs each stage consumes
+STAGE_DEPENDENCIES = {
+    'extract_text': [],
+    'document_info': [],
+    'classification': ['extract_text'],
+    'clauses': ['extract_text'],
+    'entities': ['extract_text'],
+    'summary': ['extract_text'],
+    'obligations': ['extract_text']
+}
+
+FIELD_STAGES = {field: stage for stage, fields in STAGE_OUTPUTS.items() for field in fields}
+
+# Fields that can be computed from a single streaming pass over the document's pages or paragraphs;
+# any other field needs the whole text in memory
+STREAMABLE_FIELDS = {'document_info', 'text_length', 'word_count', 'clauses', 'clause_statistics', 'entities'}
+
+def _entity_safe_cut(text: str) -> Optional[int]:
+    """Return the offset just past the last period followed by whitespace, or None if there is none"""
+    # No entity pattern of either engine matches across such a point: obligations stop at a period,
+    # money may end on one but cannot continue past whitespace, and the rest contain none. The text
+    # on each side therefore scans exactly as it does inside the whole document
+    position = len(text) - 1
+    while position > 0:
+        position = text.rfind('.', 0, position)
+        if position == -1:
+            return None
+        if text[position + 1].isspace():
+            return position + 1
+    return None
+
+# Result fields in the order they appear in a full analysis
+ANALYSIS_FIELDS = [
+    'document_info',
+    'classification',
+    'summary',
+    'text_length',
+    'word_count',
+    'clauses',
+    'clause_statistics',
+    'entities',
+    'obligations',
+    'raw_text'
+]
+
+def resolve_analysis_fields(include: Optional[Iterable[str]] = None,
+                            exclude: Optional[Iterable[str]] = None) -> List[str]:
+    """Validate include/exclude field names and return the selected result fields"""
+    include = set(include) if include is not None else set(ANALYSIS_FIELDS)
+    exclude = set(exclude) if exclude is not None else set()
+    
+    unknown = (include | exclude) - set(ANALYSIS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown analysis fields: {', '.join(sorted(unknown))}")
+    
+    return [field for field in ANALYSIS_FIELDS if field in include and field not in exclude]
+
+def resolve_stages(fields: Iterable[str]) -> Set[str]:
+    """Return the stages needed to produce the given fields, including their dependencies"""
+    stages = set()
+    pending = [FIELD_STAGES[field] for field in fields]
+    while pending:
+        stage = pending.pop()
+        if stage not in stages:
+            stages.add(stage)
+            pending.extend(STAGE_DEPENDENCIES[stage])
+    return stages
+
+class AnalysisCancelled(Exception):
+    """Raised by a progress callback to abort an analysis between stages"""
+
 class ClauseWiseAnalyzer:
     """Main analyzer class that coordinates all AI models and utilities"""
     
-    def __init__(self):
-        """Initialize all components"""
+    def __init__(self, result_cache: Optional[ResultCache] = None, entity_engine: str = ENTITY_ENGINE,
+                 simplification_cache: Optional[SimplificationCache] = None, model_backend: str = MODEL_BACKEND):
+        """Initialize the analyzer; models and extractors are loaded on first use or by warm_up()"""
         logger.info("Initializing ClauseWise Analyzer...")
         
         try:
-            # Use simple rule-based model for immediate functionality
-            logger.info("Loading simple rule-based model...")
-            self.ai_model = SimpleModel()
-            self.model_type = "simple"
-            logger.info("Simple model loaded successfully")
+            if model_backend not in MODEL_BACKENDS:
+                raise ValueError(f"Unsupported model backend: {model_backend}")
+            self.model_type = model_backend
+            
+            if entity_engine not in ("regex", "scanner"):
+                raise ValueError(f"Unsupported entity engine: {entity_engine}")
+            self.entity_engine = entity_engine
             
-            # Skip NER model to avoid spaCy loading issues
-            self.ner_model = None
-            self.clause_extractor = ClauseExtractor()
-            self.document_processor = DocumentProcessor()
+            # Nothing heavy is imported or built here, so the server answers health checks immediately
+            self._components = {
+                'ai_model': LazyComponent('ai_model', self._load_ai_model),
+                'ner_model': LazyComponent('ner_model', self._load_ner_model),
+                'clause_extractor': LazyComponent('clause_extractor', ClauseExtractor),
+                'document_processor': LazyComponent('document_processor', self._load_document_processor),
+                'entity_scanner': LazyComponent('entity_scanner', EntityScanner),
+                'simplification_cache': LazyComponent('simplification_cache', self._load_simplification_cache)
+            }
+            if simplification_cache is not None:
+                self._components['simplification_cache'].set(simplification_cache)
+            self._warm_up_thread: Optional[threading.Thread] = None
+            
+            # Repeat uploads of the same file are served from the result cache
+            self.result_cache = result_cache if result_cache is not None else ResultCache(
+                max_memory_bytes=ANALYSIS_CACHE_MAX_BYTES,
+                db_path=ANALYSIS_CACHE_DB,
+                table="analysis_results",
+                max_disk_entries=ANALYSIS_CACHE_MAX_DISK_ENTRIES
+            )
             
             logger.info("ClauseWise Analyzer initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing ClauseWise Analyzer: {e}")
             raise
     
-    def analyze_document(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Complete analysis of a legal document"""
+    @property
+    def ai_model(self):
+        return self._components['ai_model'].get()
+    
+    @property
+    def ner_model(self):
+        return self._components['ner_model'].get()
+    
+    @property
+    def clause_extractor(self) -> ClauseExtractor:
+        return self._components['clause_extractor'].get()
+    
+    @property
+    def document_processor(self):
+        return self._components['document_processor'].get()
+    
+    @property
+    def entity_scanner(self) -> EntityScanner:
+        return self._components['entity_scanner'].get()
+    
+    @property
+    def simplification_cache(self) -> SimplificationCache:
+        return self._components['simplification_cache'].get()
+    
+    def _load_ai_model(self):
+        """Build the configured model backend, importing it only now"""
+        return load_backend(self.model_type)
+    
+    @staticmethod
+    def _load_ner_model():
+        """Build the spaCy NER model when enabled; it is skipped by default to avoid spaCy loading issues"""
+        if not NER_ENABLED:
+            return None
+        from models.ner_model import LegalNER
+        return LegalNER(SPACY_MODEL)
+    
+    @staticmethod
+    def _load_document_processor():
+        from utils.document_processor import DocumentProcessor
+        return DocumentProcessor()
+    
+    def _load_simplification_cache(self) -> SimplificationCache:
+        """Open the simplification cache for the loaded backend"""
+        # Boilerplate clauses recur across documents, so simplifications are reused per backend
+        model = self.ai_model
+
+        def signature() -> Optional[Dict[str, Any]]:
+            # A tiered router has no signature until its quality backend has loaded
+            backend = backend_signature(model)
+            return None if backend is None else dict(backend, analyzer_version=ANALYZER_VERSION)
+
+        return SimplificationCache(
+            signature,
+            ResultCache(
+                max_memory_bytes=SIMPLIFICATION_CACHE_MAX_BYTES,
+                db_path=SIMPLIFICATION_CACHE_DB,
+                table="simplifications",
+                max_disk_entries=SIMPLIFICATION_CACHE_MAX_DISK_ENTRIES
+            )
+        )
+    
+    def warm_up(self):
+        """Load every component now instead of on first use"""
+        for component in self._components.values():
+            try:
+                component.get()
+            except Exception:
+                # The failure is recorded on the component and retried on first use
+                pass
+    
+    def start_warm_up(self) -> threading.Thread:
+        """Load every component in a background thread, once"""
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self.warm_up, name="clausewise-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Report whether every component is loaded, with each component's load state"""
+        components = {name: component.status() for name, component in self._components.items()}
+        return {
+            'ready': all(status['state'] == "ready" for status in components.values()),
+            'model_type': self.model_type,
+            'components': components
+        }
+    
+    def analyze_document(self, file_content: bytes, filename: str,
+                         progress_callback: Optional[Callable[[str], None]] = None,
+                         include: Optional[Iterable[str]] = None,
+                         exclude: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Analyze a legal document, running only the stages needed for the requested fields"""
         logger.info(f"Starting analysis of document: {filename}")
         
+        fields = resolve_analysis_fields(include, exclude)
+        stages = resolve_stages(fields)
+        
         try:
-            # Step 1: Extract text from document
             file_type = '.' + filename.split('.')[-1].lower()
-            document_text = self.document_processor.process_document(file_content, file_type)
+            cache_key = self._cache_key(file_content, file_type)
+            partial_key = None if len(fields) == len(ANALYSIS_FIELDS) else f"{cache_key}:{','.join(fields)}"
             
-            if not document_text.strip():
-                raise ValueError("No text could be extracted from the document")
+            # A cached full analysis can serve any subset of fields
+            cached_results = self.result_cache.get(cache_key)
+            if cached_results is None and partial_key is not None:
+                cached_results = self.result_cache.get(partial_key)
+            if cached_results is not None:
+                if 'document_info' in fields:
+                    cached_results['document_info'] = self.document_processor.get_file_info(file_content, filename)
+                logger.info(f"Serving cached analysis for: {filename}")
+                return {field: cached_results[field] for field in fields}
+            
+            # Without model stages or the raw text preview, the document is never held in memory at once
+            if 'extract_text' in stages and set(fields) <= STREAMABLE_FIELDS:
+                analysis_results = self._scan_document(file_content, filename, stages, progress_callback)
+                analysis_results = {field: analysis_results[field] for field in fields}
+                self.result_cache.put(partial_key or cache_key, analysis_results)
+                logger.info(f"Streaming document analysis completed for: {filename}")
+                return analysis_results
+            
+            analysis_results = {}
+            
+            # Step 1: Extract text from document
+            if 'extract_text' in stages:
+                self._report_progress(progress_callback, 'extract_text')
+                # Lowercase view, sentences and word counts are computed once and shared by every stage
+                document_text = PreparedDocument(self.document_processor.process_document(file_content, file_type))
+                
+                if not document_text.strip():
+                    raise ValueError("No text could be extracted from the document")
+                
+                analysis_results['text_length'] = len(document_text)
+                analysis_results['word_count'] = document_text.word_count
+                analysis_results['raw_text'] = document_text[:1000] + "..." if len(document_text) > 1000 else str(document_text)
             
             # Step 2: Basic document info
-            doc_info = self.document_processor.get_file_info(file_content, filename)
+            if 'document_info' in stages:
+                self._report_progress(progress_callback, 'document_info')
+                analysis_results['document_info'] = self.document_processor.get_file_info(file_content, filename)
             
             # Step 3: Document classification
-            doc_classification = self.ai_model.classify_document(document_text)
+            if 'classification' in stages:
+                self._report_progress(progress_callback, 'classification')
+                analysis_results['classification'] = self.ai_model.classify_document(document_text)
             
             # Step 4: Extract clauses
-            clauses = self.clause_extractor.extract_clauses(document_text)
-            clause_stats = self.clause_extractor.get_clause_statistics(clauses)
+            if 'clauses' in stages:
+                self._report_progress(progress_callback, 'clauses')
+                clauses = self.clause_extractor.extract_clauses(document_text)
+                analysis_results['clauses'] = clauses
+                analysis_results['clause_statistics'] = self.clause_extractor.get_clause_statistics(clauses)
             
             # Step 5: Simple Entity Recognition (regex-based)
-            entities = self._extract_entities_simple(document_text)
+            if 'entities' in stages:
+                self._report_progress(progress_callback, 'entities')
+                analysis_results['entities'] = self._extract_entities(document_text)
             
             # Step 6: Generate document summary
-            summary = self.ai_model.generate_summary(document_text)
+            if 'summary' in stages:
+                self._report_progress(progress_callback, 'summary')
+                analysis_results['summary'] = self.ai_model.generate_summary(document_text)
             
             # Step 7: Extract key obligations
-            obligations = self.ai_model.extract_obligations(document_text)
+            if 'obligations' in stages:
+                self._report_progress(progress_callback, 'obligations')
+                analysis_results['obligations'] = self.ai_model.extract_obligations(document_text)
             
             # Compile results
-            analysis_results = {
-                'document_info': doc_info,
-                'classification': doc_classification,
-                'summary': summary,
-                'text_length': len(document_text),
-                'word_count': len(document_text.split()),
-                'clauses': clauses,
-                'clause_statistics': clause_stats,
-                'entities': entities,
-                'obligations': obligations,
-                'raw_text': document_text[:1000] + "..." if len(document_text) > 1000 else document_text
-            }
+            analysis_results = {field: analysis_results[field] for field in fields}
+            
+            # Placeholder or fast-tier model output is served once but never cached
+            if all(is_cacheable(value) for value in analysis_results.values()):
+                self.result_cache.put(partial_key or cache_key, analysis_results)
             
             logger.info(f"Document analysis completed successfully for: {filename}")
             return analysis_results
             
+        except AnalysisCancelled:
+            logger.info(f"Analysis cancelled for: {filename}")
+            raise
         except Exception as e:
             logger.error(f"Error analyzing document {filename}: {e}")
             raise Exception(f"Analysis failed: {str(e)}")
     
+    def _scan_document(self, file_content: bytes, filename: str, stages: Set[str],
+                       progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Compute text statistics, clauses and entities in one streaming pass, holding at most a window of text"""
+        file_type = '.' + filename.split('.')[-1].lower()
+        results = {}
+        self._report_progress(progress_callback, 'extract_text')
+        if 'document_info' in stages:
+            self._report_progress(progress_callback, 'document_info')
+            results['document_info'] = self.document_processor.get_file_info(file_content, filename)
+        
+        # Clauses and entities are computed during the same pass as the text statistics
+        for stage in ('clauses', 'entities'):
+            if stage in stages:
+                self._report_progress(progress_callback, stage)
+        
+        entities = {}
+        text_stats = {'start': None, 'end': 0, 'word_count': 0}
+        # Exact full text since the last cut; cuts only fall where no entity can span them
+        window = []
+        window_length = 0
+        scanned_any = False
+        
+        def scan_window(text: str):
+            nonlocal scanned_any
+            # The whole-text path strips the document, so the first window is stripped in front
+            if not scanned_any:
+                text = text.lstrip()
+            scanned_any = scanned_any or bool(text)
+            for key, values in self._collect_entities(text).items():
+                entities.setdefault(key, set()).update(values)
+        
+        def tap(segments):
+            # Feed entity windows and text statistics while clauses consume the stream
+            nonlocal window_length
+            for segment in segments:
+                text = segment['text']
+                if text.strip():
+                    # Match the length of the stripped full text that process_document returns
+                    if text_stats['start'] is None:
+                        text_stats['start'] = segment['offset'] + len(text) - len(text.lstrip())
+                    text_stats['end'] = segment['offset'] + len(text.rstrip())
+                text_stats['word_count'] += len(text.split())
+                
+                if 'entities' in stages:
+                    window.append(segment['separator'] + text)
+                    window_length += len(segment['separator']) + len(text)
+                    if window_length >= STREAM_WINDOW_CHARS:
+                        buffered = ''.join(window)
+                        cut = _entity_safe_cut(buffered)
+                        if cut is not None:
+                            scan_window(buffered[:cut])
+                            window[:] = [buffered[cut:]]
+                            window_length = len(buffered) - cut
+                
+                yield segment
+        
+        segments = tap(self.document_processor.iter_document(file_content, file_type))
+        if 'clauses' in stages:
+            clauses = list(self.clause_extractor.extract_clauses_stream(segments))
+        else:
+            clauses = None
+            for _ in segments:
+                pass
+        if window:
+            scan_window(''.join(window).rstrip())
+        
+        if text_stats['start'] is None:
+            raise ValueError("No text could be extracted from the document")
+        
+        results['text_length'] = text_stats['end'] - text_stats['start']
+        results['word_count'] = text_stats['word_count']
+        if clauses is not None:
+            results['clauses'] = clauses
+            results['clause_statistics'] = self.clause_extractor.get_clause_statistics(clauses)
+        if 'entities' in stages:
+            results['entities'] = self._limit_entities(entities)
+        return results
+    
+    @staticmethod
+    def _report_progress(progress_callback: Optional[Callable[[str], None]], stage: str):
+        """Notify the progress callback that a stage is starting"""
+        if progress_callback is not None:
+            progress_callback(stage)
+    
+    def _cache_key(self, file_content: bytes, file_type: str) -> str:
+        """Build the result cache key from the file digest and analyzer/model version"""
+        # Precision comes from config rather than the loaded model, so a lookup never loads it
+        return f"{ANALYZER_VERSION}:{self.model_type}:{GRANITE_PRECISION}:{file_type}:{content_digest(file_content)}"
+    
     def simplify_clause(self, clause_text: str) -> str:
         """Simplify a specific clause"""
+        simplified_text = self.simplification_cache.get(clause_text)
+        if simplified_text is None:
+            simplified_text = self._generate_simplification(clause_text)
+            self.simplification_cache.put(clause_text, simplified_text)
+        return simplified_text
+    
+    def _generate_simplification(self, clause_text: str) -> str:
+        """Simplify a clause with the model, bypassing the cache"""
         try:
             return self.ai_model.simplify_clause(clause_text)
         except Exception as e:
             logger.error(f"Error simplifying clause: {e}")
-            return f"Error: Could not simplify clause - {str(e)}"
+            return mark_uncacheable(f"Error: Could not simplify clause - {str(e)}")
+    
+    def stream_simplify_clause(self, clause_text: str, stop_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """Yield a clause simplification piece by piece when the backend can stream, else all at once
+
+        Setting stop_event ends a streaming generation early; the partial text is not cached.
+        """
+        cached = self.simplification_cache.get(clause_text)
+        if cached is not None:
+            yield cached
+        elif hasattr(self.ai_model, 'stream_simplify_clause'):
+            pieces = []
+            for text in self.ai_model.stream_simplify_clause(clause_text, stop_event=stop_event):
+                pieces.append(text)
+                yield text
+            if stop_event is not None and stop_event.is_set():
+                return
+            # Joining drops the markers, so carry them over from the pieces
+            simplified_text = ''.join(pieces).strip()
+            if not all(is_cacheable(text) for text in pieces):
+                simplified_text = mark_uncacheable(simplified_text)
+            self.simplification_cache.put(clause_text, simplified_text)
+        else:
+            yield self.simplify_clause(clause_text)
+    
+    def simplify_clauses(self, clause_texts: List[str]) -> List[str]:
+        """Simplify several clause texts, generating only the distinct ones not already cached"""
+        return self.simplification_cache.simplify_many(list(clause_texts), self._generate_simplifications)
+    
+    def _generate_simplifications(self, clause_texts: List[str]) -> List[str]:
+        """Simplify clause texts with the model in one batched call, one at a time if that fails"""
+        try:
+            return self.ai_model.batch_simplify_clauses(list(clause_texts))
+        except Exception as e:
+            logger.error(f"Error batch simplifying clauses: {e}")
+        
+        return [self._generate_simplification(clause_text) for clause_text in clause_texts]
     
     def extract_entities_from_text(self, text: str) -> Dict[str, List[str]]:
         """Extract entities from arbitrary text"""
         try:
-            return self._extract_entities_simple(text)
+            return self._extract_entities(text)
         except Exception as e:
             logger.error(f"Error extracting entities: {e}")
             return {}
@@ -142,7 +526,14 @@ class ClauseWiseAnalyzer:
             return {}
     
     def batch_simplify_clauses(self, clauses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Simplify multiple clauses"""
+        """Simplify multiple clauses, reusing cached simplifications and batching the rest"""
+        try:
+            simplified_texts = self.simplify_clauses([clause['text'] for clause in clauses])
+            return [dict(clause, simplified_text=simplified_text)
+                    for clause, simplified_text in zip(clauses, simplified_texts)]
+        except Exception as e:
+            logger.error(f"Error batch simplifying clauses: {e}")
+        
         simplified_clauses = []
         
         for clause in clauses:
@@ -159,8 +550,22 @@ class ClauseWiseAnalyzer:
         
         return simplified_clauses
     
+    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """Extract entities with the configured engine"""
+        return self._limit_entities(self._collect_entities(text))
+    
+    def _collect_entities(self, text: str) -> Dict[str, List[str]]:
+        """Collect raw entity matches with the configured engine"""
+        if self.entity_engine == "scanner":
+            return self.entity_scanner.collect(text)
+        return self._collect_entities_simple(text)
+    
     def _extract_entities_simple(self, text: str) -> Dict[str, List[str]]:
         """Simple regex-based entity extraction"""
+        return self._limit_entities(self._collect_entities_simple(text))
+    
+    def _collect_entities_simple(self, text: str) -> Dict[str, List[str]]:
+        """Collect every regex entity match in the text, before de-duplication"""
         entities = {
             "PARTIES": [],
             "DATES": [],
@@ -205,8 +610,9 @@ class ClauseWiseAnalyzer:
             'trademark', 'patent', 'liability', 'indemnification', 'termination',
             'breach', 'covenant', 'warranty', 'jurisdiction', 'governing law'
         ]
+        lowered_text = text.lower()
         for term in legal_terms:
-            if term.lower() in text.lower():
+            if term in lowered_text:
                 entities["LEGAL_TERMS"].append(term)
         
         # Extract obligations
@@ -217,8 +623,9 @@ class ClauseWiseAnalyzer:
             matches = re.findall(pattern, text, re.IGNORECASE)
             entities["OBLIGATIONS"].extend([match.strip() for match in matches])
         
-        # Remove duplicates and limit results
-        for key in entities:
-            entities[key] = list(set(entities[key]))[:10]  # Limit to 10 items each
-        
         return entities
+    
+    @staticmethod
+    def _limit_entities(entities: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+        """Remove duplicates and limit results"""
+        return {key: list(set(values))[:10] for key, values in entities.items()}  # Limit to 10 items each
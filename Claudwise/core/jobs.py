@@ -0,0 +1,303 @@
+"""
+Persistent background jobs for long-running document analysis
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from core.clausewise_analyzer import ANALYSIS_STAGES, AnalysisCancelled
+from models.tiered_router import REQUEST_PRIORITIES, request_priority
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobStore:
+    """SQLite-backed job table that survives server restarts"""
+
+    def __init__(self, db_path: str = "cache/jobs.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, "
+            "status TEXT NOT NULL, "
+            "filename TEXT NOT NULL, "
+            "content BLOB, "
+            "stage TEXT, "
+            "completed_stages TEXT NOT NULL DEFAULT '[]', "
+            "result TEXT, "
+            "error TEXT, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "priority TEXT NOT NULL DEFAULT 'normal', "
+            "owner TEXT, "
+            "heartbeat_at REAL)"
+        )
+        self._add_missing_columns()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    def _add_missing_columns(self):
+        """Bring a job table created by an older version up to the current columns"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'priority' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'normal'")
+        for column in ('owner TEXT', 'heartbeat_at REAL'):
+            if column.split()[0] not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+
+    def create(self, filename: str, content: bytes, priority: str = "normal") -> str:
+        """Queue a new job and return its id; priority is the model routing priority it runs with"""
+        if priority not in REQUEST_PRIORITIES:
+            raise ValueError(f"Unsupported request priority: {priority}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, content, created_at, updated_at, priority) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, filename, content, now, now, priority)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job status, progress and (once completed) results"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, filename, stage, completed_stages, result, error, "
+                "created_at, updated_at, priority FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        completed_stages = json.loads(row['completed_stages'])
+        return {
+            'job_id': row['id'],
+            'status': row['status'],
+            'filename': row['filename'],
+            'priority': row['priority'],
+            'stage': row['stage'],
+            'completed_stages': completed_stages,
+            'progress': round(len(completed_stages) / len(ANALYSIS_STAGES), 2),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def claim_next(self, owner: str) -> Optional[Tuple[str, str, bytes, str]]:
+        """Atomically move the oldest queued job to running under owner and return it"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, filename, content, priority FROM jobs WHERE status = 'queued' "
+                    "ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                        (owner, now, now, row['id'])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return row['id'], row['filename'], row['content'], row['priority']
+
+    def record_stage(self, job_id: str, stage: str, owner: str) -> bool:
+        """Mark the previous stage complete and start the next one; False once owner no longer runs the job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, stage, completed_stages, owner FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            # Cancelled, or requeued because this owner stopped sending heartbeats
+            if row is None or row['status'] != 'running' or row['owner'] != owner:
+                return False
+
+            completed_stages = json.loads(row['completed_stages'])
+            if row['stage'] and row['stage'] not in completed_stages:
+                completed_stages.append(row['stage'])
+
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, completed_stages = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (stage, json.dumps(completed_stages), time.time(), job_id, owner)
+            )
+            return True
+
+    def complete(self, job_id: str, result: Dict[str, Any], owner: str):
+        """Store results and release the uploaded file"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'completed', stage = NULL, completed_stages = ?, "
+                "result = ?, content = NULL, updated_at = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                (json.dumps(ANALYSIS_STAGES), json.dumps(result), time.time(), job_id, owner)
+            )
+
+    def fail(self, job_id: str, error: str, owner: str):
+        """Record a failed job"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, content = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (error, time.time(), job_id, owner)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it already finished"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', content = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+            return cursor.rowcount > 0
+
+    def heartbeat(self, owner: str):
+        """Show that owner is still alive and running its jobs"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), owner)
+            )
+
+    def requeue_interrupted(self, stale_after: float) -> int:
+        """Return running jobs whose owner has sent no heartbeat for stale_after seconds to the queue"""
+        # Other live processes sharing this database keep their jobs; only dead or hung owners lose them
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = NULL, completed_stages = '[]', owner = NULL, "
+                "heartbeat_at = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (now, now - stale_after)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+
+class JobManager:
+    """Local worker pool that drains the job store through a ClauseWiseAnalyzer"""
+
+    def __init__(self, analyzer, store: JobStore, num_workers: int = 2, poll_interval: float = 1.0,
+                 heartbeat_interval: float = 10.0, stale_after: float = 60.0):
+        """Jobs whose owner sent no heartbeat for stale_after seconds are requeued by any live manager"""
+        self.analyzer = analyzer
+        self.store = store
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        # Unique per process and manager, so processes sharing the job database can tell their jobs apart
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Requeue interrupted jobs and start the worker and heartbeat threads"""
+        self._requeue_interrupted()
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"clausewise-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="clausewise-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+        logger.info(f"Job manager started with {self.num_workers} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """Ask workers to exit once their current job finishes"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def submit(self, filename: str, content: bytes, priority: str = "normal") -> str:
+        """Queue a document for analysis at the given model routing priority"""
+        job_id = self.store.create(filename, content, priority)
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job; running jobs stop at their next stage boundary"""
+        return self.store.cancel(job_id)
+
+    def _requeue_interrupted(self):
+        requeued = self.store.requeue_interrupted(self.stale_after)
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted analysis jobs")
+            self._wakeup.set()
+
+    def _heartbeat_loop(self):
+        """Keep this manager's jobs alive and pick up those of managers that died"""
+        while not self._stopping.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(self.owner)
+                self._requeue_interrupted()
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            job = self.store.claim_next(self.owner)
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(*job)
+
+    def _run_job(self, job_id: str, filename: str, content: bytes, priority: str):
+        logger.info(f"Running analysis job {job_id} for: {filename}")
+
+        def on_stage(stage: str):
+            if not self.store.record_stage(job_id, stage, self.owner):
+                raise AnalysisCancelled(job_id)
+
+        try:
+            # Jobs exist for long analyses, so they get the quality tier unless the submitter asked for less
+            with request_priority(priority):
+                results = self.analyzer.analyze_document(content, filename, progress_callback=on_stage)
+            self.store.complete(job_id, results, self.owner)
+            logger.info(f"Analysis job {job_id} completed")
+        except AnalysisCancelled:
+            logger.info(f"Analysis job {job_id} cancelled or taken over after a missed heartbeat")
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {e}")
+            self.store.fail(job_id, str(e), self.owner)
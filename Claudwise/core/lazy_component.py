@@ -0,0 +1,65 @@
+"""
+Components that are built on first use, or ahead of time by a background warm-up
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load states reported by readiness checks
+COMPONENT_STATES = ("pending", "loading", "ready", "failed")
+
+
+class LazyComponent:
+    """Build a component once, on the first thread that needs it, and record how loading went"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        """loader runs at most once per successful load; a failed load is retried on the next use"""
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._lock = threading.Lock()
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    def get(self) -> Any:
+        """Return the component, loading it first if needed"""
+        if self.state == "ready":
+            return self._value
+
+        with self._lock:
+            # Another thread may have finished loading while this one waited
+            if self.state == "ready":
+                return self._value
+
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                self._value = self._loader()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                logger.error(f"Error loading component {self.name}: {e}")
+                raise
+
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.error = None
+            self.state = "ready"
+            logger.info(f"Loaded component {self.name} in {self.load_seconds}s")
+            return self._value
+
+    def set(self, value: Any):
+        """Use an already built component instead of loading one"""
+        with self._lock:
+            self._value = value
+            self.error = None
+            self.state = "ready"
+
+    def status(self) -> Dict[str, Any]:
+        """Get the load state, duration and last error"""
+        return {'state': self.state, 'load_seconds': self.load_seconds, 'error': self.error}
@@ -0,0 +1,198 @@
+"""
+Content-addressed result cache with an in-memory LRU tier and an optional SQLite tier
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def content_digest(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """Cache JSON-serializable results in a byte-budgeted LRU backed by SQLite"""
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, db_path: Optional[str] = None,
+                 table: str = "results", max_disk_entries: int = 10000):
+        """Create the cache; pass db_path=None to keep it memory-only"""
+        self.max_memory_bytes = max_memory_bytes
+        self.db_path = db_path
+        self.table = table
+        self.max_disk_entries = max_disk_entries
+
+        # Values are held compressed so the byte budget reflects real usage
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # SQLite work has its own lock so memory hits never wait behind a disk write
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        # The table is trimmed every so many inserts rather than counted on each one
+        self._trim_interval = max(1, max_disk_entries // 100)
+        self._puts_since_trim = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._init_db()
+
+    def _init_db(self):
+        """Open the on-disk tier, disabling it if the database is unusable"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table} (last_access)"
+            )
+            self._conn.commit()
+            logger.info(f"Result cache disk tier ready: {self.db_path} ({self.table})")
+        except Exception as e:
+            logger.error(f"Error opening result cache database {self.db_path}: {e}")
+            self._conn = None
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(payload: bytes) -> Any:
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh copy of the cached value, or None on a miss"""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+        if payload is not None:
+            return self._decode(payload)
+
+        payload = self._disk_get(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, payload)
+        return self._decode(payload)
+
+    def put(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        try:
+            payload = self._encode(value)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Result for key {key} is not cacheable: {e}")
+            return
+
+        with self._lock:
+            self._memory_put(key, payload)
+        self._disk_put(key, payload)
+
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._disk_lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute(f"DELETE FROM {self.table}")
+                    self._conn.commit()
+                except Exception as e:
+                    logger.error(f"Error clearing result cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory usage"""
+        with self._lock:
+            return {
+                'entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk_enabled': self._conn is not None
+            }
+
+    def _memory_put(self, key: str, payload: bytes):
+        """Insert into the LRU tier and evict until within the byte budget"""
+        if len(payload) > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if self._conn is None:
+            return None
+        with self._disk_lock:
+            try:
+                row = self._conn.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                return row[0]
+            except Exception as e:
+                logger.error(f"Error reading result cache: {e}")
+                return None
+
+    def _disk_put(self, key: str, payload: bytes):
+        if self._conn is None:
+            return
+        with self._disk_lock:
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, last_access) VALUES (?, ?, ?)",
+                    (key, payload, time.time())
+                )
+                # Trim the least recently used rows periodically; the table overshoots its limit by
+                # at most one interval instead of being counted on every insert
+                self._puts_since_trim += 1
+                if self._puts_since_trim >= self._trim_interval:
+                    self._puts_since_trim = 0
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f"SELECT key FROM {self.table} ORDER BY last_access ASC "
+                        f"LIMIT MAX(0, (SELECT COUNT(*) FROM {self.table}) - ?))",
+                        (self.max_disk_entries,)
+                    )
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Error writing result cache: {e}")
@@ -0,0 +1,111 @@
+"""
+Memoized clause simplifications keyed on normalized clause text, backend and generation settings
+"""
+
+import json
+import re
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Union
+import logging
+
+from core.result_cache import ResultCache, content_digest
+from models.registry import is_cacheable
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Typographic variants that boilerplate copied between documents tends to pick up
+_PUNCTUATION_FOLDS = str.maketrans({
+    '‘': "'", '’': "'", '“': '"', '”': '"',
+    '–': '-', '—': '-'
+})
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_clause(text: str) -> str:
+    """Fold case, quotes, dashes and whitespace so near-verbatim copies of a clause compare equal"""
+    text = unicodedata.normalize('NFKC', text).translate(_PUNCTUATION_FOLDS)
+    return _WHITESPACE_PATTERN.sub(' ', text).strip().casefold()
+
+
+def backend_signature(model: Any) -> Optional[Dict[str, Any]]:
+    """Describe the settings of a model backend that change its simplification output, or None until known"""
+    # A router's cacheable output all comes from one of its backends, so that backend's settings count
+    if hasattr(model, 'cached_backend'):
+        backend = model.cached_backend()
+        return None if backend is None else backend_signature(backend)
+    return {
+        'backend': type(model).__name__,
+        'model': getattr(model, 'model_name', None),
+        'precision': getattr(model, 'precision', None),
+        'generation': getattr(model, 'simplify_generation_kwargs', None)
+    }
+
+
+class SimplificationCache:
+    """Look up and store clause simplifications so a recurring clause is generated once per backend"""
+
+    def __init__(self, signature: Union[Dict[str, Any], Callable[[], Optional[Dict[str, Any]]]],
+                 cache: Optional[ResultCache] = None):
+        """signature identifies the backend and generation settings; cached entries never cross signatures
+
+        A callable signature is asked again until it returns one; nothing is read or stored before then.
+        """
+        self.cache = cache if cache is not None else ResultCache()
+        self._signature = signature
+        self._namespace: Optional[str] = None
+
+    @property
+    def namespace(self) -> Optional[str]:
+        """Digest of the signature, or None while it is not known yet"""
+        if self._namespace is None:
+            signature = self._signature() if callable(self._signature) else self._signature
+            if signature is not None:
+                self._namespace = content_digest(json.dumps(signature, sort_keys=True, default=str).encode('utf-8'))[:16]
+        return self._namespace
+
+    def key(self, clause_text: str) -> Optional[str]:
+        """Build the cache key for a clause, or None while the signature is not known"""
+        namespace = self.namespace
+        if namespace is None:
+            return None
+        return f"{namespace}:{content_digest(normalize_clause(clause_text).encode('utf-8'))}"
+
+    def get(self, clause_text: str) -> Optional[str]:
+        """Return the cached simplification of a clause, or None"""
+        key = self.key(clause_text)
+        return self.cache.get(key) if key is not None else None
+
+    def put(self, clause_text: str, simplified_text: str):
+        """Remember a simplification unless it is an error message or a backend marked it as a placeholder"""
+        key = self.key(clause_text)
+        if key is not None and simplified_text and is_cacheable(simplified_text) and not simplified_text.startswith("Error:"):
+            self.cache.put(key, simplified_text)
+
+    def simplify_many(self, clause_texts: List[str],
+                      simplify_fn: Callable[[List[str]], List[str]]) -> List[str]:
+        """Return simplifications in input order, calling simplify_fn once with the distinct uncached clauses"""
+        namespace = self.namespace
+        # Keys also de-duplicate the batch, so they are built even while nothing can be looked up
+        keys = [f"{namespace}:{content_digest(normalize_clause(clause_text).encode('utf-8'))}"
+                for clause_text in clause_texts]
+        results: List[Optional[str]] = []
+        pending: Dict[str, str] = {}
+        for key, clause_text in zip(keys, clause_texts):
+            cached = self.cache.get(key) if namespace is not None and key not in pending else None
+            if cached is None:
+                pending.setdefault(key, clause_text)
+            results.append(cached)
+
+        if pending:
+            generated = dict(zip(pending, simplify_fn(list(pending.values()))))
+            for key, clause_text in pending.items():
+                self.put(clause_text, generated[key])
+            results = [generated[key] if result is None else result for key, result in zip(keys, results)]
+
+        logger.info(f"Simplification cache: {len(clause_texts) - len(pending)} of {len(clause_texts)} clauses reused")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory usage"""
+        return dict(self.cache.stats(), namespace=self.namespace)
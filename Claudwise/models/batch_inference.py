@@ -0,0 +1,102 @@
+"""
+Batched inference over a causal language model with token-budgeted, left-padded batches
+"""
+
+import torch
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from models.prefix_cache import PrefixCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchInferenceEngine:
+    """Run many chat prompts through one model.generate call per batch"""
+
+    def __init__(self, model, tokenizer, max_batch_tokens: int = 8192, max_batch_size: int = 16,
+                 prefix_cache: Optional[PrefixCache] = None):
+        """Wrap a loaded model and tokenizer; batches stay within max_batch_tokens of padded prompt plus output"""
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.prefix_cache = prefix_cache
+
+        # Decoder-only models continue from the last position, so pad on the left
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+    def generate(self, conversations: List[List[Dict[str, str]]], max_new_tokens: int = 250,
+                 **generation_kwargs) -> List[str]:
+        """Generate a reply for each conversation, returned in input order"""
+        prompts = [
+            self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            for messages in conversations
+        ]
+
+        # Identical prompts (repeated boilerplate clauses) are generated once
+        unique_prompts = list(dict.fromkeys(prompts))
+        replies = {}
+        for batch in self._plan_batches(unique_prompts, max_new_tokens):
+            for prompt, reply in zip(batch, self._generate_batch(batch, max_new_tokens, generation_kwargs)):
+                replies[prompt] = reply
+
+        return [replies[prompt] for prompt in prompts]
+
+    def generate_from(self, build_messages: Callable[[str], List[Dict[str, str]]], values: List[str],
+                      max_new_tokens: int = 250, **generation_kwargs) -> List[str]:
+        """Generate a reply for build_messages(value) per value, reusing the cached prompt prefix for single prompts"""
+        unique_values = list(dict.fromkeys(values))
+        if len(unique_values) == 1 and self.prefix_cache is not None:
+            inputs = self.prefix_cache.generation_inputs(build_messages, unique_values[0])
+            if inputs is not None:
+                reply = self._generate_inputs(inputs, max_new_tokens, generation_kwargs)[0]
+                return [reply] * len(values)
+
+        # Left padding puts each row's prefix at a different offset, so batches prefill in full
+        return self.generate([build_messages(value) for value in values], max_new_tokens, **generation_kwargs)
+
+    def _plan_batches(self, prompts: List[str], max_new_tokens: int) -> List[List[str]]:
+        """Group prompts of similar length so padding stays small and each batch fits the token budget"""
+        lengths = {prompt: len(ids) for prompt, ids in zip(
+            prompts, self.tokenizer(prompts, add_special_tokens=False)['input_ids']
+        )}
+
+        batches = []
+        batch: List[str] = []
+        longest = 0
+        for prompt in sorted(prompts, key=lengths.get):
+            row_tokens = max(longest, lengths[prompt]) + max_new_tokens
+            if batch and (len(batch) >= self.max_batch_size or
+                          row_tokens * (len(batch) + 1) > self.max_batch_tokens):
+                batches.append(batch)
+                batch, longest = [], 0
+            batch.append(prompt)
+            longest = max(longest, lengths[prompt])
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _generate_batch(self, prompts: List[str], max_new_tokens: int,
+                        generation_kwargs: Dict[str, Any]) -> List[str]:
+        """Run one padded generate call and decode only the new tokens of each row"""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, add_special_tokens=False)
+        return self._generate_inputs(inputs.to(self.model.device), max_new_tokens, generation_kwargs)
+
+    def _generate_inputs(self, inputs: Dict[str, Any], max_new_tokens: int,
+                         generation_kwargs: Dict[str, Any]) -> List[str]:
+        """Run generate on prepared inputs and decode only the new tokens of each row"""
+        with torch.no_grad():
+            output_ids = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **generation_kwargs
+            )
+
+        new_tokens = output_ids[:, inputs['input_ids'].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
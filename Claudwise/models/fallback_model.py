@@ -8,16 +8,22 @@ import torch
 from typing import List, Dict, Any
 import logging
 
+from models.registry import ModelBackend, mark_uncacheable
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class FallbackModel:
+# Generation settings for clause simplification
+SIMPLIFY_GENERATION_KWARGS = {"max_length": 150, "num_return_sequences": 1, "temperature": 0.7}
+
+class FallbackModel(ModelBackend):
     """Lightweight fallback model for legal document analysis"""
     
     def __init__(self):
         """Initialize with a smaller, faster model"""
         self.model_name = "microsoft/DialoGPT-small"  # Much smaller model
         self.pipe = None
+        self.simplify_generation_kwargs = SIMPLIFY_GENERATION_KWARGS
         self._load_model()
     
     def _load_model(self):
@@ -39,25 +45,46 @@ class FallbackModel:
     def simplify_clause(self, clause: str) -> str:
         """Simplify a legal clause using the fallback model"""
         if not self.pipe:
-            return "Model not available. Please try: This clause means that both parties agree to keep information confidential and not share it with others."
+            return mark_uncacheable("Model not available. Please try: This clause means that both parties agree to keep information confidential and not share it with others.")
         
         try:
-            # Simple prompt for the smaller model
-            prompt = f"Simplify this legal text: {clause[:200]}... In simple terms:"
-            result = self.pipe(prompt, max_length=150, num_return_sequences=1, temperature=0.7)
-            
-            if result and len(result) > 0:
-                generated = result[0]['generated_text']
-                # Extract only the simplified part
-                if "In simple terms:" in generated:
-                    simplified = generated.split("In simple terms:")[-1].strip()
-                    return simplified if simplified else "This clause establishes legal obligations between the parties involved."
-            
-            return "This clause establishes legal obligations between the parties involved."
+            result = self.pipe(self._simplify_prompt(clause), **SIMPLIFY_GENERATION_KWARGS)
+            return self._parse_simplification(result)
             
         except Exception as e:
             logger.error(f"Error simplifying clause: {e}")
-            return "This clause contains important legal terms that define responsibilities and obligations for all parties involved."
+            return mark_uncacheable("This clause contains important legal terms that define responsibilities and obligations for all parties involved.")
+    
+    def batch_simplify_clauses(self, clauses: List[str]) -> List[str]:
+        """Simplify several clauses in one batched pipeline call"""
+        if not self.pipe:
+            return [self.simplify_clause(clause) for clause in clauses]
+        
+        try:
+            prompts = [self._simplify_prompt(clause) for clause in clauses]
+            results = self.pipe(prompts, batch_size=len(prompts), **SIMPLIFY_GENERATION_KWARGS)
+            return [self._parse_simplification(result) for result in results]
+        except Exception as e:
+            logger.error(f"Error batch simplifying clauses: {e}")
+            return [self.simplify_clause(clause) for clause in clauses]
+    
+    @staticmethod
+    def _simplify_prompt(clause: str) -> str:
+        """Simple prompt for the smaller model"""
+        return f"Simplify this legal text: {clause[:200]}... In simple terms:"
+    
+    @staticmethod
+    def _parse_simplification(result: List[Dict[str, Any]]) -> str:
+        """Extract only the simplified part of the generated text"""
+        if result and len(result) > 0:
+            generated = result[0]['generated_text']
+            if "In simple terms:" in generated:
+                simplified = generated.split("In simple terms:")[-1].strip()
+                if simplified:
+                    return simplified
+        
+        # Placeholder text; a later attempt may produce a real simplification, so it is never cached
+        return mark_uncacheable("This clause establishes legal obligations between the parties involved.")
     
     def classify_document(self, document_text: str) -> str:
         """Classify document type using simple keyword matching"""
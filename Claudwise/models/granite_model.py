@@ -2,43 +2,196 @@
 IBM Granite model integration for legal document analysis
 """
 
-from transformers import pipeline
+from transformers import pipeline, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
 import torch
-from typing import List, Dict, Any
+import threading
+from functools import partial
+from typing import Iterator, List, Dict, Any, Optional
 import logging
 
+from config import (
+    GRANITE_BATCH_MAX_TOKENS, GRANITE_BATCH_MAX_SIZE, DOCUMENT_TYPES,
+    MAP_REDUCE_CHUNK_CHARS, MAP_REDUCE_CACHE_MAX_BYTES, ANALYSIS_CACHE_DB, ANALYSIS_CACHE_MAX_DISK_ENTRIES,
+    GRANITE_PRECISION, GRANITE_PRECISION_REPORT, GRANITE_PRECISION_REFERENCE,
+    GRANITE_PREFIX_CACHE, GRANITE_PREFIX_CACHE_ENTRIES, GRANITE_MODEL
+)
+from core.result_cache import ResultCache
+from models.batch_inference import BatchInferenceEngine
+from models.map_reduce import MapReduceRunner
+from models.prefix_cache import PrefixCache
+from models.precision_report import run_precision_report
+from models.registry import ModelBackend, mark_uncacheable
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class GraniteModel:
-    def __init__(self, model_name: str = "ibm-granite/granite-3.2-2b-instruct"):
+# Sampling settings for clause simplification
+SIMPLIFY_GENERATION_KWARGS = {
+    "max_new_tokens": 250,
+    "temperature": 0.85,
+    "top_p": 0.9,
+    "repetition_penalty": 1.05,
+    "do_sample": True
+}
+
+SUMMARY_GENERATION_KWARGS = {"max_new_tokens": 250, "temperature": 0.3}
+CLASSIFY_GENERATION_KWARGS = {"max_new_tokens": 50, "temperature": 0.1}
+OBLIGATIONS_GENERATION_KWARGS = {"max_new_tokens": 300, "temperature": 0.3}
+
+# Weight precisions for CPU inference; int8 applies dynamic quantization to the linear layers
+GRANITE_PRECISIONS = ("float32", "bfloat16", "int8")
+
+
+class StopOnEvent(StoppingCriteria):
+    """End generation at the next token once any of the events is set"""
+    
+    def __init__(self, *events: Optional[threading.Event]):
+        self.events = [event for event in events if event is not None]
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return any(event.is_set() for event in self.events)
+
+class GraniteModel(ModelBackend):
+    def __init__(self, model_name: str = GRANITE_MODEL, precision: str = GRANITE_PRECISION):
         """Initialize the Granite model pipeline"""
+        if precision not in GRANITE_PRECISIONS:
+            raise ValueError(f"Unsupported Granite precision: {precision}")
+        
         self.model_name = model_name
+        self.precision = precision
+        self.precision_report = None
+        self.simplify_generation_kwargs = SIMPLIFY_GENERATION_KWARGS
         self.pipe = None
+        self.batch_engine = None
+        self.prefix_cache = None
+        self.map_reduce = None
         self._load_model()
     
     def _load_model(self):
         """Load the Granite model pipeline"""
         try:
-            logger.info(f"Loading Granite model: {self.model_name}")
+            logger.info(f"Loading Granite model: {self.model_name} ({self.precision})")
             # Use CPU and smaller precision for faster loading
             self.pipe = pipeline(
                 "text-generation", 
                 model=self.model_name,
-                torch_dtype=torch.float32,
+                torch_dtype=torch.bfloat16 if self.precision == "bfloat16" else torch.float32,
                 device_map=None,  # Force CPU for initial loading
                 model_kwargs={"low_cpu_mem_usage": True}
             )
+            if self.precision == "int8":
+                # Linear layers hold almost all of the weights; activations are quantized on the fly.
+                # In place, so each float32 layer is freed as it is replaced rather than kept alongside a full copy
+                torch.ao.quantization.quantize_dynamic(
+                    self.pipe.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+            if GRANITE_PREFIX_CACHE:
+                # The instruction text before the clause or document is prefilled once per prompt
+                self.prefix_cache = PrefixCache(
+                    self.pipe.model,
+                    self.pipe.tokenizer,
+                    max_entries=GRANITE_PREFIX_CACHE_ENTRIES
+                )
+            self.batch_engine = BatchInferenceEngine(
+                self.pipe.model,
+                self.pipe.tokenizer,
+                max_batch_tokens=GRANITE_BATCH_MAX_TOKENS,
+                max_batch_size=GRANITE_BATCH_MAX_SIZE,
+                prefix_cache=self.prefix_cache
+            )
+            # Long documents are processed chunk by chunk so nothing past the context window is dropped
+            self.map_reduce = MapReduceRunner(
+                self.batch_engine,
+                f"{self.model_name}:{self.precision}",
+                chunk_chars=MAP_REDUCE_CHUNK_CHARS,
+                cache=ResultCache(
+                    max_memory_bytes=MAP_REDUCE_CACHE_MAX_BYTES,
+                    db_path=ANALYSIS_CACHE_DB,
+                    table="chunk_results",
+                    max_disk_entries=ANALYSIS_CACHE_MAX_DISK_ENTRIES
+                )
+            )
             logger.info("Granite model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading Granite model: {e}")
             # If the specific model fails, provide a fallback message
             logger.info("Note: First-time model download may take several minutes")
             raise
+
+        if GRANITE_PRECISION_REPORT:
+            # The report is diagnostic only; a failure here must not take down a loaded model
+            try:
+                self.precision_report = run_precision_report(self, GRANITE_PRECISION_REFERENCE)
+            except Exception as e:
+                logger.error(f"Precision report failed: {e}")
+                self.precision_report = None
     
     def simplify_clause(self, clause: str, simplify_level: str = "basic") -> str:
         """Simplify a legal clause into layman-friendly language"""
+        build_messages = partial(self._simplify_messages, simplify_level=simplify_level)
+        
+        try:
+            return self.batch_engine.generate_from(build_messages, [clause], **SIMPLIFY_GENERATION_KWARGS)[0]
+        except Exception as e:
+            logger.error(f"Error simplifying clause: {e}")
+            return mark_uncacheable(f"Error: Could not simplify clause - {str(e)}")
+    
+    def stream_simplify_clause(self, clause: str, simplify_level: str = "basic",
+                               stop_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """Simplify a clause, yielding text as the model generates it until done or stop_event is set"""
+        tokenizer = self.pipe.tokenizer
+        build_messages = partial(self._simplify_messages, simplify_level=simplify_level)
+        inputs = None
+        if self.prefix_cache is not None:
+            inputs = self.prefix_cache.generation_inputs(build_messages, clause)
+        if inputs is None:
+            prompt = tokenizer.apply_chat_template(build_messages(clause), tokenize=False, add_generation_prompt=True)
+            inputs = tokenizer(prompt, return_tensors="pt", add_special_tokens=False).to(self.pipe.model.device)
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        # Our own event ends generation when the consumer goes away; the caller's event is only read,
+        # so callers can still tell a completed stream from one they stopped
+        abandoned = threading.Event()
+        errors = []
+        
+        def generate():
+            try:
+                with torch.no_grad():
+                    self.pipe.model.generate(**inputs, streamer=streamer,
+                                             stopping_criteria=StoppingCriteriaList([StopOnEvent(abandoned, stop_event)]),
+                                             **SIMPLIFY_GENERATION_KWARGS)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer waiting on the streamer
+                streamer.end()
+        
+        # generate() pushes text into the streamer from a worker thread while we drain it here
+        thread = threading.Thread(target=generate, name="clausewise-stream", daemon=True)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            # A consumer that stops early (or closes this generator) ends generation at the next token
+            abandoned.set()
+            thread.join()
         
+        if errors:
+            logger.error(f"Error streaming clause simplification: {errors[0]}")
+            raise errors[0]
+    
+    def batch_simplify_clauses(self, clauses: List[str], simplify_level: str = "basic") -> List[str]:
+        """Simplify many clauses with batched generate calls, in input order"""
+        build_messages = partial(self._simplify_messages, simplify_level=simplify_level)
+        
+        try:
+            return self.batch_engine.generate_from(build_messages, clauses, **SIMPLIFY_GENERATION_KWARGS)
+        except Exception as e:
+            logger.error(f"Batched simplification failed, simplifying clauses one at a time: {e}")
+            return [self.simplify_clause(clause, simplify_level) for clause in clauses]
+    
+    def _simplify_messages(self, clause: str, simplify_level: str) -> List[Dict[str, str]]:
+        """Build the chat messages for simplifying a clause"""
         # Base prompt for clearer, more detailed outputs
         base_prompt = f"""You are an expert legal assistant helping non-lawyers understand legal clauses.
 Rewrite the following legal clause in clear, plain, everyday English.
@@ -65,24 +218,81 @@ Rewritten Clause:"""
             }
         ]
         
+        return messages
+    
+    def classify_document(self, document_text: str) -> str:
+        """Classify the type of legal document by majority vote over its chunks"""
+        return self.batch_classify_documents([document_text])[0]
+    
+    def batch_classify_documents(self, document_texts: List[str]) -> List[str]:
+        """Classify several documents, batching the chunks of all of them together"""
         try:
-            result = self.pipe(
-                messages, 
-                max_new_tokens=250, 
-                temperature=0.85,
-                top_p=0.9,
-                repetition_penalty=1.05,
-                do_sample=True
-            )
-            simplified = result[0]['generated_text'][-1]['content']
-            return simplified.strip()
+            grouped = self.map_reduce.map_documents('classify', document_texts, self._classify_messages,
+                                                    **CLASSIFY_GENERATION_KWARGS)
+            return [MapReduceRunner.vote([self._match_document_type(output) for output in outputs], "Other")
+                    for outputs in grouped]
         except Exception as e:
-            logger.error(f"Error simplifying clause: {e}")
-            return f"Error: Could not simplify clause - {str(e)}"
+            logger.error(f"Error classifying document: {e}")
+            return [mark_uncacheable("Other") for _ in document_texts]
     
-    def classify_document(self, document_text: str) -> str:
-        """Classify the type of legal document"""
-        messages = [
+    def extract_obligations(self, text: str) -> List[str]:
+        """Extract key obligations from every chunk of a legal text"""
+        return self.batch_extract_obligations([text])[0]
+    
+    def batch_extract_obligations(self, texts: List[str]) -> List[List[str]]:
+        """Extract obligations from several texts, batching the chunks of all of them together"""
+        try:
+            grouped = self.map_reduce.map_documents('obligations', texts, self._obligations_messages,
+                                                    **OBLIGATIONS_GENERATION_KWARGS)
+            return [self._parse_obligations(outputs) for outputs in grouped]
+        except Exception as e:
+            logger.error(f"Error extracting obligations: {e}")
+            return [mark_uncacheable([]) for _ in texts]
+    
+    @staticmethod
+    def _parse_obligations(outputs: List[str]) -> List[str]:
+        """Parse bullet points, keeping the first occurrence of each obligation"""
+        obligations = []
+        for obligations_text in outputs:
+            for line in obligations_text.split('\n'):
+                line = line.strip()
+                if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+                    obligation = line[1:].strip()
+                    if obligation and obligation not in obligations:
+                        obligations.append(obligation)
+        return obligations
+    
+    def generate_summary(self, document_text: str) -> str:
+        """Summarize each chunk of the document, then combine the partial summaries"""
+        return self.batch_generate_summaries([document_text])[0]
+    
+    def batch_generate_summaries(self, document_texts: List[str]) -> List[str]:
+        """Summarize several documents, batching the chunk summaries of all of them together"""
+        try:
+            grouped = self.map_reduce.map_documents('summary', document_texts, self._summary_messages,
+                                                    **SUMMARY_GENERATION_KWARGS)
+            return [
+                self.map_reduce.reduce('combine_summaries', partial_summaries,
+                                       self._combine_summaries_messages, **SUMMARY_GENERATION_KWARGS).strip()
+                for partial_summaries in grouped
+            ]
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            return [mark_uncacheable("Error: Could not generate summary") for _ in document_texts]
+    
+    @staticmethod
+    def _match_document_type(classification: str) -> str:
+        """Map free-form model output onto one of the known document types"""
+        classification_lower = classification.lower()
+        for document_type in DOCUMENT_TYPES:
+            if document_type.lower() in classification_lower:
+                return document_type
+        return "Other"
+    
+    @staticmethod
+    def _classify_messages(document_text: str) -> List[Dict[str, str]]:
+        """Build the chat messages for classifying a document chunk"""
+        return [
             {
                 "role": "user",
                 "content": f"""Analyze the following legal document and classify it into one of these categories:
@@ -95,23 +305,16 @@ Rewritten Clause:"""
 - License Agreement
 - Other
 
-Document text: {document_text[:1000]}...
+Document text: {document_text}
 
 Classification:"""
             }
         ]
-        
-        try:
-            result = self.pipe(messages, max_new_tokens=50, temperature=0.1)
-            classification = result[0]['generated_text'][-1]['content']
-            return classification.strip()
-        except Exception as e:
-            logger.error(f"Error classifying document: {e}")
-            return "Other"
     
-    def extract_obligations(self, text: str) -> List[str]:
-        """Extract key obligations from legal text"""
-        messages = [
+    @staticmethod
+    def _obligations_messages(text: str) -> List[Dict[str, str]]:
+        """Build the chat messages for extracting obligations from a chunk"""
+        return [
             {
                 "role": "user",
                 "content": f"""Extract all key obligations, duties, and responsibilities from the following legal text. List them as bullet points:
@@ -121,40 +324,31 @@ Legal Text: {text}
 Key Obligations:"""
             }
         ]
-        
-        try:
-            result = self.pipe(messages, max_new_tokens=300, temperature=0.3)
-            obligations_text = result[0]['generated_text'][-1]['content']
-            
-            # Parse bullet points
-            obligations = []
-            for line in obligations_text.split('\n'):
-                line = line.strip()
-                if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                    obligations.append(line[1:].strip())
-            
-            return obligations
-        except Exception as e:
-            logger.error(f"Error extracting obligations: {e}")
-            return []
     
-    def generate_summary(self, document_text: str) -> str:
-        """Generate a summary of the legal document"""
-        messages = [
+    @staticmethod
+    def _summary_messages(document_text: str) -> List[Dict[str, str]]:
+        """Build the chat messages for summarizing a document chunk"""
+        return [
             {
                 "role": "user",
                 "content": f"""Provide a concise summary of this legal document, highlighting the key points, parties involved, and main terms:
 
-Document: {document_text[:1500]}...
+Document: {document_text}
+
+Summary:"""
+            }
+        ]
+    
+    @staticmethod
+    def _combine_summaries_messages(partial_summaries: str) -> List[Dict[str, str]]:
+        """Build the chat messages for merging summaries of consecutive document parts"""
+        return [
+            {
+                "role": "user",
+                "content": f"""The following are summaries of consecutive parts of one legal document. Combine them into a single concise summary, highlighting the key points, parties involved, and main terms:
+
+{partial_summaries}
 
 Summary:"""
             }
         ]
-        
-        try:
-            result = self.pipe(messages, max_new_tokens=250, temperature=0.3)
-            summary = result[0]['generated_text'][-1]['content']
-            return summary.strip()
-        except Exception as e:
-            logger.error(f"Error generating summary: {e}")
-            return "Error: Could not generate summary"
@@ -0,0 +1,100 @@
+"""
+Map-reduce over clause-aligned chunks for documents longer than the model context
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from core.result_cache import ResultCache, content_digest
+from models.batch_inference import BatchInferenceEngine
+from utils.clause_extractor import ClauseExtractor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Builds the chat messages for one chunk
+PromptBuilder = Callable[[str], List[Dict[str, str]]]
+
+
+class MapReduceRunner:
+    """Run a prompt over every chunk of a document in batches, caching each chunk's output by content hash"""
+
+    def __init__(self, engine: BatchInferenceEngine, model_name: str, chunk_chars: int = 3000,
+                 cache: Optional[ResultCache] = None, clause_extractor: Optional[ClauseExtractor] = None):
+        """chunk_chars bounds the document text placed in any single prompt"""
+        self.engine = engine
+        self.model_name = model_name
+        self.chunk_chars = chunk_chars
+        self.cache = cache if cache is not None else ResultCache()
+        self.clause_extractor = clause_extractor or ClauseExtractor()
+
+    def chunk(self, text: str) -> List[str]:
+        """Split text into clause-aligned chunks that together cover all of it"""
+        return self.clause_extractor.split_into_chunks(text, self.chunk_chars)
+
+    def map(self, task: str, chunks: List[str], build_messages: PromptBuilder,
+            **generation_kwargs) -> List[str]:
+        """Generate one output per chunk, reusing cached outputs for chunks seen before"""
+        keys = [
+            f"{self.model_name}:{task}:{content_digest(chunk.encode('utf-8'))}"
+            for chunk in chunks
+        ]
+        outputs: List[Any] = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        if missing:
+            generated = self.engine.generate_from(
+                build_messages, [chunks[i] for i in missing], **generation_kwargs
+            )
+            for i, output in zip(missing, generated):
+                outputs[i] = output
+                self.cache.put(keys[i], output)
+
+        logger.info(f"Map step '{task}': {len(chunks)} chunks, {len(chunks) - len(missing)} cached")
+        return outputs
+
+    def map_documents(self, task: str, texts: List[str], build_messages: PromptBuilder,
+                      **generation_kwargs) -> List[List[str]]:
+        """Chunk several documents, map all their chunks in one pass and group the outputs per document"""
+        chunked = [self.chunk(text) for text in texts]
+        outputs = self.map(task, [chunk for chunks in chunked for chunk in chunks], build_messages,
+                           **generation_kwargs)
+
+        grouped = []
+        position = 0
+        for chunks in chunked:
+            grouped.append(outputs[position:position + len(chunks)])
+            position += len(chunks)
+        return grouped
+
+    def reduce(self, task: str, outputs: List[str], build_messages: PromptBuilder,
+               **generation_kwargs) -> str:
+        """Combine partial outputs level by level until one remains"""
+        while len(outputs) > 1:
+            groups = self._group(outputs)
+            outputs = self.map(task, ["\n\n".join(group) for group in groups], build_messages,
+                               **generation_kwargs)
+        return outputs[0] if outputs else ""
+
+    def _group(self, outputs: List[str]) -> List[List[str]]:
+        """Pack partial outputs into groups that fit a chunk, at least two per group so every level shrinks"""
+        groups: List[List[str]] = []
+        size = 0
+        for output in outputs:
+            if groups and (len(groups[-1]) < 2 or size + len(output) <= self.chunk_chars):
+                groups[-1].append(output)
+                size += len(output)
+            else:
+                groups.append([output])
+                size = len(output)
+        return groups
+
+    @staticmethod
+    def vote(labels: List[str], default: str) -> str:
+        """Return the most common label, ignoring the default unless nothing else was found"""
+        counts = Counter(label for label in labels if label != default)
+        if not counts:
+            return default
+        # Counter keeps first-seen order, so ties go to the label found earliest in the document
+        return counts.most_common(1)[0][0]
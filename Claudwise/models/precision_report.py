@@ -0,0 +1,131 @@
+"""
+Load-time latency and output-drift report for reduced-precision model backends
+"""
+
+import argparse
+import json
+import os
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fixed clause set so reports from different precisions are comparable
+REFERENCE_CLAUSES = [
+    "The Receiving Party shall hold and maintain the Confidential Information in strict confidence "
+    "for the sole and exclusive benefit of the Disclosing Party.",
+    "Either party may terminate this Agreement upon thirty (30) days prior written notice to the other party.",
+    "The Company shall pay the Employee an annual base salary of $85,000, payable in accordance with "
+    "the Company's standard payroll practices.",
+    "In no event shall either party be liable for any indirect, incidental, special or consequential "
+    "damages arising out of or in connection with this Agreement.",
+    "This Agreement shall be governed by and construed in accordance with the laws of the State of "
+    "New York, without regard to its conflict of laws principles.",
+    "Neither party shall be liable for any failure or delay in performance caused by events beyond its "
+    "reasonable control, including acts of God, war, or natural disasters."
+]
+
+# Greedy decoding keeps outputs deterministic, so differences come from precision alone
+REPORT_GENERATION_KWARGS = {"max_new_tokens": 64, "do_sample": False}
+
+
+def _tensor_bytes(value: Any, seen: set) -> int:
+    """Bytes held by a tensor, or by the tensors in a tuple or list, counting shared storage once"""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item, seen) for item in value)
+    if not (hasattr(value, 'numel') and hasattr(value, 'element_size')):
+        return 0
+    if value.data_ptr() in seen:
+        return 0
+    seen.add(value.data_ptr())
+    return value.numel() * value.element_size()
+
+
+def _weights_mb(model) -> float:
+    """Size of a model's weights and buffers in MB as loaded, whatever the process peaked at while loading"""
+    # state_dict() rather than parameters(): dynamically quantized linear layers keep their
+    # int8 weights in packed params, which it returns as (weight, bias) tuples
+    seen: set = set()
+    return round(sum(_tensor_bytes(value, seen) for value in model.state_dict().values()) / (1024 * 1024), 1)
+
+
+def _load_references(path: str) -> Dict[str, List[str]]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading precision reference outputs {path}: {e}")
+        return {}
+
+
+def _save_references(path: str, references: Dict[str, List[str]]):
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(references, f, indent=2)
+    except OSError as e:
+        logger.error(f"Error writing precision reference outputs {path}: {e}")
+
+
+def run_precision_report(model, reference_path: Optional[str] = None) -> Dict[str, Any]:
+    """Time a GraniteModel on the reference clauses and compare outputs with stored float32 results"""
+    tokenizer = model.batch_engine.tokenizer
+    outputs = []
+    latencies = []
+    generated_tokens = 0
+
+    for clause in REFERENCE_CLAUSES:
+        start = time.perf_counter()
+        output = model.batch_engine.generate([model._simplify_messages(clause, "basic")],
+                                             **REPORT_GENERATION_KWARGS)[0]
+        latencies.append(time.perf_counter() - start)
+        outputs.append(output)
+        generated_tokens += len(tokenizer(output, add_special_tokens=False)['input_ids'])
+
+    total_seconds = sum(latencies)
+    report = {
+        'model': model.model_name,
+        'precision': model.precision,
+        'clauses': len(REFERENCE_CLAUSES),
+        'mean_latency_s': round(total_seconds / len(latencies), 3),
+        'max_latency_s': round(max(latencies), 3),
+        'ms_per_token': round(total_seconds * 1000 / generated_tokens, 1) if generated_tokens else None,
+        'weights_mb': _weights_mb(model.pipe.model),
+        'similarity_to_float32': None
+    }
+
+    if reference_path:
+        references = _load_references(reference_path)
+        if model.precision == "float32":
+            # Full-precision runs define the reference outputs other precisions are compared with
+            references[model.model_name] = outputs
+            _save_references(reference_path, references)
+            report['similarity_to_float32'] = 1.0
+        elif model.model_name in references:
+            similarities = [SequenceMatcher(None, reference, output).ratio()
+                            for reference, output in zip(references[model.model_name], outputs)]
+            report['similarity_to_float32'] = round(sum(similarities) / len(similarities), 3)
+        else:
+            logger.info("No float32 reference outputs stored yet; run the report once with float32 to record them")
+
+    logger.info(f"Precision report: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    from config import GRANITE_MODEL, GRANITE_PRECISION_REFERENCE
+    from models.granite_model import GraniteModel, GRANITE_PRECISIONS
+
+    parser = argparse.ArgumentParser(description="Report Granite latency and output drift for a weight precision")
+    parser.add_argument("--precision", choices=GRANITE_PRECISIONS, default="float32")
+    args = parser.parse_args()
+
+    granite = GraniteModel(GRANITE_MODEL, precision=args.precision)
+    print(json.dumps(run_precision_report(granite, GRANITE_PRECISION_REFERENCE), indent=2))
@@ -0,0 +1,82 @@
+"""
+Reuse of encoded static prompt prefixes (past key values) across generate calls
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+from transformers import DynamicCache
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stands in for the variable part of a prompt while the chat template is rendered
+PROMPT_SLOT = "\u0000PROMPT_SLOT\u0000"
+
+
+class PrefixCache:
+    """Encode the static part of a prompt once and start each generation from a copy of its KV cache"""
+
+    def __init__(self, model, tokenizer, max_entries: int = 8):
+        """max_entries bounds how many distinct prefixes keep their past key values in memory"""
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation_inputs(self, build_messages: Callable[[str], List[Dict[str, str]]],
+                          value: str) -> Optional[Dict[str, Any]]:
+        """Return generate() inputs for build_messages(value) that resume from the cached prefix"""
+        template = self.tokenizer.apply_chat_template(build_messages(PROMPT_SLOT), tokenize=False,
+                                                      add_generation_prompt=True)
+        prefix, slot, suffix = template.partition(PROMPT_SLOT)
+        if not slot or not prefix:
+            return None
+
+        prefix_ids, prefix_cache = self._encode_prefix(prefix)
+        rest_ids = self.tokenizer(value + suffix, return_tensors="pt",
+                                  add_special_tokens=False)['input_ids'].to(self.model.device)
+        input_ids = torch.cat([prefix_ids, rest_ids], dim=-1)
+
+        return {
+            'input_ids': input_ids,
+            'attention_mask': torch.ones_like(input_ids),
+            # generate() extends the cache in place, so every call gets its own copy
+            'past_key_values': copy.deepcopy(prefix_cache)
+        }
+
+    def _encode_prefix(self, prefix: str) -> tuple:
+        """Return the token ids and past key values for a prefix, running prefill only on a miss"""
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is not None:
+                self._entries.move_to_end(prefix)
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            prefix_ids = self.tokenizer(prefix, return_tensors="pt",
+                                        add_special_tokens=False)['input_ids'].to(self.model.device)
+            with torch.no_grad():
+                prefix_cache = self.model(input_ids=prefix_ids, past_key_values=DynamicCache(),
+                                          use_cache=True).past_key_values
+
+            entry = (prefix_ids, prefix_cache)
+            self._entries[prefix] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            logger.info(f"Cached prompt prefix of {prefix_ids.shape[1]} tokens")
+            return entry
+
+    def stats(self) -> Dict[str, int]:
+        """Get prefix hit/miss counters"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
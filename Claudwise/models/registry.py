@@ -0,0 +1,101 @@
+"""
+Common model backend interface and the registry of backends the analyzer can load
+"""
+
+import importlib
+from typing import Any, Dict, List
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Uncacheable:
+    """Marks model output that may be returned but must never be cached"""
+
+
+class UncacheableText(_Uncacheable, str):
+    """A string result that is a placeholder, an error or a stand-in from a faster tier"""
+
+
+class UncacheableList(_Uncacheable, list):
+    """A list result that is a placeholder, an error or a stand-in from a faster tier"""
+
+
+def mark_uncacheable(value: Any) -> Any:
+    """Wrap a text or list result so caches skip it; other values are returned unchanged"""
+    if isinstance(value, _Uncacheable):
+        return value
+    if isinstance(value, str):
+        return UncacheableText(value)
+    if isinstance(value, list):
+        return UncacheableList(value)
+    return value
+
+
+def is_cacheable(value: Any) -> bool:
+    """True unless a backend marked the result with mark_uncacheable"""
+    return not isinstance(value, _Uncacheable)
+
+
+class ModelBackend:
+    """Interface shared by every model backend; batch variants default to one call per item"""
+
+    def simplify_clause(self, clause: str) -> str:
+        """Rewrite a legal clause in plain language"""
+        raise NotImplementedError
+
+    def classify_document(self, document_text: str) -> str:
+        """Return the document type"""
+        raise NotImplementedError
+
+    def generate_summary(self, document_text: str) -> str:
+        """Summarize a document"""
+        raise NotImplementedError
+
+    def extract_obligations(self, text: str) -> List[str]:
+        """List the obligations stated in a text"""
+        raise NotImplementedError
+
+    def batch_simplify_clauses(self, clauses: List[str]) -> List[str]:
+        """Simplify several clauses, in input order"""
+        return [self.simplify_clause(clause) for clause in clauses]
+
+    def batch_classify_documents(self, document_texts: List[str]) -> List[str]:
+        """Classify several documents, in input order"""
+        return [self.classify_document(document_text) for document_text in document_texts]
+
+    def batch_generate_summaries(self, document_texts: List[str]) -> List[str]:
+        """Summarize several documents, in input order"""
+        return [self.generate_summary(document_text) for document_text in document_texts]
+
+    def batch_extract_obligations(self, texts: List[str]) -> List[List[str]]:
+        """Extract obligations from several texts, in input order"""
+        return [self.extract_obligations(text) for text in texts]
+
+
+# Backends by name, as "module:Class" so a backend's module (and torch/transformers
+# for the model-based ones) is only imported when that backend is loaded
+MODEL_BACKENDS: Dict[str, str] = {
+    "simple": "models.simple_model:SimpleModel",
+    "granite": "models.granite_model:GraniteModel",
+    "fallback": "models.fallback_model:FallbackModel",
+    "tiered": "models.tiered_router:TieredRouter"
+}
+
+
+def register_backend(name: str, target: str):
+    """Register a backend class given as "module:Class"; its module is imported on first load"""
+    if ':' not in target:
+        raise ValueError(f"Backend target must look like 'module:Class', got {target}")
+    MODEL_BACKENDS[name] = target
+
+
+def load_backend(name: str) -> ModelBackend:
+    """Import and build a registered backend"""
+    if name not in MODEL_BACKENDS:
+        raise ValueError(f"Unsupported model backend: {name}")
+
+    module_name, class_name = MODEL_BACKENDS[name].split(':')
+    logger.info(f"Loading model backend: {name}")
+    return getattr(importlib.import_module(module_name), class_name)()
@@ -6,10 +6,46 @@ import re
 from typing import List, Dict, Any
 import logging
 
+from utils.keyword_matcher import KeywordTaxonomy
+from utils.prepared_document import prepare
+from models.registry import ModelBackend, mark_uncacheable
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class SimpleModel:
+# Document types in priority order; the first type with a keyword in the text wins
+DOCUMENT_TYPES = KeywordTaxonomy({
+    'Non-Disclosure Agreement (NDA)': ['non-disclosure', 'confidential', 'proprietary', 'nda', 'confidentiality'],
+    'Employment Contract': ['employment', 'employee', 'job', 'salary', 'work', 'employer'],
+    'Service Agreement': ['service', 'services', 'provide', 'deliver', 'perform'],
+    'Lease Agreement': ['lease', 'rent', 'rental', 'tenant', 'landlord', 'premises'],
+    'Purchase Agreement': ['purchase', 'buy', 'sale', 'sell', 'buyer', 'seller'],
+    'Partnership Agreement': ['partnership', 'partner', 'joint venture'],
+    'License Agreement': ['license', 'licensing', 'permit', 'intellectual property']
+})
+
+MAIN_TOPICS = KeywordTaxonomy({
+    'confidentiality and privacy': ['confidential', 'private', 'secret', 'disclosure'],
+    'employment terms': ['employment', 'employee', 'work', 'job', 'salary'],
+    'payment and compensation': ['payment', 'pay', 'compensation', 'salary', 'fee'],
+    'intellectual property': ['intellectual property', 'copyright', 'trademark', 'patent'],
+    'termination conditions': ['terminate', 'termination', 'end', 'expire'],
+    'liability and indemnification': ['liable', 'liability', 'indemnify', 'damages'],
+    'service delivery': ['service', 'services', 'deliver', 'provide'],
+    'property and assets': ['property', 'asset', 'real estate', 'premises'],
+    'partnership terms': ['partnership', 'partner', 'joint venture'],
+    'licensing rights': ['license', 'licensing', 'permit', 'authorization']
+})
+
+# Each key term is its own category so hits come back in display order
+KEY_TERMS = KeywordTaxonomy({term: [term] for term in [
+    'confidentiality', 'non-disclosure', 'intellectual property', 'copyright',
+    'trademark', 'patent', 'liability', 'indemnification', 'termination',
+    'breach', 'covenant', 'warranty', 'jurisdiction', 'governing law',
+    'force majeure', 'arbitration', 'mediation', 'severability'
+]})
+
+class SimpleModel(ModelBackend):
     """Rule-based model that requires no downloads"""
     
     def __init__(self):
@@ -82,36 +118,18 @@ class SimpleModel:
                 
         except Exception as e:
             logger.error(f"Error in simplification: {e}")
-            return "**Summary:** This clause establishes important legal obligations and rights between the parties involved."
+            return mark_uncacheable("**Summary:** This clause establishes important legal obligations and rights between the parties involved.")
     
     def classify_document(self, document_text: str) -> str:
         """Classify document type using keyword matching"""
-        text_lower = document_text.lower()
-        
-        # Classification rules
-        if any(word in text_lower for word in ['non-disclosure', 'confidential', 'proprietary', 'nda', 'confidentiality']):
-            return "Non-Disclosure Agreement (NDA)"
-        elif any(word in text_lower for word in ['employment', 'employee', 'job', 'salary', 'work', 'employer']):
-            return "Employment Contract"
-        elif any(word in text_lower for word in ['service', 'services', 'provide', 'deliver', 'perform']):
-            return "Service Agreement"
-        elif any(word in text_lower for word in ['lease', 'rent', 'rental', 'tenant', 'landlord', 'premises']):
-            return "Lease Agreement"
-        elif any(word in text_lower for word in ['purchase', 'buy', 'sale', 'sell', 'buyer', 'seller']):
-            return "Purchase Agreement"
-        elif any(word in text_lower for word in ['partnership', 'partner', 'joint venture']):
-            return "Partnership Agreement"
-        elif any(word in text_lower for word in ['license', 'licensing', 'permit', 'intellectual property']):
-            return "License Agreement"
-        else:
-            return "Legal Document"
+        return DOCUMENT_TYPES.first_match(document_text, default="Legal Document")
     
     def extract_obligations(self, text: str) -> List[str]:
         """Extract obligations using pattern matching"""
         obligations = []
         
         # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+        sentences = prepare(text).sentences
         
         # Obligation keywords
         obligation_patterns = [
@@ -140,8 +158,10 @@ class SimpleModel:
         if not document_text or len(document_text.strip()) < 20:
             return "The document appears to be too short or empty to generate a meaningful summary."
         
+        # Every helper below shares the document's lowercase view, sentences and words
+        document_text = prepare(document_text)
         doc_type = self.classify_document(document_text)
-        word_count = len(document_text.split())
+        word_count = document_text.word_count
         
         # Extract actual content from the document
         parties = self._extract_parties(document_text)
@@ -211,7 +231,7 @@ class SimpleModel:
     def _extract_key_sentences(self, text: str) -> List[str]:
         """Extract the most important sentences from the document"""
         # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+        sentences = prepare(text).sentences
         
         # Filter and rank sentences
         important_sentences = []
@@ -226,8 +246,9 @@ class SimpleModel:
             sentence = sentence.strip()
             if len(sentence) > 20 and len(sentence) < 300:
                 # Count importance keywords
+                sentence_lower = sentence.lower()
                 keyword_count = sum(1 for keyword in importance_keywords 
-                                  if keyword.lower() in sentence.lower())
+                                  if keyword in sentence_lower)
                 
                 if keyword_count > 0:
                     important_sentences.append((sentence, keyword_count))
@@ -238,27 +259,7 @@ class SimpleModel:
     
     def _identify_main_topics(self, text: str) -> List[str]:
         """Identify main topics discussed in the document"""
-        text_lower = text.lower()
-        topics = []
-        
-        topic_keywords = {
-            'confidentiality and privacy': ['confidential', 'private', 'secret', 'disclosure'],
-            'employment terms': ['employment', 'employee', 'work', 'job', 'salary'],
-            'payment and compensation': ['payment', 'pay', 'compensation', 'salary', 'fee'],
-            'intellectual property': ['intellectual property', 'copyright', 'trademark', 'patent'],
-            'termination conditions': ['terminate', 'termination', 'end', 'expire'],
-            'liability and indemnification': ['liable', 'liability', 'indemnify', 'damages'],
-            'service delivery': ['service', 'services', 'deliver', 'provide'],
-            'property and assets': ['property', 'asset', 'real estate', 'premises'],
-            'partnership terms': ['partnership', 'partner', 'joint venture'],
-            'licensing rights': ['license', 'licensing', 'permit', 'authorization']
-        }
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                topics.append(topic)
-        
-        return topics[:3]  # Return top 3 topics
+        return MAIN_TOPICS.matching(text)[:3]  # Return top 3 topics
     
     def _generate_content_insights(self, text: str, doc_type: str) -> str:
         """Generate specific insights based on document content"""
@@ -288,7 +289,7 @@ class SimpleModel:
         
         else:
             # Fallback based on document length and complexity
-            if len(text.split()) < 100:
+            if prepare(text).word_count < 100:
                 return "This is a brief document outlining basic terms and conditions."
             else:
                 return "This comprehensive document establishes detailed legal relationships and obligations."
@@ -358,20 +359,8 @@ class SimpleModel:
     
     def _extract_key_terms(self, text: str) -> List[str]:
         """Extract key legal terms present in the document"""
-        legal_terms = [
-            'confidentiality', 'non-disclosure', 'intellectual property', 'copyright',
-            'trademark', 'patent', 'liability', 'indemnification', 'termination',
-            'breach', 'covenant', 'warranty', 'jurisdiction', 'governing law',
-            'force majeure', 'arbitration', 'mediation', 'severability'
-        ]
-        
-        found_terms = []
-        text_lower = text.lower()
-        
-        for term in legal_terms:
-            if term in text_lower:
-                # Convert to title case for display
-                found_terms.append(term.replace('-', ' ').title())
+        # Convert to title case for display
+        found_terms = [term.replace('-', ' ').title() for term in KEY_TERMS.matching(text)]
         
         return found_terms[:5]  # Max 5 terms
     
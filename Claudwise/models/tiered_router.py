@@ -0,0 +1,207 @@
+"""
+Latency-aware routing between a fast rule-based backend and a slower, higher-quality model backend
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import logging
+
+from config import (
+    ROUTER_FAST_BACKEND, ROUTER_QUALITY_BACKEND, ROUTER_SHORT_TEXT_CHARS,
+    ROUTER_MAX_QUALITY_IN_FLIGHT, ROUTER_LATENCY_BUDGET_S, ROUTER_PROBE_INTERVAL_S
+)
+from core.lazy_component import LazyComponent
+from models.registry import ModelBackend, load_backend, mark_uncacheable
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REQUEST_PRIORITIES = ("low", "normal", "high")
+
+_request_priority = contextvars.ContextVar("request_priority", default="normal")
+
+
+@contextmanager
+def request_priority(priority: str):
+    """Route model calls made inside the block with the given priority"""
+    if priority not in REQUEST_PRIORITIES:
+        raise ValueError(f"Unsupported request priority: {priority}")
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def iterate_at_priority(items: Iterable[Any], priority: str) -> Iterator[Any]:
+    """Advance an iterator with its model calls routed at the given priority, whichever thread advances it"""
+    if priority not in REQUEST_PRIORITIES:
+        raise ValueError(f"Unsupported request priority: {priority}")
+    # A streamed response is advanced from pool threads that do not share the caller's context
+    context = contextvars.copy_context()
+    context.run(_request_priority.set, priority)
+    iterator = iter(items)
+    try:
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            context.run(close)
+
+
+class TieredRouter(ModelBackend):
+    """Serve each call from the fast backend unless the quality backend is needed and has capacity"""
+
+    def __init__(self, fast_backend: str = ROUTER_FAST_BACKEND, quality_backend: str = ROUTER_QUALITY_BACKEND,
+                 short_text_chars: int = ROUTER_SHORT_TEXT_CHARS, max_quality_in_flight: int = ROUTER_MAX_QUALITY_IN_FLIGHT,
+                 latency_budget: float = ROUTER_LATENCY_BUDGET_S, probe_interval: float = ROUTER_PROBE_INTERVAL_S):
+        """Load the fast backend now and the quality backend in the background"""
+        self.model_name = f"tiered:{fast_backend}+{quality_backend}"
+        self.short_text_chars = short_text_chars
+        self.max_quality_in_flight = max_quality_in_flight
+        self.latency_budget = latency_budget
+        self.probe_interval = probe_interval
+
+        self.fast = load_backend(fast_backend)
+        self.quality = LazyComponent(quality_backend, lambda: load_backend(quality_backend))
+
+        self._lock = threading.Lock()
+        self._quality_in_flight = 0
+        # Exponentially weighted seconds per item, per tier
+        self._latency = {'fast': None, 'quality': None}
+        self._calls = {'fast': 0, 'quality': 0}
+        self._items = {'fast': 0, 'quality': 0}
+        self._last_quality_call = 0.0
+
+        # Until the quality backend is ready, everything is served by the fast one
+        threading.Thread(target=self._load_quality, name="clausewise-quality-backend", daemon=True).start()
+
+    def _load_quality(self):
+        try:
+            self.quality.get()
+        except Exception:
+            logger.warning("Quality backend failed to load; serving every request from the fast backend")
+
+    def _wants_quality(self, text: str) -> bool:
+        """Decide whether a text should go to the quality backend"""
+        if self.quality.state != "ready":
+            return False
+
+        priority = _request_priority.get()
+        if priority == "low":
+            return False
+        if priority == "high":
+            return True
+
+        if len(text) < self.short_text_chars:
+            return False
+        with self._lock:
+            if self._quality_in_flight >= self.max_quality_in_flight:
+                return False
+            latency = self._latency['quality']
+            idle = time.monotonic() - self._last_quality_call
+        # A backend that was slow gets another try once it has been idle for a while,
+        # otherwise its latency estimate would never recover
+        return latency is None or latency <= self.latency_budget or idle >= self.probe_interval
+
+    def _run(self, tier: str, method: str, items: List[str]) -> List[Any]:
+        """Call a batch method on one tier, tracking in-flight calls and latency per item
+
+        Fast-tier results are marked uncacheable: cached simplifications are keyed by the quality
+        backend's settings, so storing them would let a rule-based answer stand in for every later quality request.
+        """
+        backend = self.quality.get() if tier == 'quality' else self.fast
+        if tier == 'quality':
+            with self._lock:
+                self._quality_in_flight += 1
+
+        started = time.perf_counter()
+        try:
+            results = getattr(backend, method)(items)
+            return results if tier == 'quality' else [mark_uncacheable(result) for result in results]
+        finally:
+            per_item = (time.perf_counter() - started) / len(items)
+            with self._lock:
+                if tier == 'quality':
+                    self._quality_in_flight -= 1
+                    self._last_quality_call = time.monotonic()
+                previous = self._latency[tier]
+                self._latency[tier] = per_item if previous is None else 0.8 * previous + 0.2 * per_item
+                self._calls[tier] += 1
+                self._items[tier] += len(items)
+
+    def _route(self, method: str, items: List[str]) -> List[Any]:
+        """Split items between the tiers, run one batch call per tier and restore input order"""
+        tiers = ['quality' if self._wants_quality(item) else 'fast' for item in items]
+        results: List[Any] = [None] * len(items)
+        for tier in ('quality', 'fast'):
+            positions = [i for i, chosen in enumerate(tiers) if chosen == tier]
+            if positions:
+                for i, result in zip(positions, self._run(tier, method, [items[i] for i in positions])):
+                    results[i] = result
+        return results
+
+    def simplify_clause(self, clause: str) -> str:
+        return self._route('batch_simplify_clauses', [clause])[0]
+
+    def classify_document(self, document_text: str) -> str:
+        return self._route('batch_classify_documents', [document_text])[0]
+
+    def generate_summary(self, document_text: str) -> str:
+        return self._route('batch_generate_summaries', [document_text])[0]
+
+    def extract_obligations(self, text: str) -> List[str]:
+        return self._route('batch_extract_obligations', [text])[0]
+
+    def batch_simplify_clauses(self, clauses: List[str]) -> List[str]:
+        return self._route('batch_simplify_clauses', clauses)
+
+    def batch_classify_documents(self, document_texts: List[str]) -> List[str]:
+        return self._route('batch_classify_documents', document_texts)
+
+    def batch_generate_summaries(self, document_texts: List[str]) -> List[str]:
+        return self._route('batch_generate_summaries', document_texts)
+
+    def batch_extract_obligations(self, texts: List[str]) -> List[List[str]]:
+        return self._route('batch_extract_obligations', texts)
+
+    def cached_backend(self) -> Optional[ModelBackend]:
+        """The backend whose results may be cached, once it has loaded; fast-tier results never are"""
+        return self.quality.get() if self.quality.state == "ready" else None
+
+    def stream_simplify_clause(self, clause: str, stop_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """Stream from the quality backend when it is chosen and can stream, else return the whole result"""
+        if self._wants_quality(clause):
+            backend = self.quality.get()
+            if hasattr(backend, 'stream_simplify_clause'):
+                with self._lock:
+                    self._quality_in_flight += 1
+                try:
+                    yield from backend.stream_simplify_clause(clause, stop_event=stop_event)
+                finally:
+                    with self._lock:
+                        self._quality_in_flight -= 1
+                return
+        yield self.simplify_clause(clause)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-tier call counts, latency and quality backend state"""
+        with self._lock:
+            return {
+                'quality_backend': self.quality.status(),
+                'quality_in_flight': self._quality_in_flight,
+                'calls': dict(self._calls),
+                'items': dict(self._items),
+                'seconds_per_item': {
+                    tier: round(latency, 4) if latency is not None else None
+                    for tier, latency in self._latency.items()
+                }
+            }
@@ -3,14 +3,33 @@ FastAPI server for ClauseWise Web Frontend
 Bridges React frontend with Python backend
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import Depends, FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
 import os
 import sys
-
-from core.clausewise_analyzer import ClauseWiseAnalyzer
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from auth.api_auth import require_api_session
+from auth.authenticator import SecureAuthenticator
+from auth.session_store import get_session_store
+from core.clausewise_analyzer import ClauseWiseAnalyzer, resolve_analysis_fields
+from core.analysis_executor import AnalysisExecutor, ExecutorSaturatedError, ExecutorUnavailableError
+from core.jobs import JobStore, JobManager
+from core.batch_scheduler import MicroBatchScheduler, BatchTimeoutError
+from models.tiered_router import REQUEST_PRIORITIES, iterate_at_priority
+from config import (
+    ANALYSIS_EXECUTOR, ANALYSIS_WORKERS, ANALYSIS_MAX_QUEUE, JOB_DB, JOB_WORKERS, JOB_HEARTBEAT_INTERVAL, JOB_STALE_AFTER,
+    SIMPLIFY_BATCH_MAX_SIZE, SIMPLIFY_BATCH_MAX_WAIT_MS, SIMPLIFY_BATCH_MAX_QUEUE,
+    SIMPLIFY_BATCH_CONCURRENCY, SIMPLIFY_TIMEOUT, ANALYZER_WARM_UP
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,6 +51,106 @@ except Exception as e:
     logger.error(f"Failed to initialize analyzer: {e}")
     analyzer = None
 
+executor = AnalysisExecutor(
+    analyzer,
+    kind=ANALYSIS_EXECUTOR,
+    max_workers=ANALYSIS_WORKERS,
+    max_queue=ANALYSIS_MAX_QUEUE
+) if analyzer is not None else None
+
+job_manager = JobManager(
+    analyzer,
+    JobStore(JOB_DB),
+    num_workers=JOB_WORKERS,
+    heartbeat_interval=JOB_HEARTBEAT_INTERVAL,
+    stale_after=JOB_STALE_AFTER
+) if analyzer is not None else None
+
+
+async def simplify_batch(requests: List[Tuple[str, str]]) -> List[str]:
+    """Simplify a micro-batch of (clause, priority) requests in one analyzer call per priority"""
+    by_priority: Dict[str, List[int]] = {}
+    for index, (_, priority) in enumerate(requests):
+        by_priority.setdefault(priority, []).append(index)
+    results: List[Optional[str]] = [None] * len(requests)
+
+    async def simplify_group(priority: str, indices: List[int]):
+        clauses = [requests[index][0] for index in indices]
+        for index, simplified in zip(indices, await executor.run("simplify_clauses", clauses, priority=priority)):
+            results[index] = simplified
+
+    await asyncio.gather(*(simplify_group(priority, indices) for priority, indices in by_priority.items()))
+    return results
+
+
+simplify_scheduler = MicroBatchScheduler(
+    simplify_batch,
+    max_batch_size=SIMPLIFY_BATCH_MAX_SIZE,
+    max_wait_ms=SIMPLIFY_BATCH_MAX_WAIT_MS,
+    max_queue=SIMPLIFY_BATCH_MAX_QUEUE,
+    max_concurrent_batches=SIMPLIFY_BATCH_CONCURRENCY,
+    timeout=SIMPLIFY_TIMEOUT
+) if analyzer is not None else None
+
+
+@app.on_event("startup")
+def start_analyzer_warm_up():
+    # Models load in the background; requests that arrive first load what they need themselves
+    if analyzer is not None and ANALYZER_WARM_UP:
+        analyzer.start_warm_up()
+
+
+@app.on_event("startup")
+def start_job_manager():
+    if job_manager is not None:
+        job_manager.start()
+
+
+@app.on_event("startup")
+async def start_simplify_scheduler():
+    if simplify_scheduler is not None:
+        simplify_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_simplify_scheduler():
+    if simplify_scheduler is not None:
+        await simplify_scheduler.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    if job_manager is not None:
+        job_manager.stop()
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+async def run_analyzer(method: str, *args, **kwargs):
+    """Run a blocking analyzer method off the event loop, mapping a full queue to 429"""
+    try:
+        return await executor.run(method, *args, **kwargs)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except ExecutorUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def routing_priority(
+    priority: str = Query("normal", description="Model routing priority: low, normal or high")
+) -> str:
+    """Validate the model routing priority a request asked for"""
+    if priority not in REQUEST_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported priority: {priority}")
+    return priority
+
+
+def parse_field_list(value: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated query parameter into field names"""
+    if value is None:
+        return None
+    return [field.strip() for field in value.split(",") if field.strip()]
+
 
 class SimplifyRequest(BaseModel):
     clause: str
@@ -41,6 +160,11 @@ class ExtractEntitiesRequest(BaseModel):
     text: str
 
 
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+
 @app.get("/health")
 async def health_check():
     return {
@@ -50,27 +174,79 @@ async def health_check():
     }
 
 
-@app.post("/analyze")
-async def analyze_document(file: UploadFile = File(...)):
+@app.get("/ready")
+async def readiness_check():
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+
+    readiness = analyzer.readiness()
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+@app.post("/auth/login")
+def login(request: LoginRequest):
+    # A plain def runs in the thread pool, so the password check never blocks the event loop
+    authenticator = SecureAuthenticator()
+    success, message = authenticator.authenticate(request.username, request.password)
+    if not success:
+        raise HTTPException(status_code=401, detail=message)
+
+    session = authenticator.start_session(request.username)
+    return {
+        "access_token": session["token"],
+        "token_type": "bearer",
+        "expires_at": session["expires_at"]
+    }
+
+
+@app.post("/auth/logout")
+async def logout(session: Optional[Dict[str, Any]] = Depends(require_api_session)):
+    if session is None:
+        raise HTTPException(status_code=401, detail="Missing or expired session token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+    SecureAuthenticator().end_session(session["token"])
+    return {"status": "logged_out"}
+
+
+@app.post("/analyze", dependencies=[Depends(require_api_session)])
+async def analyze_document(
+    file: UploadFile = File(...),
+    include: Optional[str] = Query(None, description="Comma-separated result fields to compute"),
+    exclude: Optional[str] = Query(None, description="Comma-separated result fields to skip"),
+    priority: str = Depends(routing_priority)
+):
     if analyzer is None:
         raise HTTPException(status_code=503, detail="Analyzer not initialized")
 
+    include_fields = parse_field_list(include)
+    exclude_fields = parse_field_list(exclude)
+    try:
+        resolve_analysis_fields(include_fields, exclude_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         contents = await file.read()
 
         if len(contents) > 10 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File too large (max 10MB)")
 
-        results = analyzer.analyze_document(contents, file.filename)
+        results = await run_analyzer("analyze_document", contents, file.filename,
+                                     include=include_fields, exclude=exclude_fields, priority=priority)
         return results
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/simplify")
-async def simplify_clause(request: SimplifyRequest):
+@app.post("/simplify", dependencies=[Depends(require_api_session)])
+async def simplify_clause(request: SimplifyRequest, priority: str = Depends(routing_priority)):
     if analyzer is None:
         raise HTTPException(status_code=503, detail="Analyzer not initialized")
 
@@ -78,16 +254,85 @@ async def simplify_clause(request: SimplifyRequest):
         raise HTTPException(status_code=400, detail="Empty clause provided")
 
     try:
-        simplified = analyzer.simplify_clause(request.clause)
+        # Concurrent requests are combined into batched model calls
+        simplified = await simplify_scheduler.submit((request.clause, priority))
         return {"simplified": simplified}
 
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except ExecutorUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except BatchTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Simplification error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/extract-entities")
-async def extract_entities(request: ExtractEntitiesRequest):
+@app.post("/simplify/stream", dependencies=[Depends(require_api_session)])
+async def simplify_clause_stream(request: SimplifyRequest, http_request: Request,
+                                 priority: str = Depends(routing_priority)):
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+
+    if not request.clause.strip():
+        raise HTTPException(status_code=400, detail="Empty clause provided")
+
+    # Generation runs outside the pool, so it takes an executor slot like any other model call
+    try:
+        executor.reserve_stream()
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except ExecutorUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    stop = threading.Event()
+    release_lock = threading.Lock()
+    released = False
+
+    def release():
+        # Stops generation at its next token and gives the slot back, once
+        nonlocal released
+        with release_lock:
+            if released:
+                return
+            released = True
+        stop.set()
+        executor.release_stream()
+
+    async def events() -> AsyncIterator[str]:
+        # One JSON object per line: text pieces as they are generated, then the full result
+        pieces = []
+        try:
+            # The blocking generator is advanced in the thread pool, one piece at a time
+            pieces_at_priority = iterate_at_priority(
+                analyzer.stream_simplify_clause(request.clause, stop_event=stop), priority
+            )
+            async for piece in iterate_in_threadpool(pieces_at_priority):
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected; stopping streamed simplification")
+                    return
+                pieces.append(piece)
+                yield json.dumps({"token": piece}) + "\n"
+            yield json.dumps({"done": True, "simplified": "".join(pieces).strip()}) + "\n"
+        except Exception as e:
+            logger.error(f"Streaming simplification error: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            # Runs on completion, disconnect or cancellation
+            release()
+
+    stream = events()
+    # A generator that never started (the client left before the first chunk) never reaches
+    # its finally block, so the slot is also released when the generator is collected
+    weakref.finalize(stream, release)
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+
+@app.post("/extract-entities", dependencies=[Depends(require_api_session)])
+async def extract_entities(request: ExtractEntitiesRequest, priority: str = Depends(routing_priority)):
     if analyzer is None:
         raise HTTPException(status_code=503, detail="Analyzer not initialized")
 
@@ -95,27 +340,85 @@ async def extract_entities(request: ExtractEntitiesRequest):
         raise HTTPException(status_code=400, detail="Empty text provided")
 
     try:
-        entities = analyzer.extract_entities_from_text(request.text)
+        entities = await run_analyzer("extract_entities_from_text", request.text, priority=priority)
         return {"entities": entities}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Entity extraction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/status")
+@app.post("/jobs", status_code=202, dependencies=[Depends(require_api_session)])
+async def create_job(
+    file: UploadFile = File(...),
+    priority: str = Depends(routing_priority)
+):
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+
+    contents = await file.read()
+
+    if len(contents) > 10 * 1024 * 1024:
+        raise HTTPException(status_code=400, detail="File too large (max 10MB)")
+
+    job_id = await run_in_threadpool(job_manager.submit, file.filename, contents, priority)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}", dependencies=[Depends(require_api_session)])
+async def get_job(job_id: str):
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+
+    # SQLite calls are blocking, so they run in the thread pool rather than on the event loop
+    job = await run_in_threadpool(job_manager.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+@app.delete("/jobs/{job_id}", dependencies=[Depends(require_api_session)])
+async def cancel_job(job_id: str):
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+
+    if await run_in_threadpool(job_manager.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if not await run_in_threadpool(job_manager.cancel, job_id):
+        raise HTTPException(status_code=409, detail="Job has already finished")
+
+    return {"job_id": job_id, "status": "cancelled"}
+
+
+@app.get("/status", dependencies=[Depends(require_api_session)])
 async def status():
     if analyzer is None:
         return {"status": "error", "message": "Analyzer not initialized"}
 
+    # The scheduler's state belongs to the event loop; everything else is read in the thread pool
+    return await run_in_threadpool(status_report, simplify_scheduler.stats())
+
+
+def status_report(simplify_batching: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the /status body; the job, cache and session stores are read with blocking SQLite calls"""
+    # Reporting status must not load anything, so unloaded components are only described
+    readiness = analyzer.readiness()
     return {
         "status": "ok",
         "model": analyzer.model_type,
-        "components": {
-            "analyzer": True,
-            "clause_extractor": analyzer.clause_extractor is not None,
-            "document_processor": analyzer.document_processor is not None,
-        }
+        "components": readiness["components"],
+        "executor": executor.stats(),
+        "jobs": job_manager.store.counts(),
+        "simplify_batching": simplify_batching,
+        "simplification_cache": analyzer.simplification_cache.stats()
+        if readiness["components"]["simplification_cache"]["state"] == "ready" else None,
+        "model_routing": analyzer.ai_model.stats()
+        if readiness["components"]["ai_model"]["state"] == "ready" and hasattr(analyzer.ai_model, "stats") else None,
+        "sessions": get_session_store().stats()
     }
 
 
@@ -0,0 +1,37 @@
+"""
+Audit log queries span rotated files, which several processes may have written out of order
+"""
+
+import os
+
+from auth.audit_log import AuditLog
+
+
+def test_query_merges_segments_by_time(tmp_path):
+    db_path = str(tmp_path / "audit.db")
+    log = AuditLog(db_path, backups=3, flush_interval=0.05)
+    # A rotated segment holding events newer than some in the current file
+    log._write([(300.0, "alice", "login", 1, None), (100.0, "alice", "login", 1, None)])
+    log._conn.close()
+    log._conn = None
+    os.replace(db_path, db_path + ".1")
+    log._write([(200.0, "bob", "login", 1, None), (50.0, "bob", "login", 1, None)])
+
+    assert [event['ts'] for event in log.query(limit=3)] == [300.0, 200.0, 100.0]
+    assert [event['ts'] for event in log.query(username="bob")] == [200.0, 50.0]
+    log.close()
+
+
+def test_writer_reopens_after_another_process_rotates(tmp_path):
+    db_path = str(tmp_path / "audit.db")
+    writer = AuditLog(db_path, backups=3, flush_interval=0.05)
+    rotator = AuditLog(db_path, max_bytes=1, backups=3, flush_interval=0.05)
+    writer._write([(1.0, "alice", "login", 1, None)])
+    rotator._write([(2.0, "bob", "login", 1, None)])
+    # The rotator moved the shared file to .1; the writer must not keep appending to it
+    writer._write([(3.0, "carol", "login", 1, None)])
+
+    assert [event['ts'] for event in writer.query()] == [3.0, 2.0, 1.0]
+    assert writer.stats()['files'] == 2
+    writer.close()
+    rotator.close()
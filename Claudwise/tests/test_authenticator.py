@@ -0,0 +1,49 @@
+"""
+Changing a password checks the old one without counting as a login
+"""
+
+import auth.authenticator as authenticator_module
+from auth.authenticator import SecureAuthenticator
+from auth.session_store import MemorySessionStore
+from auth.user_store import SQLiteUserStore
+
+
+class RecordingStats:
+    """Records login events instead of updating the analytics database"""
+
+    def __init__(self):
+        self.logins = []
+
+    def record_login(self, username, success, first_login=False):
+        self.logins.append((username, success))
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def authenticator(tmp_path, monkeypatch):
+    stats = RecordingStats()
+    monkeypatch.setattr(authenticator_module, "get_login_stats", lambda store: stats)
+    monkeypatch.setattr(authenticator_module, "ENABLE_AUDIT_LOGGING", False)
+    store = SQLiteUserStore(str(tmp_path / "users.db"))
+    auth = SecureAuthenticator(store=store, session_store=MemorySessionStore(60))
+    auth.create_user("alice", "correct horse")
+    return auth, store, stats
+
+
+def test_password_change_is_not_a_login(tmp_path, monkeypatch):
+    auth, store, stats = authenticator(tmp_path, monkeypatch)
+
+    assert auth.change_password("alice", "correct horse", "battery staple")[0]
+    assert stats.logins == []
+    assert not store.get("alice").get("last_login")
+    assert auth.authenticate("alice", "battery staple")[0]
+    assert stats.logins == [("alice", True)]
+
+
+def test_wrong_old_password_counts_towards_lockout(tmp_path, monkeypatch):
+    auth, store, stats = authenticator(tmp_path, monkeypatch)
+
+    assert not auth.change_password("alice", "wrong", "battery staple")[0]
+    assert stats.logins == [("alice", False)]
+    assert store.get("alice")["login_attempts"] == 1
@@ -0,0 +1,53 @@
+"""
+The streaming clause extractor must match extract_clauses on the joined text
+"""
+
+import os
+import random
+
+import pytest
+
+from utils.clause_extractor import ClauseExtractor
+
+SAMPLE_NDA = os.path.join(os.path.dirname(__file__), '..', 'sample_documents', 'sample_nda_clause.txt')
+
+
+def split_at_whitespace(text, parts, seed):
+    """Cut text into segments at random whitespace positions, as page or paragraph breaks would"""
+    positions = [i for i, char in enumerate(text) if char.isspace()]
+    cuts = sorted(random.Random(seed).sample(positions, min(parts - 1, len(positions))))
+    segments, start = [], 0
+    for cut in cuts:
+        segments.append(text[start:cut])
+        start = cut + 1
+    segments.append(text[start:])
+    return segments
+
+
+def assert_same_clauses(segments, window_chars=None):
+    extractor = ClauseExtractor()
+    kwargs = {} if window_chars is None else {'window_chars': window_chars}
+    streamed = list(extractor.extract_clauses_stream(({'text': segment} for segment in segments), **kwargs))
+    assert streamed == extractor.extract_clauses("\n".join(segments))
+
+
+def test_short_final_clause_releases_held_clauses():
+    assert_same_clauses(["Upon notice tenant pays all rent. If late, pay. X", "Fine. Yes. Sure. Good. Done. More."])
+
+
+@pytest.mark.parametrize("segments", [
+    [],
+    ["Too short."],
+    ["The tenant shall pay rent monthly.", "Fine."],
+    ["The tenant shall pay all rent on the first day of each month without any deduction."],
+])
+def test_small_documents(segments):
+    assert_same_clauses(segments)
+
+
+@pytest.mark.parametrize("parts", [1, 2, 5, 20])
+@pytest.mark.parametrize("seed", range(3))
+def test_sample_document_split_into_segments(parts, seed):
+    with open(SAMPLE_NDA, encoding='utf-8') as f:
+        text = f.read()
+    assert_same_clauses(split_at_whitespace(text, parts, seed))
@@ -0,0 +1,70 @@
+"""
+Background jobs keep their routing priority and survive restarts of the process that runs them
+"""
+
+import sqlite3
+
+from core.jobs import JobManager, JobStore
+from models.tiered_router import _request_priority
+
+
+class RecordingAnalyzer:
+    """Records the routing priority each analysis ran with"""
+
+    def __init__(self):
+        self.priorities = []
+
+    def analyze_document(self, content, filename, progress_callback=None):
+        self.priorities.append(_request_priority.get())
+        return {'filename': filename}
+
+
+def test_jobs_run_at_the_priority_they_were_submitted_with(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    analyzer = RecordingAnalyzer()
+    manager = JobManager(analyzer, store)
+    default_job = manager.submit("a.txt", b"text")
+    low_job = manager.submit("b.txt", b"text", priority="low")
+
+    manager._run_job(*store.claim_next(manager.owner))
+    manager._run_job(*store.claim_next(manager.owner))
+
+    assert analyzer.priorities == ["normal", "low"]
+    assert store.get(default_job)['status'] == store.get(low_job)['status'] == "completed"
+
+
+def test_job_table_from_an_older_version_gains_priority(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL, content BLOB, "
+        "stage TEXT, completed_stages TEXT NOT NULL DEFAULT '[]', result TEXT, error TEXT, "
+        "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO jobs (id, status, filename, created_at, updated_at) VALUES ('old', 'queued', 'a.txt', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    assert JobStore(db_path).claim_next("owner")[3] == "normal"
+
+
+def test_only_jobs_of_silent_owners_are_requeued(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    live = JobManager(RecordingAnalyzer(), store)
+    dead = JobManager(RecordingAnalyzer(), store)
+    live_job = live.submit("a.txt", b"text")
+    dead_job = dead.submit("b.txt", b"text")
+    assert store.claim_next(live.owner)[0] == live_job
+    assert store.claim_next(dead.owner)[0] == dead_job
+
+    # A second process starting up must leave jobs with a fresh heartbeat alone
+    assert store.requeue_interrupted(stale_after=60) == 0
+    store._conn.execute("UPDATE jobs SET heartbeat_at = heartbeat_at - 120")
+    store.heartbeat(live.owner)
+    assert store.requeue_interrupted(stale_after=60) == 1
+    assert store.get(live_job)['status'] == "running"
+    assert store.get(dead_job)['status'] == "queued"
+
+    # The dead owner's late writes no longer land on a job it lost
+    dead._run_job(dead_job, "b.txt", b"text", "normal")
+    assert store.get(dead_job)['status'] == "queued"
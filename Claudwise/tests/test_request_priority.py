@@ -0,0 +1,68 @@
+"""
+The routing priority a request asks for reaches the model calls made on its behalf
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.analysis_executor import AnalysisExecutor
+from models.tiered_router import _request_priority, iterate_at_priority
+
+
+class RecordingAnalyzer:
+    """Records the routing priority each call ran with"""
+
+    def simplify_clauses(self, clauses):
+        return [_request_priority.get() for _ in clauses]
+
+    def stream_simplify_clause(self, clause, stop_event=None):
+        for _ in range(3):
+            yield _request_priority.get()
+
+
+@pytest.mark.parametrize("priority", ["low", "normal", "high"])
+def test_pool_threads_run_at_the_requested_priority(priority):
+    executor = AnalysisExecutor(RecordingAnalyzer(), max_workers=2)
+    try:
+        assert asyncio.run(executor.run("simplify_clauses", ["a", "b"], priority=priority)) == [priority] * 2
+    finally:
+        executor.shutdown(wait=False)
+
+
+def test_stream_keeps_its_priority_on_whichever_thread_advances_it():
+    stream = iterate_at_priority(RecordingAnalyzer().stream_simplify_clause("a"), "high")
+    pieces = [next(stream)]
+
+    # Like iterate_in_threadpool, each piece may be pulled from a different thread
+    def advance():
+        pieces.append(next(stream))
+    for _ in range(2):
+        worker = threading.Thread(target=advance)
+        worker.start()
+        worker.join()
+
+    assert pieces == ["high"] * 3
+    assert _request_priority.get() == "normal"
+
+
+def test_closing_the_stream_closes_the_generation():
+    closed = []
+
+    def generation():
+        try:
+            yield "piece"
+            yield "piece"
+        finally:
+            closed.append(True)
+
+    stream = iterate_at_priority(generation(), "high")
+    next(stream)
+    stream.close()
+    assert closed == [True]
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        next(iterate_at_priority(iter([]), "urgent"))
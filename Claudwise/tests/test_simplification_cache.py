@@ -0,0 +1,56 @@
+"""
+Cached simplifications are keyed by the settings of the backend that actually produced them
+"""
+
+from core.lazy_component import LazyComponent
+from core.result_cache import ResultCache
+from core.simplification_cache import SimplificationCache, backend_signature
+from models.tiered_router import TieredRouter
+
+CLAUSE = "The Receiving Party shall hold the Confidential Information in strict confidence."
+
+
+class QualityBackend:
+    """Stands in for a generative backend with its own model and generation settings"""
+
+    def __init__(self, model_name, max_new_tokens):
+        self.model_name = model_name
+        self.simplify_generation_kwargs = {'max_new_tokens': max_new_tokens}
+
+
+def router(quality):
+    router = TieredRouter.__new__(TieredRouter)
+    router.model_name = "tiered:simple+granite"
+    router.quality = LazyComponent("granite", lambda: quality)
+    return router
+
+
+def test_router_signature_follows_its_quality_backend():
+    short, long = QualityBackend("granite-2b", 64), QualityBackend("granite-2b", 256)
+    short_router, long_router = router(short), router(long)
+    assert backend_signature(short_router) is None
+
+    short_router.quality.get()
+    long_router.quality.get()
+    assert backend_signature(short_router) == backend_signature(short)
+    assert backend_signature(short_router) != backend_signature(long_router)
+
+
+def test_nothing_is_cached_until_the_signature_is_known():
+    quality = router(QualityBackend("granite-2b", 64))
+    cache = SimplificationCache(lambda: backend_signature(quality), ResultCache(db_path=None))
+    calls = []
+
+    def simplify(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    assert cache.simplify_many([CLAUSE, CLAUSE], simplify) == [CLAUSE.upper()] * 2
+    cache.put(CLAUSE, "simplified")
+    assert cache.get(CLAUSE) is None and cache.namespace is None
+
+    quality.quality.get()
+    cache.put(CLAUSE, "simplified")
+    assert cache.get(CLAUSE) == "simplified"
+    assert cache.simplify_many([CLAUSE], simplify) == ["simplified"]
+    assert calls == [[CLAUSE]]
@@ -0,0 +1,96 @@
+"""
+A streamed simplification is cached once it completes, never when the client stopped it early
+"""
+
+import threading
+
+import pytest
+
+from core.clausewise_analyzer import ClauseWiseAnalyzer
+from core.result_cache import ResultCache
+from core.simplification_cache import SimplificationCache
+
+CLAUSE = "The Receiving Party shall hold the Confidential Information in strict confidence."
+PIECES = ["The ", "recipient ", "must ", "keep ", "it ", "secret."]
+
+
+class StreamingBackend:
+    """Yields fixed pieces and, like GraniteModel, only reads the caller's stop_event"""
+
+    def stream_simplify_clause(self, clause, stop_event=None):
+        for piece in PIECES:
+            if stop_event is not None and stop_event.is_set():
+                return
+            yield piece
+
+
+def analyzer(backend=None):
+    analyzer = ClauseWiseAnalyzer(result_cache=ResultCache(db_path=None),
+                                  simplification_cache=SimplificationCache({'backend': 'test'}, ResultCache(db_path=None)))
+    analyzer._components['ai_model'].set(backend or StreamingBackend())
+    return analyzer
+
+
+def test_completed_stream_is_cached():
+    streamed = analyzer()
+    stop = threading.Event()
+    assert ''.join(streamed.stream_simplify_clause(CLAUSE, stop_event=stop)) == ''.join(PIECES)
+    assert not stop.is_set()
+    assert streamed.simplification_cache.get(CLAUSE) == ''.join(PIECES)
+
+
+def test_stopped_stream_is_not_cached():
+    streamed = analyzer()
+    stop = threading.Event()
+    for index, piece in enumerate(streamed.stream_simplify_clause(CLAUSE, stop_event=stop)):
+        if index == 1:
+            stop.set()
+    assert streamed.simplification_cache.get(CLAUSE) is None
+
+
+def test_disconnected_stream_is_not_cached():
+    streamed = analyzer()
+    stream = streamed.stream_simplify_clause(CLAUSE, stop_event=threading.Event())
+    next(stream)
+    # What the server does when the client goes away mid-stream
+    stream.close()
+    assert streamed.simplification_cache.get(CLAUSE) is None
+
+
+class _Inputs(dict):
+    def to(self, device):
+        return self
+
+
+class _Tokenizer:
+    def apply_chat_template(self, messages, **kwargs):
+        return messages[-1]['content']
+
+    def __call__(self, prompt, **kwargs):
+        return _Inputs(input_ids=None)
+
+
+class _Model:
+    device = "cpu"
+
+    def generate(self, streamer, stopping_criteria, **kwargs):
+        for piece in PIECES:
+            if any(criterion(None, None) for criterion in stopping_criteria):
+                break
+            streamer.on_finalized_text(piece)
+        streamer.end()
+
+
+def test_granite_stream_leaves_the_callers_event_alone():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from models.granite_model import GraniteModel
+
+    granite = GraniteModel.__new__(GraniteModel)
+    granite.pipe = type('Pipe', (), {'tokenizer': _Tokenizer(), 'model': _Model()})()
+    granite.prefix_cache = None
+    streamed = analyzer(granite)
+    stop = threading.Event()
+    assert ''.join(streamed.stream_simplify_clause(CLAUSE, stop_event=stop)) == ''.join(PIECES)
+    assert not stop.is_set()
+    assert streamed.simplification_cache.get(CLAUSE) == ''.join(PIECES)
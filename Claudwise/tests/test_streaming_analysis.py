@@ -0,0 +1,96 @@
+"""
+Analyses that need no model stages stream the document and must match the whole-text path
+"""
+
+import os
+import random
+
+import pytest
+
+from core import clausewise_analyzer
+from core.clausewise_analyzer import ClauseWiseAnalyzer
+from core.result_cache import ResultCache
+
+SAMPLE_NDA = os.path.join(os.path.dirname(__file__), '..', 'sample_documents', 'sample_nda_clause.txt')
+STREAMED_FIELDS = ['document_info', 'text_length', 'word_count', 'clauses', 'clause_statistics', 'entities']
+
+
+@pytest.fixture
+def document():
+    with open(SAMPLE_NDA, 'rb') as f:
+        text = f.read()
+    # Leading and trailing blank lines exercise the stripped text length
+    return b"\n\n  " + text + b"\n\nPayment of $5,000 is due January 5, 2024.\n \n"
+
+
+def analyzer():
+    return ClauseWiseAnalyzer(result_cache=ResultCache(db_path=None), simplification_cache=None)
+
+
+def test_streamed_fields_match_whole_text_analysis(document, monkeypatch):
+    streamed_analyzer = analyzer()
+    # The streaming path must not build the whole document text
+    monkeypatch.setattr(streamed_analyzer.document_processor, 'process_document',
+                        lambda *args: pytest.fail("whole document text was built"))
+    streamed = streamed_analyzer.analyze_document(document, 'sample.txt', include=STREAMED_FIELDS)
+    monkeypatch.undo()
+
+    full = analyzer().analyze_document(document, 'sample.txt')
+    for field in STREAMED_FIELDS:
+        if field == 'entities':
+            assert {key: sorted(values) for key, values in streamed[field].items()} == \
+                {key: sorted(values) for key, values in full[field].items()}
+        else:
+            assert streamed[field] == full[field], field
+
+
+def test_streaming_reports_stages_in_order(document):
+    stages = []
+    analyzer().analyze_document(document, 'sample.txt', include=['clauses', 'entities'], progress_callback=stages.append)
+    assert stages == ['extract_text', 'clauses', 'entities']
+
+
+def test_streaming_rejects_empty_documents():
+    with pytest.raises(Exception, match="No text could be extracted"):
+        analyzer().analyze_document(b"\n \n", 'empty.txt', include=['clauses'])
+
+
+def long_document(paragraphs: int = 1500) -> bytes:
+    """Paragraphs whose entities cross paragraph breaks, sentence ends and window boundaries"""
+    rng = random.Random(7)
+    pieces = [
+        "The Supplier shall deliver the ordered goods",
+        "within {n} business days of each purchase order.",
+        "Acme", "Inc agrees to pay ${n},000.", "{n}.50 USD {n} for",
+        "services rendered on March {day},", "20{year} under the governing law of New York.",
+        "Either party must give notice", "of termination at least {n} days in advance.",
+        "The Customer will be responsible for any breach", "by its employees 0{day}/1{day}/20{year}.",
+        "Payment of {n} dollars", "is required to be made. Fees", "apply."
+    ]
+    text = []
+    for _ in range(paragraphs):
+        piece = rng.choice(pieces).format(n=rng.randint(1, 99), day=rng.randint(1, 9), year=rng.randint(10, 30))
+        text.append(piece + rng.choice(["\n\n", "\n \n", "\n\t\n\n", " \n\n"]))
+    return ("\n\n" + "".join(text)).encode('utf-8')
+
+
+@pytest.mark.parametrize('entity_engine', ['regex', 'scanner'])
+@pytest.mark.parametrize('window_chars', [None, 257])
+def test_streamed_entities_match_on_documents_longer_than_a_window(entity_engine, window_chars, monkeypatch):
+    document = long_document()
+    assert len(document) > clausewise_analyzer.STREAM_WINDOW_CHARS
+    if window_chars is not None:
+        monkeypatch.setattr(clausewise_analyzer, 'STREAM_WINDOW_CHARS', window_chars)
+    # Compare every distinct entity rather than an arbitrary ten per category
+    monkeypatch.setattr(ClauseWiseAnalyzer, '_limit_entities',
+                        staticmethod(lambda entities: {key: sorted(set(values)) for key, values in entities.items()}))
+
+    def analyze(**kwargs):
+        analyzer = ClauseWiseAnalyzer(result_cache=ResultCache(db_path=None), simplification_cache=None,
+                                      entity_engine=entity_engine)
+        return analyzer.analyze_document(document, 'long.txt', **kwargs)['entities']
+
+    streamed = analyze(include=['entities'])
+    full = analyze()
+    assert streamed == full
+    assert len(full['OBLIGATIONS']) > 10
@@ -3,12 +3,41 @@ Clause extraction and segmentation utilities
 """
 
 import re
-from typing import List, Dict, Tuple
+from typing import Any, Iterable, Iterator, List, Dict, Tuple
 import logging
 
+from config import STREAM_WINDOW_CHARS
+from utils.keyword_matcher import KeywordMatcher, KeywordTaxonomy
+from utils.prepared_document import PreparedDocument, normalize_text
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Split on whitespace after sentence-ending punctuation, skipping common abbreviations
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+')
+
+# Documents whose normalized text is this short produce no sections
+MIN_SECTION_LENGTH = 50
+
+# Clause types in priority order; the first type with a keyword in the clause wins
+CLAUSE_TYPES = KeywordTaxonomy({
+    'Confidentiality': ['confidential', 'non-disclosure', 'proprietary', 'trade secret'],
+    'Termination': ['terminate', 'termination', 'end', 'expire', 'dissolution'],
+    'Payment': ['payment', 'pay', 'compensation', 'salary', 'fee', 'remuneration'],
+    'Obligation': ['shall', 'must', 'required', 'obligated', 'responsible'],
+    'Liability': ['liable', 'liability', 'damages', 'indemnify', 'indemnification'],
+    'Intellectual Property': ['intellectual property', 'copyright', 'trademark', 'patent'],
+    'Jurisdiction': ['jurisdiction', 'governing law', 'court', 'dispute resolution'],
+    'Definition': ['means', 'defined as', 'refers to', 'definition'],
+    'Warranty': ['warrant', 'warranty', 'guarantee', 'represent'],
+    'Force Majeure': ['force majeure', 'act of god', 'unforeseeable']
+})
+
+COMPLEX_TERMS = KeywordMatcher([
+    'notwithstanding', 'heretofore', 'hereinafter', 'whereas', 'thereof',
+    'indemnification', 'subrogation', 'covenant', 'estoppel', 'severability'
+])
+
 class ClauseExtractor:
     """Extract and segment clauses from legal documents"""
     
@@ -31,33 +60,125 @@ class ClauseExtractor:
             section_clauses = self._extract_clauses_from_section(section, section_idx + 1)
             
             for clause_text in section_clauses:
-                clause = {
-                    'id': clause_id,
-                    'section': section_idx + 1,
-                    'text': clause_text.strip(),
-                    'type': self._classify_clause_type(clause_text),
-                    'length': len(clause_text.split()),
-                    'complexity': self._assess_complexity(clause_text)
-                }
-                clauses.append(clause)
+                clauses.append(self._build_clause(clause_id, section_idx + 1, clause_text))
                 clause_id += 1
         
         return clauses
     
-    def _preprocess_text(self, text: str) -> str:
-        """Clean and preprocess the text"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+    def extract_clauses_stream(self, segments: Iterable[Dict[str, Any]],
+                               window_chars: int = STREAM_WINDOW_CHARS) -> Iterator[Dict[str, Any]]:
+        """Extract clauses incrementally from document segments, buffering at most a window of text"""
+        # Normalizing whitespace leaves extract_clauses a single section, so this
+        # reproduces its output sentence by sentence without holding the document
+        clause_id = 1
+        buffer = ""
+        current_clause = ""
+        normalized_length = 0
+        held_clauses = []
         
-        # Fix common OCR errors
-        text = text.replace('�', ' ')
-        text = text.replace('\x00', ' ')
+        def completed_clauses(clause_text: str) -> Iterator[Dict[str, Any]]:
+            nonlocal clause_id
+            clause_text = clause_text.strip()
+            if len(clause_text.split()) > 5:
+                held_clauses.append(self._build_clause(clause_id, 1, clause_text))
+                clause_id += 1
+            # Hold clauses back until the document is long enough to form a section; a short
+            # final clause must still release the ones held before it
+            if normalized_length > MIN_SECTION_LENGTH:
+                yield from held_clauses
+                held_clauses.clear()
         
-        # Normalize quotes
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace(''', "'").replace(''', "'")
+        for segment in segments:
+            text = self._preprocess_text(segment['text'])
+            if not text:
+                continue
+            
+            normalized_length += len(text) + (1 if normalized_length else 0)
+            buffer = f"{buffer} {text}" if buffer else text
+            
+            # The last piece may be an unfinished sentence continuing in the next segment
+            pieces = SENTENCE_SPLIT_PATTERN.split(buffer)
+            buffer = pieces.pop()
+            if len(buffer) > window_chars:
+                pieces.append(buffer)
+                buffer = ""
+            
+            for piece in pieces:
+                sentence = piece.strip()
+                if len(sentence) <= 10:
+                    continue
+                
+                if self._is_clause_boundary(sentence):
+                    yield from completed_clauses(current_clause)
+                    current_clause = sentence
+                else:
+                    current_clause += " " + sentence
+                
+                if len(current_clause) > window_chars:
+                    yield from completed_clauses(current_clause)
+                    current_clause = ""
         
-        return text.strip()
+        sentence = buffer.strip()
+        if len(sentence) > 10:
+            if self._is_clause_boundary(sentence):
+                yield from completed_clauses(current_clause)
+                current_clause = sentence
+            else:
+                current_clause += " " + sentence
+        yield from completed_clauses(current_clause)
+    
+    def split_into_chunks(self, text: str, max_chars: int) -> List[str]:
+        """Split text into chunks of at most max_chars, breaking at clause boundaries and keeping every sentence"""
+        sentences = [piece.strip() for piece in SENTENCE_SPLIT_PATTERN.split(self._preprocess_text(text))
+                     if piece.strip()]
+        
+        # Group sentences into clauses the same way extract_clauses does
+        clauses: List[List[str]] = []
+        for sentence in sentences:
+            if not clauses or self._is_clause_boundary(sentence):
+                clauses.append([])
+            clauses[-1].append(sentence)
+        
+        chunks = []
+        chunk = ""
+        
+        def add(piece: str):
+            nonlocal chunk
+            if chunk and len(chunk) + 1 + len(piece) > max_chars:
+                chunks.append(chunk)
+                chunk = ""
+            chunk = f"{chunk} {piece}" if chunk else piece
+        
+        for clause in clauses:
+            clause_text = " ".join(clause)
+            if len(clause_text) <= max_chars:
+                add(clause_text)
+                continue
+            # Clauses longer than a chunk are split between sentences, and sentences between characters
+            for sentence in clause:
+                for start in range(0, len(sentence), max_chars):
+                    add(sentence[start:start + max_chars])
+        
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    def _build_clause(self, clause_id: int, section_num: int, clause_text: str) -> Dict[str, Any]:
+        """Build the clause record for a piece of clause text"""
+        return {
+            'id': clause_id,
+            'section': section_num,
+            'text': clause_text.strip(),
+            'type': self._classify_clause_type(clause_text),
+            'length': len(clause_text.split()),
+            'complexity': self._assess_complexity(clause_text)
+        }
+    
+    def _preprocess_text(self, text: str) -> str:
+        """Clean and preprocess the text"""
+        if isinstance(text, PreparedDocument):
+            return text.normalized
+        return normalize_text(text)
     
     def _split_into_sections(self, text: str) -> List[str]:
         """Split document into logical sections"""
@@ -78,7 +199,7 @@ class ClauseExtractor:
         
         # If no clear sections, split by paragraphs
         paragraphs = text.split('\n\n')
-        return [p.strip() for p in paragraphs if len(p.strip()) > 50]
+        return [p.strip() for p in paragraphs if len(p.strip()) > MIN_SECTION_LENGTH]
     
     def _extract_clauses_from_section(self, section: str, section_num: int) -> List[str]:
         """Extract clauses from a section"""
@@ -125,27 +246,7 @@ class ClauseExtractor:
     
     def _classify_clause_type(self, clause_text: str) -> str:
         """Classify the type of clause"""
-        clause_text_lower = clause_text.lower()
-        
-        # Define clause type patterns
-        clause_types = {
-            'Confidentiality': ['confidential', 'non-disclosure', 'proprietary', 'trade secret'],
-            'Termination': ['terminate', 'termination', 'end', 'expire', 'dissolution'],
-            'Payment': ['payment', 'pay', 'compensation', 'salary', 'fee', 'remuneration'],
-            'Obligation': ['shall', 'must', 'required', 'obligated', 'responsible'],
-            'Liability': ['liable', 'liability', 'damages', 'indemnify', 'indemnification'],
-            'Intellectual Property': ['intellectual property', 'copyright', 'trademark', 'patent'],
-            'Jurisdiction': ['jurisdiction', 'governing law', 'court', 'dispute resolution'],
-            'Definition': ['means', 'defined as', 'refers to', 'definition'],
-            'Warranty': ['warrant', 'warranty', 'guarantee', 'represent'],
-            'Force Majeure': ['force majeure', 'act of god', 'unforeseeable']
-        }
-        
-        for clause_type, keywords in clause_types.items():
-            if any(keyword in clause_text_lower for keyword in keywords):
-                return clause_type
-        
-        return 'General'
+        return CLAUSE_TYPES.first_match(clause_text, default='General')
     
     def _assess_complexity(self, clause_text: str) -> str:
         """Assess the complexity of a clause"""
@@ -154,12 +255,8 @@ class ClauseExtractor:
         sentence_count = len(sentences)
         avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
         
-        # Count complex legal terms
-        complex_terms = [
-            'notwithstanding', 'heretofore', 'hereinafter', 'whereas', 'thereof',
-            'indemnification', 'subrogation', 'covenant', 'estoppel', 'severability'
-        ]
-        complex_term_count = sum(1 for term in complex_terms if term in clause_text.lower())
+        # Count distinct complex legal terms
+        complex_term_count = len(COMPLEX_TERMS.counts(clause_text))
         
         # Assess complexity
         if word_count > 100 or avg_sentence_length > 25 or complex_term_count > 2:
@@ -205,7 +302,7 @@ class ClauseExtractor:
         """Simple sentence splitting without NLTK"""
         # Split on periods, exclamation marks, and question marks
         # But be careful about abbreviations and decimals
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+', text)
+        sentences = SENTENCE_SPLIT_PATTERN.split(text)
         
         # Clean up sentences
         cleaned_sentences = []
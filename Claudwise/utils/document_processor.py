@@ -2,15 +2,120 @@
 Document processing utilities for multiple file formats
 """
 
-import PyPDF2
-from docx import Document
 import io
-from typing import Optional, List, Dict
+import multiprocessing
+import os
+import re
+import signal
+import tempfile
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterator, Optional, List, Dict
 import logging
 
+from config import PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_CHUNK, PDF_PAGE_TIMEOUT, PDF_WORKERS
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PyPDF2 and python-docx are imported by the first document that needs them,
+# so TXT-only processes never load either
+def _pdf_reader(file_content: bytes):
+    """Open a PDF with PyPDF2"""
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(file_content))
+
+def _docx_document(file_content: bytes):
+    """Open a DOCX with python-docx"""
+    from docx import Document
+    return Document(io.BytesIO(file_content))
+
+# Each worker keeps the PDF it last opened, so consecutive chunks of a document parse it once
+_worker_pdf: Optional[tuple] = None
+
+class _PageTimeout(Exception):
+    """Raised inside a worker when a page runs past PDF_PAGE_TIMEOUT"""
+
+def _on_page_timeout(signum, frame):
+    raise _PageTimeout()
+
+def _extract_pdf_page(pdf_reader, page_num: int) -> str:
+    """Extract one page in a worker, skipping it after PDF_PAGE_TIMEOUT where SIGALRM exists (not on Windows)"""
+    if not hasattr(signal, 'setitimer'):
+        return pdf_reader.pages[page_num].extract_text() or ""
+    previous = signal.signal(signal.SIGALRM, _on_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, PDF_PAGE_TIMEOUT)
+    try:
+        return pdf_reader.pages[page_num].extract_text() or ""
+    except _PageTimeout:
+        logger.warning(f"Timed out extracting PDF page {page_num + 1}; skipping it")
+        return ""
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _extract_pdf_page_range(path: str, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) of a PDF file; runs inside a worker process"""
+    global _worker_pdf
+    if _worker_pdf is None or _worker_pdf[0] != path:
+        with open(path, 'rb') as f:
+            _worker_pdf = (path, _pdf_reader(f.read()))
+    return [_extract_pdf_page(_worker_pdf[1], page_num) for page_num in range(start, end)]
+
+def _register_pdf_worker(pids):
+    """Worker initializer: report this process so the pool can be killed if a page hangs"""
+    pids.put(os.getpid())
+
+class _PdfWorkerPool:
+    """Process pool for PDF chunks that knows its worker processes"""
+    
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context()
+        self._pids = context.SimpleQueue()
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=_register_pdf_worker, initargs=(self._pids,))
+    
+    def terminate(self):
+        """Stop the pool, killing workers; shutdown() alone leaves one stuck in extract_text running"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        while not self._pids.empty():
+            try:
+                os.kill(self._pids.get(), signal.SIGTERM)
+            except OSError:
+                pass
+
+# One worker pool shared by every PDF, started on first use and replaced when it breaks or a page hangs
+_pdf_pool: Optional[_PdfWorkerPool] = None
+_pdf_pool_lock = threading.Lock()
+# Runs a chunk gets before its pages are skipped, when pools keep breaking under it
+_PDF_CHUNK_ATTEMPTS = 3
+
+def _pdf_workers() -> int:
+    """Worker processes for PDF extraction"""
+    return PDF_WORKERS or os.cpu_count() or 1
+
+def _get_pdf_pool() -> _PdfWorkerPool:
+    """Return the shared PDF worker pool, starting it if needed"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = _PdfWorkerPool(_pdf_workers())
+        return _pdf_pool
+
+def _discard_pdf_pool(pool: _PdfWorkerPool, terminate: bool):
+    """Stop using a pool, killing its workers when one is stuck; the next document starts a fresh one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not pool:
+            # Already replaced by another document
+            return
+        _pdf_pool = None
+    if terminate:
+        pool.terminate()
+    else:
+        pool.executor.shutdown(wait=False)
+
 class DocumentProcessor:
     """Process documents in various formats (PDF, DOCX, TXT)"""
     
@@ -18,29 +123,99 @@ class DocumentProcessor:
     def extract_text_from_pdf(file_content: bytes) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            text = ""
+            pdf_reader = _pdf_reader(file_content)
+            page_count = len(pdf_reader.pages)
             
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
+            if page_count < PDF_PARALLEL_MIN_PAGES or _pdf_workers() == 1:
+                page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
+            else:
+                page_texts = DocumentProcessor._extract_pdf_pages_parallel(file_content, pdf_reader, page_count)
             
-            return text.strip()
+            return "\n".join(page_texts).strip()
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             raise Exception(f"Failed to process PDF: {str(e)}")
     
     @staticmethod
-    def extract_text_from_docx(file_content: bytes) -> str:
-        """Extract text from DOCX file"""
+    def _extract_pdf_pages_parallel(file_content: bytes, pdf_reader, page_count: int) -> List[str]:
+        """Extract PDF pages across the shared process pool in page-range chunks"""
+        # Workers read the file from disk instead of every chunk pickling the whole PDF
+        with tempfile.NamedTemporaryFile(prefix="clausewise-", suffix=".pdf", delete=False) as f:
+            f.write(file_content)
+            path = f.name
         try:
-            doc = Document(io.BytesIO(file_content))
-            text = ""
+            chunk_texts = DocumentProcessor._extract_pdf_chunks(path, page_count)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Process pool unavailable, extracting PDF serially: {e}")
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        
+        return [text for start in sorted(chunk_texts) for text in chunk_texts[start]]
+    
+    @staticmethod
+    def _extract_pdf_chunks(path: str, page_count: int) -> Dict[int, List[str]]:
+        """Run every chunk on the shared pool, resubmitting chunks a broken pool lost; keyed by first page"""
+        pending = [
+            (start, min(start + PDF_PAGES_PER_CHUNK, page_count))
+            for start in range(0, page_count, PDF_PAGES_PER_CHUNK)
+        ]
+        attempts = dict.fromkeys((start for start, _ in pending), 0)
+        chunk_texts: Dict[int, List[str]] = {}
+        while pending:
+            for start, end in pending:
+                attempts[start] += 1
+            pool = _get_pdf_pool()
+            try:
+                futures = [(chunk, pool.executor.submit(_extract_pdf_page_range, path, *chunk)) for chunk in pending]
+            except (BrokenProcessPool, RuntimeError):
+                # Broken, or shut down by another document since we fetched it
+                futures = []
+            broken = len(futures) < len(pending)
+            lost = pending[len(futures):]
             
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            # Results are collected in submission order, so a chunk's budget starts no earlier
+            # than the chunks queued ahead of it have finished. Workers skip slow pages themselves,
+            # so this only trips when a page is stuck where the timer cannot interrupt it
+            for index, ((start, end), future) in enumerate(futures):
+                try:
+                    chunk_texts[start] = future.result(timeout=PDF_PAGE_TIMEOUT * (end - start + 1))
+                except (BrokenProcessPool, CancelledError):
+                    # A crashed worker, or another document's stuck page took the pool down
+                    broken = True
+                    lost.append((start, end))
+                except FutureTimeoutError:
+                    logger.warning(f"Timed out extracting PDF pages {start + 1}-{end}; skipping them")
+                    chunk_texts[start] = [""] * (end - start)
+                    for chunk, later in futures[index + 1:]:
+                        if later.done() and not later.cancelled() and later.exception() is None:
+                            chunk_texts[chunk[0]] = later.result()
+                        else:
+                            lost.append(chunk)
+                    _discard_pdf_pool(pool, terminate=True)
+                    break
+            else:
+                if broken:
+                    _discard_pdf_pool(pool, terminate=False)
             
-            return text.strip()
+            pending = []
+            for start, end in lost:
+                if attempts[start] >= _PDF_CHUNK_ATTEMPTS:
+                    logger.warning(f"PDF pages {start + 1}-{end} failed {attempts[start]} times; skipping them")
+                    chunk_texts[start] = [""] * (end - start)
+                else:
+                    pending.append((start, end))
+        return chunk_texts
+    
+    @staticmethod
+    def extract_text_from_docx(file_content: bytes) -> str:
+        """Extract text from DOCX file"""
+        try:
+            doc = _docx_document(file_content)
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {e}")
             raise Exception(f"Failed to process DOCX: {str(e)}")
@@ -49,23 +224,26 @@ class DocumentProcessor:
     def extract_text_from_txt(file_content: bytes) -> str:
         """Extract text from TXT file"""
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    text = file_content.decode(encoding)
-                    return text.strip()
-                except UnicodeDecodeError:
-                    continue
-            
-            # If all encodings fail, use utf-8 with error handling
-            text = file_content.decode('utf-8', errors='ignore')
-            return text.strip()
+            return DocumentProcessor._decode_text(file_content).strip()
         except Exception as e:
             logger.error(f"Error extracting text from TXT: {e}")
             raise Exception(f"Failed to process TXT: {str(e)}")
     
+    @staticmethod
+    def _decode_text(file_content: bytes) -> str:
+        """Decode raw text bytes, trying common encodings in turn"""
+        # Try different encodings
+        encodings = ['utf-8', 'latin-1', 'cp1252']
+        
+        for encoding in encodings:
+            try:
+                return file_content.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        
+        # If all encodings fail, use utf-8 with error handling
+        return file_content.decode('utf-8', errors='ignore')
+    
     @staticmethod
     def process_document(file_content: bytes, file_type: str) -> str:
         """Process document based on file type"""
@@ -80,6 +258,50 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     
+    @staticmethod
+    def iter_document(file_content: bytes, file_type: str) -> Iterator[Dict[str, Any]]:
+        """Yield a document page by page (PDF) or paragraph by paragraph (DOCX, TXT)"""
+        # Offsets index the full text: PDF pages and DOCX paragraphs joined with
+        # newlines, or the decoded TXT file. Each segment's separator is the full
+        # text between the previous segment and this one, so concatenating
+        # separator + text for every segment rebuilds the full text
+        file_type = file_type.lower()
+        
+        if file_type == '.pdf':
+            pdf_reader = _pdf_reader(file_content)
+            offset = 0
+            for page_num, page in enumerate(pdf_reader.pages, 1):
+                text = page.extract_text() or ""
+                yield {'text': text, 'offset': offset, 'page': page_num, 'separator': "\n" if page_num > 1 else ""}
+                offset += len(text) + 1
+        elif file_type == '.docx':
+            doc = _docx_document(file_content)
+            offset = 0
+            separator = ""
+            for paragraph in doc.paragraphs:
+                if paragraph.text.strip():
+                    yield {'text': paragraph.text, 'offset': offset, 'page': None, 'separator': separator}
+                    separator = "\n"
+                else:
+                    separator += paragraph.text + "\n"
+                offset += len(paragraph.text) + 1
+        elif file_type == '.txt':
+            text = DocumentProcessor._decode_text(file_content)
+            position = 0
+            previous_end = 0
+            # Paragraphs are separated by blank lines
+            for separator in re.finditer(r'\n[ \t]*\n', text):
+                if text[position:separator.start()].strip():
+                    yield {'text': text[position:separator.start()], 'offset': position, 'page': None,
+                           'separator': text[previous_end:position]}
+                    previous_end = separator.start()
+                position = separator.end()
+            if text[position:].strip():
+                yield {'text': text[position:], 'offset': position, 'page': None,
+                       'separator': text[previous_end:position]}
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    
     @staticmethod
     def validate_file_size(file_size: int, max_size: int = 10 * 1024 * 1024) -> bool:
         """Validate file size (default max: 10MB)"""
@@ -0,0 +1,173 @@
+"""
+Single-pass entity scanner built on one precompiled alternation regex
+"""
+
+import re
+from typing import Dict, List, NamedTuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEGAL_TERMS = [
+    'confidential', 'proprietary', 'intellectual property', 'copyright',
+    'trademark', 'patent', 'liability', 'indemnification', 'termination',
+    'breach', 'covenant', 'warranty', 'jurisdiction', 'governing law'
+]
+
+_MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June', 'July',
+    'August', 'September', 'October', 'November', 'December'
+]
+
+# Characters that case-fold onto ASCII letters under re.IGNORECASE
+_FOLDING_CHARS = '\u0130\u0131\u017f\u212a'
+
+# \b in front of a word character, checked once that character has been consumed
+_WORD_START = r'(?<!\w(?s:.))'
+
+
+def _first_char_class(char: str, ignorecase: bool) -> str:
+    """Spell out the characters a pattern's first letter can match"""
+    if not ignorecase:
+        return re.escape(char)
+    candidates = {char.lower(), char.upper(), *_FOLDING_CHARS}
+    matching = sorted(c for c in candidates if re.fullmatch(re.escape(char), c, re.IGNORECASE))
+    return '[' + ''.join(re.escape(c) for c in matching) + ']'
+
+
+def _word_branches(kind: str, words: List[str], ignorecase: bool = False,
+                   word_start: bool = False, tail: str = '') -> List[str]:
+    """Build one branch per first letter, tagged with an empty group named after the entity kind"""
+    by_first: Dict[str, List[str]] = {}
+    for word in words:
+        first = word[0].lower() if ignorecase else word[0]
+        by_first.setdefault(first, []).append(word[1:])
+
+    branches = []
+    for i, (first, rests) in enumerate(by_first.items()):
+        rest = '|'.join(re.escape(r) for r in rests)
+        rest = f'(?i:{rest})' if ignorecase else f'(?:{rest})'
+        boundary = _WORD_START if word_start else ''
+        branches.append(f'{_first_char_class(first, ignorecase)}{boundary}(?P<{kind}_{i}>){rest}{tail}')
+    return branches
+
+
+# One alternation equivalent to the regex extractor's separate patterns. Every
+# branch starts with a literal character (class) so the regex engine can skip
+# positions that cannot start any entity; the empty named group that follows
+# identifies the entity kind through match.lastgroup.
+_SCANNER_PATTERN = re.compile('|'.join(
+    [
+        r'\d(?<!\w\d)(?P<DATE_NUMERIC_0>)\d?[/-]\d{1,2}[/-]\d{2,4}\b',
+        r'\d(?<!\w\d)(?P<MONEY_WORDS_0>)\d*\s*(?i:dollars?)\b',
+        r'\$(?P<MONEY_SYMBOL_0>)[\d,]+\.?\d*'
+    ]
+    + _word_branches('MONEY_USD', ['USD'], ignorecase=True, tail=r'\s*[\d,]+\.?\d*')
+    + _word_branches('DATE_WRITTEN', _MONTHS, ignorecase=True, word_start=True,
+                     tail=r'\s+\d{1,2},?\s+\d{4}\b')
+    + _word_branches('ORG_SUFFIX', ['Inc', 'LLC', 'Corp', 'Corporation', 'Company', 'Ltd'],
+                     word_start=True, tail=r'\b')
+    + _word_branches('LEGAL_TERM', LEGAL_TERMS, ignorecase=True)
+    + _word_branches('OBLIGATION', ['shall', 'must', 'will', 'agrees to', 'required to', 'responsible for'],
+                     ignorecase=True, tail=r'\s+[^.]{10,100}')
+))
+
+# Capitalized word in front of an organization suffix, e.g. "Acme" in "Acme Inc"
+_ORG_PREFIX_PATTERN = re.compile(r'\b[A-Z][a-z]+\s+\Z')
+_ORG_PREFIX_LOOKBACK = 128
+
+# Bare suffixes that count as organizations on their own
+_STANDALONE_ORG_WORDS = {'Company', 'Corporation', 'LLC', 'Inc'}
+
+_GROUP_LABELS = {
+    'DATE_NUMERIC': 'DATES',
+    'DATE_WRITTEN': 'DATES',
+    'MONEY_SYMBOL': 'MONEY',
+    'MONEY_USD': 'MONEY',
+    'MONEY_WORDS': 'MONEY',
+    'LEGAL_TERM': 'LEGAL_TERMS',
+    'OBLIGATION': 'OBLIGATIONS'
+}
+
+
+class EntitySpan(NamedTuple):
+    """A typed entity match with character offsets into the scanned text"""
+    label: str
+    start: int
+    end: int
+    text: str
+
+
+class EntityScanner:
+    """Find dates, money, organizations, legal terms and obligations in one walk over the text"""
+
+    def scan(self, text: str) -> List[EntitySpan]:
+        """Return entity spans in order of their start offset"""
+        spans = []
+        # End of the last accepted match per source pattern, to keep each
+        # pattern's matches non-overlapping as re.findall would
+        last_end: Dict[str, int] = {}
+        position = 0
+
+        while True:
+            match = _SCANNER_PATTERN.search(text, position)
+            if match is None:
+                break
+
+            group = match.lastgroup.rsplit('_', 1)[0]
+            start, end = match.span()
+            # Resume right after the match start so other entities inside it are still found
+            position = start + 1
+
+            if group == 'ORG_SUFFIX':
+                spans.extend(self._organization_spans(text, match, last_end))
+                continue
+
+            if start < last_end.get(group, 0):
+                continue
+            last_end[group] = end
+            spans.append(EntitySpan(_GROUP_LABELS[group], start, end, match.group()))
+
+        # Named organizations are found from their suffix, after spans that start later
+        spans.sort(key=lambda span: span.start)
+        return spans
+
+    def _organization_spans(self, text: str, match, last_end: Dict[str, int]) -> List[EntitySpan]:
+        """Emit the named organization ending at this suffix and the bare suffix itself"""
+        spans = []
+        start, end = match.span()
+
+        prefix = _ORG_PREFIX_PATTERN.search(text, max(0, start - _ORG_PREFIX_LOOKBACK), start)
+        if prefix is not None and prefix.start() >= last_end.get('ORG_NAMED', 0):
+            last_end['ORG_NAMED'] = end
+            spans.append(EntitySpan('ORGANIZATIONS', prefix.start(), end, text[prefix.start():end]))
+
+        if match.group() in _STANDALONE_ORG_WORDS:
+            spans.append(EntitySpan('ORGANIZATIONS', start, end, match.group()))
+
+        return spans
+
+    def collect(self, text: str) -> Dict[str, List[str]]:
+        """Group scanned entities by category, matching the regex extractor's output"""
+        entities = {
+            "PARTIES": [],
+            "DATES": [],
+            "MONEY": [],
+            "ORGANIZATIONS": [],
+            "LOCATIONS": [],
+            "LEGAL_TERMS": [],
+            "OBLIGATIONS": []
+        }
+
+        found_terms = set()
+        for span in self.scan(text):
+            if span.label == 'LEGAL_TERMS':
+                found_terms.add(span.text.lower())
+            elif span.label == 'OBLIGATIONS':
+                entities['OBLIGATIONS'].append(span.text.strip())
+            else:
+                entities[span.label].append(span.text)
+
+        entities['LEGAL_TERMS'] = [term for term in LEGAL_TERMS if term in found_terms]
+        return entities
@@ -0,0 +1,115 @@
+"""
+Multi-keyword matching over a prefix trie compiled into a single regex
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks a trie node where a keyword ends
+_END = ''
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Render a trie as nested alternations that prefer the longest keyword"""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ''
+
+    alternation = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if _END in node:
+        # A keyword ends here, so longer keywords sharing this prefix are optional
+        return '(?:' + alternation + ')?'
+    return alternation
+
+
+class KeywordMatcher:
+    """Count every occurrence of a fixed keyword set in one walk over the text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        """Compile the keywords; matching is case-insensitive like substring checks on lowered text"""
+        self.keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+
+        trie: Dict[str, dict] = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[_END] = {}
+
+        # Shared prefixes are matched once, so the cost per text position is bounded
+        # by keyword length rather than by the number of keywords
+        self._pattern = re.compile(_trie_pattern(trie)) if self.keywords else None
+
+        # Keywords that are prefixes of the longest keyword matched at a position
+        keyword_set = set(self.keywords)
+        self._prefixes = {
+            keyword: [keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in keyword_set]
+            for keyword in self.keywords
+        }
+
+    def iter_matches(self, text: str) -> Iterator[str]:
+        """Yield every (possibly overlapping) keyword occurrence in order of its start offset"""
+        if self._pattern is None:
+            return
+
+        text_lower = text.lower()
+        search = self._pattern.search
+        position = 0
+        while True:
+            match = search(text_lower, position)
+            if match is None:
+                return
+            yield from self._prefixes[match.group()]
+            # Keywords can start inside a longer match, e.g. "disclosure" in "non-disclosure"
+            position = match.start() + 1
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Return the number of occurrences of each keyword found in the text"""
+        return Counter(self.iter_matches(text))
+
+
+class KeywordTaxonomy:
+    """Ordered categories of keywords, all matched in a single pass"""
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        """Build one matcher over every category's keywords"""
+        self.categories = {name: [keyword.lower() for keyword in keywords]
+                           for name, keywords in categories.items()}
+        self.matcher = KeywordMatcher(
+            keyword for keywords in self.categories.values() for keyword in keywords
+        )
+
+        # Position of the first category listing each keyword
+        self._names = list(self.categories)
+        self._ranks: Dict[str, int] = {}
+        for rank, keywords in enumerate(self.categories.values()):
+            for keyword in keywords:
+                self._ranks.setdefault(keyword, rank)
+
+    def category_counts(self, text: str) -> Dict[str, int]:
+        """Return total keyword hits per category, in category order"""
+        hits = self.matcher.counts(text)
+        return {name: sum(hits[keyword] for keyword in keywords)
+                for name, keywords in self.categories.items()}
+
+    def matching(self, text: str) -> List[str]:
+        """Return the categories with at least one keyword in the text, in category order"""
+        return [name for name, count in self.category_counts(text).items() if count]
+
+    def first_match(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Return the first category, in order, with a keyword in the text"""
+        best = None
+        for keyword in self.matcher.iter_matches(text):
+            rank = self._ranks[keyword]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    # Nothing can outrank the first category
+                    break
+        return self._names[best] if best is not None else default
@@ -0,0 +1,80 @@
+"""
+Document text with derived views computed once and shared across analysis stages
+"""
+
+import re
+from array import array
+from functools import cached_property
+from typing import List, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sentence delimiters used by the summary and obligation stages
+SENTENCE_DELIMITER_PATTERN = re.compile(r'[.!?]+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and clean extraction artifacts before clause segmentation"""
+    # Remove excessive whitespace
+    text = re.sub(r'\s+', ' ', text)
+
+    # Fix common OCR errors
+    text = text.replace('�', ' ')
+    text = text.replace('\x00', ' ')
+
+    # Normalize quotes
+    text = text.replace('"', '"').replace('"', '"')
+    text = text.replace(''', "'").replace(''', "'")
+
+    return text.strip()
+
+
+class PreparedDocument(str):
+    """Document text that caches its lowercase view, normalized text, sentence offsets and words"""
+
+    def lower(self) -> str:
+        """Return the cached lowercase view"""
+        return self.lowercase
+
+    @cached_property
+    def lowercase(self) -> str:
+        """Lowercased text, computed on first use"""
+        return str.lower(self)
+
+    @cached_property
+    def normalized(self) -> str:
+        """Whitespace-normalized text used for clause segmentation"""
+        return normalize_text(self)
+
+    @cached_property
+    def sentence_offsets(self) -> Tuple[array, array]:
+        """Start and end offsets of each piece between sentence delimiters"""
+        starts = array('q', [0])
+        ends = array('q')
+        for match in SENTENCE_DELIMITER_PATTERN.finditer(self):
+            ends.append(match.start())
+            starts.append(match.end())
+        ends.append(len(self))
+        return starts, ends
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        """Pieces between sentence delimiters, as re.split(r'[.!?]+', text) returns them"""
+        return [self[start:end] for start, end in zip(*self.sentence_offsets)]
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Whitespace-separated tokens"""
+        return self.split()
+
+    @cached_property
+    def word_count(self) -> int:
+        """Number of whitespace-separated tokens"""
+        return len(self.words)
+
+
+def prepare(text: str) -> PreparedDocument:
+    """Wrap text as a PreparedDocument, reusing it if it already is one"""
+    return text if isinstance(text, PreparedDocument) else PreparedDocument(text)
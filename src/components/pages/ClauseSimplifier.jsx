@@ -16,18 +16,40 @@ function ClauseSimplifier() {
 
     setLoading(true)
     setError(null)
+    setSimplified('')
 
     try {
-      const response = await fetch('/api/simplify', {
+      const response = await fetch('/api/simplify/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ clause: input }),
       })
 
-      if (!response.ok) throw new Error('Simplification failed')
-      const data = await response.json()
-      setSimplified(data.simplified)
+      if (!response.ok || !response.body) throw new Error('Simplification failed')
+
+      // The server sends one JSON object per line as text is generated
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ''
+
+      while (true) {
+        const { value, done } = await reader.read()
+        if (done) break
+
+        buffered += decoder.decode(value, { stream: true })
+        const lines = buffered.split('\n')
+        buffered = lines.pop()
+
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.error) throw new Error(event.error)
+          if (event.token) setSimplified((previous) => previous + event.token)
+          if (event.done) setSimplified(event.simplified)
+        }
+      }
     } catch (err) {
+      setSimplified(null)
       setError(err.message)
     } finally {
       setLoading(false)
@@ -87,7 +109,7 @@ function ClauseSimplifier() {
           </motion.div>
         )}
 
-        {simplified && (
+        {simplified !== null && (
           <motion.div className="comparison" variants={itemVariants}>
             <div className="comparison-column">
               <h3>Original</h3>